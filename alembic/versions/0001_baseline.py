@@ -0,0 +1,106 @@
+"""Baseline schema: users, user types, vehicle appraisals and deductions
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+
+Databases created before migrations were introduced already have these tables;
+mark them as up to date with ``alembic stamp 0001_baseline`` instead of running
+this revision.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_types",
+        sa.Column("user_type_id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(45), nullable=False),
+        sa.Column("code", sa.String(45), nullable=False),
+        sa.Column("description", sa.String(100), nullable=False),
+        sa.Column("created_date", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("pages", sa.String(450), nullable=True),
+    )
+    op.create_index("ix_user_types_user_type_id", "user_types", ["user_type_id"])
+
+    op.create_table(
+        "users",
+        sa.Column("user_id", sa.Integer(), primary_key=True),
+        sa.Column("user_type_id", sa.Integer(), sa.ForeignKey("user_types.user_type_id"), nullable=False),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("password", sa.String(100), nullable=False),
+        sa.Column("email", sa.String(45), nullable=False),
+        sa.Column("profile_picture_url", sa.String(150), nullable=True),
+        sa.Column("change_pass", sa.Boolean(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_date", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("updated_date", sa.DateTime(), nullable=True, server_default=sa.func.now()),
+    )
+    op.create_index("ix_users_user_id", "users", ["user_id"])
+
+    op.create_table(
+        "vehicle_appraisal",
+        sa.Column("vehicle_appraisal_id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("appraisal_date", sa.Date()),
+        sa.Column("vehicle_description", sa.String(100)),
+        sa.Column("brand", sa.String(50)),
+        sa.Column("model_year", sa.Integer()),
+        sa.Column("color", sa.String(20)),
+        sa.Column("mileage", sa.Integer()),
+        sa.Column("fuel_type", sa.String(20)),
+        sa.Column("engine_size", sa.Numeric(3, 1)),
+        sa.Column("plate_number", sa.String(20)),
+        sa.Column("applicant", sa.String(100)),
+        sa.Column("owner", sa.String(100)),
+        sa.Column("appraisal_value_usd", sa.Numeric(18, 2)),
+        sa.Column("appraisal_value_trochez", sa.Numeric(18, 2)),
+        sa.Column("apprasail_value_lower_cost", sa.Numeric(18, 2)),
+        sa.Column("apprasail_value_bank", sa.Numeric(18, 2)),
+        sa.Column("apprasail_value_lower_bank", sa.Numeric(18, 2)),
+        sa.Column("vin", sa.String(20)),
+        sa.Column("engine_number", sa.String(20)),
+        sa.Column("notes", sa.Text()),
+        sa.Column("validity_days", sa.Integer()),
+        sa.Column("validity_kms", sa.Integer()),
+        sa.Column("extras", sa.Text(), nullable=True),
+        sa.Column("vin_card", sa.String(20), nullable=True),
+        sa.Column("engine_number_card", sa.String(20), nullable=True),
+        sa.Column("total_deductions", sa.Numeric(18, 2), nullable=True),
+        sa.Column("modified_km", sa.Numeric(18, 2), nullable=True),
+        sa.Column("extra_value", sa.Numeric(18, 2), nullable=True),
+        sa.Column("discounts", sa.Numeric(18, 2), nullable=True),
+        sa.Column("bank_value_in_dollars", sa.Numeric(18, 2), nullable=True),
+        sa.Column("referencia_original", sa.Numeric(), nullable=True),
+        sa.Column("cert", sa.Integer(), nullable=True),
+        sa.Column("is_deleted", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    op.create_index("ix_vehicle_appraisal_vehicle_appraisal_id", "vehicle_appraisal", ["vehicle_appraisal_id"])
+
+    op.create_table(
+        "appraisal_deductions",
+        sa.Column("appraisal_deductions_id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "vehicle_appraisal_id",
+            sa.Integer(),
+            sa.ForeignKey("vehicle_appraisal.vehicle_appraisal_id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("description", sa.Text()),
+        sa.Column("amount", sa.Numeric(10, 2)),
+    )
+    op.create_index("ix_appraisal_deductions_appraisal_deductions_id", "appraisal_deductions", ["appraisal_deductions_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("appraisal_deductions")
+    op.drop_table("vehicle_appraisal")
+    op.drop_table("users")
+    op.drop_table("user_types")
@@ -0,0 +1,55 @@
+"""Trigram search document for vehicle appraisals
+
+Revision ID: 0002_appraisal_search
+Revises: 0001_baseline
+Create Date: 2026-10-18
+
+Adds ``vehicle_appraisal.search_document``, a stored generated column holding the
+lower-cased text of every searchable field, and a partial GIN trigram index on
+it for live (not deleted) rows. PostgreSQL only: on other databases the search
+keeps using ILIKE over the individual columns.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0002_appraisal_search"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+# Must cover the same columns as ilike_search_filter in app/appraisals/services/search.py
+SEARCH_DOCUMENT_SQL = """
+lower(
+    coalesce(plate_number, '') || ' ' ||
+    coalesce(vin, '') || ' ' ||
+    coalesce(applicant, '') || ' ' ||
+    coalesce(owner, '') || ' ' ||
+    coalesce(color, '') || ' ' ||
+    coalesce(cert::text, '') || ' ' ||
+    coalesce(engine_number, '') || ' ' ||
+    coalesce(vehicle_description, '') || ' ' ||
+    coalesce(model_year::text, '')
+)
+"""
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "ALTER TABLE vehicle_appraisal ADD COLUMN search_document text "
+        f"GENERATED ALWAYS AS ({SEARCH_DOCUMENT_SQL}) STORED"
+    )
+    op.execute(
+        "CREATE INDEX ix_vehicle_appraisal_search_trgm ON vehicle_appraisal "
+        "USING gin (search_document gin_trgm_ops) WHERE is_deleted = false"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP INDEX IF EXISTS ix_vehicle_appraisal_search_trgm")
+    op.execute("ALTER TABLE vehicle_appraisal DROP COLUMN IF EXISTS search_document")
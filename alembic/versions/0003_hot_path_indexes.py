@@ -0,0 +1,77 @@
+"""Indexes for the appraisal listing, deduction and login queries
+
+Revision ID: 0003_hot_path_indexes
+Revises: 0002_appraisal_search
+Create Date: 2026-10-18
+
+- ix_vehicle_appraisal_live_date_id: partial index over live rows in the
+  listing order (appraisal_date DESC NULLS LAST, id DESC); serves page and
+  cursor pagination without a sort.
+- ix_appraisal_deductions_vehicle_appraisal_id: deduction lookups, the
+  selectinload batch and the ON DELETE CASCADE.
+- ix_users_email: user lookup done by every authenticated request.
+
+On PostgreSQL the indexes are built CONCURRENTLY so the tables stay writable.
+Run scripts/explain_queries.py afterwards to check the plans.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003_hot_path_indexes"
+down_revision = "0002_appraisal_search"
+branch_labels = None
+depends_on = None
+
+# Keep in sync with __table_args__ in app/appraisals/models/appraisals.py
+# and app/security/models/users.py
+INDEXES = [
+    dict(
+        index_name="ix_vehicle_appraisal_live_date_id",
+        table_name="vehicle_appraisal",
+        # NULLS LAST is added on PostgreSQL only (see _postgresql_index); SQLite rejects
+        # it in CREATE INDEX and already sorts NULLs last for DESC
+        columns=[sa.text("appraisal_date DESC"), sa.text("vehicle_appraisal_id DESC")],
+        postgresql_where=sa.text("is_deleted = false"),
+        sqlite_where=sa.text("is_deleted = 0"),
+    ),
+    dict(
+        index_name="ix_appraisal_deductions_vehicle_appraisal_id",
+        table_name="appraisal_deductions",
+        columns=["vehicle_appraisal_id"],
+    ),
+    dict(
+        index_name="ix_users_email",
+        table_name="users",
+        columns=["email"],
+    ),
+]
+
+
+def _postgresql_index(index: dict) -> dict:
+    if index["index_name"] != "ix_vehicle_appraisal_live_date_id":
+        return index
+    return dict(index, columns=[sa.text("appraisal_date DESC NULLS LAST"), sa.text("vehicle_appraisal_id DESC")])
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            for index in INDEXES:
+                op.create_index(**_postgresql_index(index), postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for index in INDEXES:
+            op.create_index(**index)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for index in reversed(INDEXES):
+                op.drop_index(index["index_name"], table_name=index["table_name"],
+                              postgresql_concurrently=True, if_exists=True)
+    else:
+        for index in reversed(INDEXES):
+            op.drop_index(index["index_name"], table_name=index["table_name"])
@@ -0,0 +1,68 @@
+"""Daily rollups of live appraisals for the dashboard
+
+Revision ID: 0004_dashboard_rollups
+Revises: 0003_hot_path_indexes
+Create Date: 2026-10-18
+
+Creates appraisal_daily_stats (count and value sums per day),
+appraisal_daily_brand_stats (count per day and brand) and
+appraisal_daily_applicants (distinct applicants per day), and backfills them
+from vehicle_appraisal. Soft-deleted appraisals are excluded. The write
+endpoints keep them up to date; ``python -m app.dashboard.services.rollups
+check`` compares them with the base table.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004_dashboard_rollups"
+down_revision = "0003_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "appraisal_daily_stats",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("appraisals_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("value_usd_sum", sa.Numeric(18, 2), nullable=False, server_default="0"),
+        sa.Column("value_trochez_sum", sa.Numeric(18, 2), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_table(
+        "appraisal_daily_brand_stats",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("brand", sa.String(50), primary_key=True),
+        sa.Column("appraisals_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_table(
+        "appraisal_daily_applicants",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("applicant", sa.String(100), primary_key=True),
+        sa.Column("appraisals_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    live = "FROM vehicle_appraisal WHERE is_deleted = false AND appraisal_date IS NOT NULL"
+    op.execute(
+        "INSERT INTO appraisal_daily_stats (day, appraisals_count, value_usd_sum, value_trochez_sum) "
+        "SELECT appraisal_date, count(*), coalesce(sum(appraisal_value_usd), 0), "
+        f"coalesce(sum(appraisal_value_trochez), 0) {live} GROUP BY appraisal_date"
+    )
+    op.execute(
+        "INSERT INTO appraisal_daily_brand_stats (day, brand, appraisals_count) "
+        f"SELECT appraisal_date, coalesce(brand, ''), count(*) {live} "
+        "GROUP BY appraisal_date, coalesce(brand, '')"
+    )
+    op.execute(
+        "INSERT INTO appraisal_daily_applicants (day, applicant, appraisals_count) "
+        f"SELECT appraisal_date, applicant, count(*) {live} AND applicant IS NOT NULL "
+        "GROUP BY appraisal_date, applicant"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("appraisal_daily_applicants")
+    op.drop_table("appraisal_daily_brand_stats")
+    op.drop_table("appraisal_daily_stats")
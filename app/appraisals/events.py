@@ -0,0 +1,25 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Callables invoked as listener(action, vehicle_appraisal_id) after a write is committed
+_listeners = []
+
+
+def on_appraisal_changed(listener):
+    """
+    Register a listener for committed appraisal writes.
+    Action is one of "created", "updated", "deleted" or "duplicated".
+    Can be used as a decorator.
+    """
+    _listeners.append(listener)
+    return listener
+
+
+def appraisal_changed(action: str, vehicle_appraisal_id: int) -> None:
+    """Notify every listener that an appraisal was written. Listener errors are logged, not raised."""
+    for listener in list(_listeners):
+        try:
+            listener(action, vehicle_appraisal_id)
+        except Exception as e:
+            logger.error(f"Error in appraisal '{action}' listener {listener.__name__}: {e}")
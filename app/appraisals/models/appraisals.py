@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Text, Numeric, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Date, Text, Numeric, ForeignKey, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 from typing import ClassVar, Dict, Any
@@ -47,11 +47,30 @@ class VehicleAppraisal(Base):
     # Relación con AppraisalDeductions
     deductions = relationship("AppraisalDeductions", back_populates="vehicle_appraisal", cascade="all, delete-orphan")
 
+    # Managed by alembic revision 0003_hot_path_indexes
+    __table_args__ = (
+        # Listing order over live rows (page and cursor pagination). SQLite
+        # rejects NULLS LAST in CREATE INDEX but already sorts NULLs last for
+        # DESC, so each dialect gets its own definition
+        Index(
+            "ix_vehicle_appraisal_live_date_id",
+            appraisal_date.desc().nulls_last(),
+            vehicle_appraisal_id.desc(),
+            postgresql_where=text("is_deleted = false"),
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_vehicle_appraisal_live_date_id",
+            appraisal_date.desc(),
+            vehicle_appraisal_id.desc(),
+            sqlite_where=text("is_deleted = 0"),
+        ).ddl_if(dialect="sqlite"),
+    )
+
 class AppraisalDeductions(Base):
     __tablename__ = "appraisal_deductions"
 
     appraisal_deductions_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    vehicle_appraisal_id = Column(Integer, ForeignKey("vehicle_appraisal.vehicle_appraisal_id", ondelete="CASCADE"), nullable=False)
+    vehicle_appraisal_id = Column(Integer, ForeignKey("vehicle_appraisal.vehicle_appraisal_id", ondelete="CASCADE"), nullable=False, index=True)
     description = Column(Text)
     amount = Column(Numeric(10, 2))
 
@@ -1,18 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_db, get_async_read_db
 from app.security.utils import get_current_user
 from app.security.models.users import User
 from app.appraisals.models.appraisals import VehicleAppraisal, AppraisalDeductions
 # Import the new update schema
 from app.appraisals.schemas.appraisals import VehicleAppraisalCreate, VehicleAppraisalUpdate, VehicleAppraisal as VehicleAppraisalSchema
+from app.appraisals.services.search import search_filter, search_ordering
+from app.appraisals.services.pagination import paginate
+from app.appraisals.services.listing import VIEW_LIST, listing_options, list_items
+from app.appraisals.events import appraisal_changed
+from app.dashboard.services.rollups import refresh_days
 
 router = APIRouter()
 
 # --- CREATE Endpoint ---
 @router.post("/", response_model=VehicleAppraisalSchema)
-async def create_vehicle_appraisal(
+def create_vehicle_appraisal(
     appraisal: VehicleAppraisalCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -95,26 +102,70 @@ async def create_vehicle_appraisal(
         )
         db.add(deduction)
 
+    # Actualizar los acumulados diarios del dashboard en la misma transacción
+    refresh_days(db, [db_appraisal.appraisal_date])
     db.commit()
     db.refresh(db_appraisal)
+    appraisal_changed("created", db_appraisal.vehicle_appraisal_id)
     return db_appraisal
 
+# --- Read helpers ---
+# Sync query code shared with scripts; the async endpoints run them on their
+# AsyncSession connection with run_sync
+
+def _search_page(db: Session, query: str, page: int, limit: int, cursor, count, view: str):
+    # Construir la consulta base con filtro de is_deleted=False y los filtros de búsqueda
+    search_query = db.query(VehicleAppraisal).filter(
+        VehicleAppraisal.is_deleted == False
+    ).filter(search_filter(db, query))
+    
+    # Obtener los resultados paginados ordenados por relevancia (si hay índice de búsqueda)
+    # y por fecha (más recientes primero, sin fecha al final)
+    results, pagination = paginate(
+        db, search_query, page, limit,
+        cursor=cursor,
+        count_mode=count,
+        ordering=search_ordering(db, query),
+        options=listing_options(view),
+        scope=" para la búsqueda"
+    )
+    if view == VIEW_LIST:
+        results = list_items(db, results)
+    return results, pagination
+
+def _list_page(db: Session, page: int, limit: int, cursor, count, view: str):
+    appraisals, pagination = paginate(
+        db,
+        db.query(VehicleAppraisal).filter(VehicleAppraisal.is_deleted == False),
+        page, limit,
+        cursor=cursor,
+        count_mode=count,
+        options=listing_options(view)
+    )
+    if view == VIEW_LIST:
+        appraisals = list_items(db, appraisals)
+    return appraisals, pagination
+
 # --- SEARCH Endpoint ---
 @router.get("/search")
 async def search_vehicle_appraisals(
     query: str = Query("", description="Término de búsqueda"),
     page: int = Query(1, ge=1, description="Número de página"),
     limit: int = Query(10, ge=1, le=100, description="Elementos por página"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (vacío para la primera); reemplaza a page"),
+    count: Optional[str] = Query(None, pattern="^(exact|estimated|cached|none)$", description="Cálculo del total: exact, estimated, cached o none"),
+    view: str = Query("full", pattern="^(full|list)$", description="full: avalúo completo con deducciones; list: columnas del listado con conteo y suma de deducciones"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Buscar avalúos por múltiples criterios.
     Busca en: placa, VIN, cliente, propietario, color, certificado, motor, modelo, año.
+    En PostgreSQL usa el índice trigram de search_document y ordena por relevancia.
+    Con cursor, los resultados se recorren por fecha (más recientes primero).
+    Con view=list devuelve solo las columnas del listado.
     Requiere autenticación JWT.
     """
-    from sqlalchemy import or_, cast, String, text, desc, nulls_last
-    
     # Si no hay término de búsqueda, devolver todos los registros
     if not query or query.strip() == "":
         return {
@@ -131,85 +182,30 @@ async def search_vehicle_appraisals(
             "search_query": ""
         }
     
-    # Construir la consulta base con filtro de is_deleted=False
-    base_query = db.query(VehicleAppraisal).filter(
-        VehicleAppraisal.is_deleted == False
-    ).options(
-        joinedload(VehicleAppraisal.deductions)
-    )
-    
-    # Aplicar filtros de búsqueda con conversiones seguras
-    search_query = base_query.filter(
-        or_(
-            VehicleAppraisal.plate_number.ilike(f"%{query}%"),
-            VehicleAppraisal.vin.ilike(f"%{query}%"),
-            VehicleAppraisal.applicant.ilike(f"%{query}%"),
-            VehicleAppraisal.owner.ilike(f"%{query}%"),
-            VehicleAppraisal.color.ilike(f"%{query}%"),
-            # Convertir cert a string de forma segura
-            cast(VehicleAppraisal.cert, String).ilike(f"%{query}%"),
-            VehicleAppraisal.engine_number.ilike(f"%{query}%"),
-            VehicleAppraisal.vehicle_description.ilike(f"%{query}%"),
-            # Convertir model_year a string de forma segura
-            cast(VehicleAppraisal.model_year, String).ilike(f"%{query}%")
-        )
-    )
-    
-    # Obtener el total de registros que coinciden con la búsqueda
-    total_count = search_query.count()
+    # Consulta, conteo y página se ejecutan sobre la conexión asíncrona
+    results, pagination = await db.run_sync(_search_page, query, page, limit, cursor, count, view)
     
     # Si no hay resultados, devolver respuesta vacía
-    if total_count == 0:
+    if not results:
         return {
             "data": [],
-            "pagination": {
-                "page": page,
-                "limit": limit,
-                "total_count": 0,
-                "total_pages": 0,
-                "has_next": False,
-                "has_prev": False
-            },
+            "pagination": pagination,
             "message": f"No se encontraron avalúos para: '{query}'"
         }
     
-    # Calcular paginación
-    total_pages = (total_count + limit - 1) // limit
-    offset = (page - 1) * limit
-    
-    # Validar si la página solicitada existe
-    if page > total_pages:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Página {page} no existe. Solo hay {total_pages} páginas disponibles para la búsqueda."
-        )
-    
-    # Obtener los resultados paginados ordenados por fecha (más recientes primero, sin fecha al final)
-    results = search_query.order_by(
-        nulls_last(desc(VehicleAppraisal.appraisal_date))
-    ).offset(offset).limit(limit).all()
-    
     # Determinar mensaje según el estado
-    has_next = page < total_pages
-    has_prev = page > 1
-    
-    if page == total_pages:
+    if not pagination["has_next"]:
         message = f"Última página de resultados para: '{query}'"
-    elif page == 1:
+    elif cursor is None and page == 1 or cursor == "":
         message = f"Primera página de resultados para: '{query}'"
+    elif pagination["total_pages"] and cursor is None:
+        message = f"Página {page} de {pagination['total_pages']} para: '{query}'"
     else:
-        message = f"Página {page} de {total_pages} para: '{query}'"
+        message = f"Más resultados para: '{query}'"
     
     return {
         "data": results,
-        "pagination": {
-            "page": page,
-            "limit": limit,
-            "total_count": total_count,
-            "total_pages": total_pages,
-            "has_next": has_next,
-            "has_prev": has_prev
-        },
+        "pagination": pagination,
         "message": message,
         "search_query": query
     }
@@ -219,78 +215,43 @@ async def search_vehicle_appraisals(
 async def read_vehicle_appraisals(
     page: int = Query(1, ge=1, description="Número de página"),
     limit: int = Query(10, ge=1, le=100, description="Elementos por página"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (vacío para la primera); reemplaza a page"),
+    count: Optional[str] = Query(None, pattern="^(exact|estimated|cached|none)$", description="Cálculo del total: exact, estimated, cached o none"),
+    view: str = Query("full", pattern="^(full|list)$", description="full: avalúo completo con deducciones; list: columnas del listado con conteo y suma de deducciones"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Obtener todos los avalúos de vehículos con paginación.
+    Admite paginación por página (page/limit) o por cursor (cursor/limit).
+    Con view=list devuelve solo las columnas del listado; el detalle completo
+    está en GET /appraisals/{id}.
     Requiere autenticación JWT.
     """
-    from sqlalchemy import desc, nulls_last
-    
-    # Get total count with is_deleted=False filter
-    total_count = db.query(VehicleAppraisal).filter(
-        VehicleAppraisal.is_deleted == False
-    ).count()
+    # Get paginated results with is_deleted=False filter and ordered by date
+    appraisals, pagination = await db.run_sync(_list_page, page, limit, cursor, count, view)
     
     # If no data exists, return empty response
-    if total_count == 0:
+    if not appraisals:
         return {
             "data": [],
-            "pagination": {
-                "page": page,
-                "limit": limit,
-                "total_count": 0,
-                "total_pages": 0,
-                "has_next": False,
-                "has_prev": False
-            },
+            "pagination": pagination,
             "message": "No hay avalúos registrados en el sistema."
         }
     
-    # Calculate pagination
-    total_pages = (total_count + limit - 1) // limit
-    
-    # Validate if requested page exists
-    if page > total_pages:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Página {page} no existe. Solo hay {total_pages} páginas disponibles."
-        )
-    
-    # Calculate offset based on page
-    offset = (page - 1) * limit
-    
-    # Get paginated results with is_deleted=False filter and ordered by date
-    appraisals = db.query(VehicleAppraisal).filter(
-        VehicleAppraisal.is_deleted == False
-    ).options(
-        joinedload(VehicleAppraisal.deductions)
-    ).order_by(
-        nulls_last(desc(VehicleAppraisal.appraisal_date))
-    ).offset(offset).limit(limit).all()
-    
     # Determine message based on state
-    has_next = page < total_pages
-    has_prev = page > 1
-    
-    if page == total_pages:
+    if not pagination["has_next"]:
         message = "Última página de avalúos"
-    elif page == 1:
+    elif cursor is None and page == 1 or cursor == "":
         message = "Primera página de avalúos"
+    elif pagination["total_pages"] and cursor is None:
+        message = f"Página {page} de {pagination['total_pages']}"
     else:
-        message = f"Página {page} de {total_pages}"
+        message = "Más avalúos"
     
     return {
         "data": appraisals,
-        "pagination": {
-            "page": page,
-            "limit": limit,
-            "total_count": total_count,
-            "total_pages": total_pages,
-            "has_next": has_next,
-            "has_prev": has_prev
-        },
+        "pagination": pagination,
         "message": message
     }
 
@@ -298,19 +259,22 @@ async def read_vehicle_appraisals(
 @router.get("/{vehicle_appraisal_id}", response_model=VehicleAppraisalSchema)
 async def read_vehicle_appraisal(
     vehicle_appraisal_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Obtener un avalúo de vehículo específico por ID.
     Requiere autenticación JWT.
     """
-    appraisal = db.query(VehicleAppraisal).filter(
-        VehicleAppraisal.vehicle_appraisal_id == vehicle_appraisal_id,
-        VehicleAppraisal.is_deleted == False
-    ).options(
-        joinedload(VehicleAppraisal.deductions)
-    ).first()
+    result = await db.execute(
+        select(VehicleAppraisal).where(
+            VehicleAppraisal.vehicle_appraisal_id == vehicle_appraisal_id,
+            VehicleAppraisal.is_deleted == False
+        ).options(
+            selectinload(VehicleAppraisal.deductions)
+        )
+    )
+    appraisal = result.scalars().first()
     
     if appraisal is None:
         raise HTTPException(
@@ -322,7 +286,7 @@ async def read_vehicle_appraisal(
 
 # --- UPDATE Endpoint ---
 @router.put("/{vehicle_appraisal_id}", response_model=VehicleAppraisalSchema)
-async def update_vehicle_appraisal(
+def update_vehicle_appraisal(
     vehicle_appraisal_id: int,
     appraisal_update: VehicleAppraisalUpdate,
     db: Session = Depends(get_db),
@@ -346,6 +310,7 @@ async def update_vehicle_appraisal(
     # This part implicitly handles the renamed and new fields
     # as long as VehicleAppraisalUpdate schema is correct.
     update_data = appraisal_update.model_dump(exclude_unset=True, exclude={'deductions'})
+    previous_date = db_appraisal.appraisal_date
     for key, value in update_data.items():
         setattr(db_appraisal, key, value)
 
@@ -365,13 +330,16 @@ async def update_vehicle_appraisal(
         # Associate with the parent appraisal (SQLAlchemy handles the relationship)
         # db_appraisal.deductions.append(new_deduction) # Not strictly necessary if cascade is set up
 
+    # Refresh the dashboard rollups of the old and new appraisal date
+    refresh_days(db, [previous_date, db_appraisal.appraisal_date])
     db.commit()
     db.refresh(db_appraisal) # Refresh to get updated state including new deductions
+    appraisal_changed("updated", vehicle_appraisal_id)
     return db_appraisal
 
 # --- DELETE Endpoint (Soft Delete) ---
 @router.delete("/{vehicle_appraisal_id}", status_code=status.HTTP_200_OK)
-async def delete_vehicle_appraisal(
+def delete_vehicle_appraisal(
     vehicle_appraisal_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -394,8 +362,10 @@ async def delete_vehicle_appraisal(
     
     # Soft delete: marcar como eliminado
     db_appraisal.is_deleted = True
+    refresh_days(db, [db_appraisal.appraisal_date])
     
     db.commit()
+    appraisal_changed("deleted", vehicle_appraisal_id)
     
     return {
         "message": "Avalúo eliminado exitosamente",
@@ -404,7 +374,7 @@ async def delete_vehicle_appraisal(
 
 # --- DUPLICATE Endpoint ---
 @router.post("/{vehicle_appraisal_id}/duplicate", response_model=VehicleAppraisalSchema)
-async def duplicate_vehicle_appraisal(
+def duplicate_vehicle_appraisal(
     vehicle_appraisal_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -475,8 +445,10 @@ async def duplicate_vehicle_appraisal(
         )
         db.add(duplicated_deduction)
     
+    refresh_days(db, [duplicated_appraisal.appraisal_date])
     db.commit()
     db.refresh(duplicated_appraisal)
+    appraisal_changed("duplicated", duplicated_appraisal.vehicle_appraisal_id)
     
     # Devolver solo el avalúo duplicado para que coincida con el schema
     return duplicated_appraisal
\ No newline at end of file
@@ -192,4 +192,22 @@ class VehicleAppraisal(VehicleAppraisalBase):
     deductions: List[AppraisalDeductions]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class VehicleAppraisalListItem(BaseModel):
+    """Grid row returned by the list and search endpoints with view=list."""
+    vehicle_appraisal_id: int
+    appraisal_date: date | None = None
+    vehicle_description: str | None = None
+    brand: str | None = None
+    model_year: int | None = None
+    color: str | None = None
+    plate_number: str | None = None
+    vin: str | None = None
+    applicant: str | None = None
+    owner: str | None = None
+    appraisal_value_usd: Decimal | None = None
+    appraisal_value_trochez: Decimal | None = None
+    cert: int | None = None
+    deductions_count: int = 0
+    deductions_total: Decimal = Decimal('0')
@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+from app.core.config import settings
+from app.appraisals.events import on_appraisal_changed
+
+COUNT_EXACT = "exact"
+COUNT_ESTIMATED = "estimated"
+COUNT_CACHED = "cached"
+COUNT_NONE = "none"
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATED, COUNT_CACHED, COUNT_NONE)
+
+
+class CountCache:
+    """
+    Memoized row counts keyed by the normalized SQL of the counted query.
+
+    Entries expire after ``ttl_seconds`` and the whole cache is cleared on any
+    appraisal write, so a cached total is at most ``ttl_seconds`` old and never
+    outlives a change made through the API.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(query, dialect) -> str:
+        """Normalized cache key: SQL text without ordering plus its bound parameters."""
+        compiled = query.order_by(None).statement.compile(dialect=dialect)
+        return f"{compiled}|{json.dumps(compiled.params, sort_keys=True, default=str)}"
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: int) -> None:
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Drop the oldest entry; dicts keep insertion order
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic(), value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+appraisal_count_cache = CountCache(settings.APPRAISAL_COUNT_CACHE_TTL_SECONDS)
+
+
+@on_appraisal_changed
+def _invalidate_counts(action: str, vehicle_appraisal_id: int) -> None:
+    # Any write can change a listing or search total
+    appraisal_count_cache.clear()
+
+
+def estimated_count(db, query):
+    """
+    Planner row estimate for ``query`` (PostgreSQL only).
+
+    Returns:
+        The estimate, or None when the database cannot provide one
+    """
+    dialect = db.get_bind().dialect
+    if dialect.name != "postgresql":
+        return None
+    # Literal values keep the statement independent of the driver's paramstyle
+    # (psycopg2 or asyncpg) and give the planner the actual search values
+    compiled = query.order_by(None).statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    plan = db.connection().execution_options(no_parameters=True).exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}"
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_total(db, query, mode: str):
+    """
+    Count the rows matched by ``query`` with the given strategy.
+
+    Args:
+        db: Database session
+        query: Query to count (without eager-loading options)
+        mode: "exact" runs COUNT(*); "estimated" reads the planner statistics
+            (exact where unavailable); "cached" reuses a recent exact count of
+            the same query; "none" skips counting
+
+    Returns:
+        The count, or None for mode "none"
+    """
+    if mode == COUNT_NONE:
+        return None
+    if mode == COUNT_ESTIMATED:
+        estimate = estimated_count(db, query)
+        if estimate is not None:
+            return estimate
+    if mode == COUNT_CACHED:
+        key = CountCache.key_for(query, db.get_bind().dialect)
+        total = appraisal_count_cache.get(key)
+        if total is None:
+            total = query.order_by(None).count()
+            appraisal_count_cache.set(key, total)
+        return total
+    return query.order_by(None).count()
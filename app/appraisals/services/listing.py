@@ -0,0 +1,69 @@
+from sqlalchemy import func
+from sqlalchemy.orm import load_only, selectinload
+from app.appraisals.models.appraisals import VehicleAppraisal, AppraisalDeductions
+from app.appraisals.schemas.appraisals import VehicleAppraisalListItem
+
+VIEW_FULL = "full"
+VIEW_LIST = "list"
+
+# Columns shown by the appraisal grid; notes, extras and the card/bank fields
+# are only returned by GET /appraisals/{id}
+LIST_COLUMNS = [
+    VehicleAppraisal.vehicle_appraisal_id,
+    VehicleAppraisal.appraisal_date,
+    VehicleAppraisal.vehicle_description,
+    VehicleAppraisal.brand,
+    VehicleAppraisal.model_year,
+    VehicleAppraisal.color,
+    VehicleAppraisal.plate_number,
+    VehicleAppraisal.vin,
+    VehicleAppraisal.applicant,
+    VehicleAppraisal.owner,
+    VehicleAppraisal.appraisal_value_usd,
+    VehicleAppraisal.appraisal_value_trochez,
+    VehicleAppraisal.cert,
+]
+
+
+def listing_options(view: str):
+    """
+    Loader options for a page of appraisals.
+
+    The full view loads deductions with one batched ``IN`` query per page
+    (selectinload) instead of joining them into the paginated query, which
+    repeated every wide appraisal row once per deduction. The list view loads
+    only LIST_COLUMNS and no deductions.
+    """
+    if view == VIEW_LIST:
+        return [load_only(*LIST_COLUMNS, raiseload=True)]
+    return [selectinload(VehicleAppraisal.deductions)]
+
+
+def deduction_summaries(db, vehicle_appraisal_ids):
+    """
+    Count and sum of deductions per appraisal, in one grouped query.
+
+    Returns:
+        Dict {vehicle_appraisal_id: (count, total)}
+    """
+    if not vehicle_appraisal_ids:
+        return {}
+    rows = db.query(
+        AppraisalDeductions.vehicle_appraisal_id,
+        func.count(AppraisalDeductions.appraisal_deductions_id),
+        func.coalesce(func.sum(AppraisalDeductions.amount), 0)
+    ).filter(
+        AppraisalDeductions.vehicle_appraisal_id.in_(vehicle_appraisal_ids)
+    ).group_by(AppraisalDeductions.vehicle_appraisal_id).all()
+    return {vehicle_appraisal_id: (count, total) for vehicle_appraisal_id, count, total in rows}
+
+
+def list_items(db, appraisals):
+    """Build the slim list representation for a page loaded with the list view options."""
+    summaries = deduction_summaries(db, [appraisal.vehicle_appraisal_id for appraisal in appraisals])
+    items = []
+    for appraisal in appraisals:
+        count, total = summaries.get(appraisal.vehicle_appraisal_id, (0, 0))
+        item = {column.key: getattr(appraisal, column.key) for column in LIST_COLUMNS}
+        items.append(VehicleAppraisalListItem(**item, deductions_count=count, deductions_total=total))
+    return items
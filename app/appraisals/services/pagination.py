@@ -0,0 +1,145 @@
+import base64
+import json
+from datetime import date
+from fastapi import HTTPException, status
+from sqlalchemy import and_, desc, nulls_last, or_
+from app.appraisals.models.appraisals import VehicleAppraisal
+from app.appraisals.services.counting import COUNT_CACHED, COUNT_EXACT, COUNT_NONE, count_total
+
+# Stable listing order: most recent first, appraisals without date last, id as tiebreak
+KEYSET_ORDERING = [
+    nulls_last(desc(VehicleAppraisal.appraisal_date)),
+    desc(VehicleAppraisal.vehicle_appraisal_id),
+]
+
+
+def encode_cursor(appraisal) -> str:
+    """Opaque cursor pointing just after ``appraisal`` in KEYSET_ORDERING."""
+    appraisal_date = appraisal.appraisal_date.isoformat() if appraisal.appraisal_date else None
+    payload = json.dumps([appraisal_date, appraisal.vehicle_appraisal_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        Tuple (appraisal_date or None, vehicle_appraisal_id)
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        appraisal_date, vehicle_appraisal_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (date.fromisoformat(appraisal_date) if appraisal_date else None), int(vehicle_appraisal_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        )
+
+
+def keyset_filter(cursor: str):
+    """Filter selecting the rows that come after ``cursor`` in KEYSET_ORDERING."""
+    appraisal_date, vehicle_appraisal_id = decode_cursor(cursor)
+    if appraisal_date is None:
+        # Already in the trailing block of appraisals without date
+        return and_(
+            VehicleAppraisal.appraisal_date.is_(None),
+            VehicleAppraisal.vehicle_appraisal_id < vehicle_appraisal_id
+        )
+    return or_(
+        VehicleAppraisal.appraisal_date < appraisal_date,
+        and_(
+            VehicleAppraisal.appraisal_date == appraisal_date,
+            VehicleAppraisal.vehicle_appraisal_id < vehicle_appraisal_id
+        ),
+        VehicleAppraisal.appraisal_date.is_(None)
+    )
+
+
+def fetch_window(query, limit: int, offset: int = 0):
+    """
+    Fetch up to ``limit`` rows of an ordered query, plus one extra row to know
+    whether another page follows.
+
+    Returns:
+        Tuple (rows, has_next)
+    """
+    rows = query.offset(offset).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+
+def paginate(db, query, page: int, limit: int, cursor=None, count_mode=None, ordering=None, options=(), scope=""):
+    """
+    Paginate an appraisal query by page number or by cursor.
+
+    With ``cursor`` set (an empty string starts at the first row) rows after the
+    cursor are returned in KEYSET_ORDERING, which is cheap at any depth and stable
+    when appraisals are inserted between requests. Otherwise the classic
+    page/limit contract applies, and every response carries a ``next_cursor``
+    callers can switch to when the listing uses KEYSET_ORDERING.
+
+    Args:
+        db: Database session
+        query: Filtered query, without ordering nor eager-loading options
+        page: Page number (page mode)
+        limit: Rows per page
+        cursor: Cursor from a previous response, or None for page mode
+        count_mode: One of COUNT_MODES; defaults to "exact" in page mode and
+            "none" in cursor mode
+        ordering: ORDER BY clauses for page mode (KEYSET_ORDERING when None)
+        options: Loader options applied to the fetched rows
+        scope: Suffix for the "page does not exist" error message
+
+    Returns:
+        Tuple (rows, pagination dict)
+
+    Raises:
+        HTTPException: 404 when the requested page does not exist
+    """
+    if count_mode is None:
+        count_mode = COUNT_NONE if cursor is not None else COUNT_EXACT
+    total_count = count_total(db, query, count_mode)
+    total_pages = (total_count + limit - 1) // limit if total_count is not None else None
+    rows_query = query.options(*options)
+
+    if cursor is not None:
+        if cursor:
+            rows_query = rows_query.filter(keyset_filter(cursor))
+        rows, has_next = fetch_window(rows_query.order_by(*KEYSET_ORDERING), limit)
+        return rows, {
+            "limit": limit,
+            "cursor": cursor or None,
+            "next_cursor": encode_cursor(rows[-1]) if has_next else None,
+            "has_next": has_next,
+            "total_count": total_count,
+            "total_pages": total_pages,
+            "count_mode": count_mode
+        }
+
+    # Validar si la página solicitada existe
+    if count_mode in (COUNT_EXACT, COUNT_CACHED) and total_count and page > total_pages:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Página {page} no existe. Solo hay {total_pages} páginas disponibles{scope}."
+        )
+
+    rows, has_next = fetch_window(rows_query.order_by(*(ordering or KEYSET_ORDERING)), limit, (page - 1) * limit)
+    if not rows and page > 1:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Página {page} no existe{scope}."
+        )
+    return rows, {
+        "page": page,
+        "limit": limit,
+        "total_count": total_count,
+        "total_pages": total_pages,
+        "has_next": has_next,
+        "has_prev": page > 1,
+        "next_cursor": encode_cursor(rows[-1]) if has_next and ordering is None else None,
+        "count_mode": count_mode
+    }
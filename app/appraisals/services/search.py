@@ -0,0 +1,80 @@
+import threading
+from sqlalchemy import or_, cast, String, desc, func, inspect, literal_column, nulls_last
+from app.core.config import settings
+from app.appraisals.models.appraisals import VehicleAppraisal
+
+# Lower-cased concatenation of the searched columns, maintained by PostgreSQL
+# (generated column added in alembic revision 0002_appraisal_search)
+SEARCH_DOCUMENT = literal_column("vehicle_appraisal.search_document")
+
+_trigram_support = {}
+_trigram_support_lock = threading.Lock()
+
+
+def trigram_search_enabled(bind) -> bool:
+    """
+    Whether the trigram search document can be used on this connection.
+
+    APPRAISAL_SEARCH_BACKEND selects the backend: "ilike" always uses the
+    per-column ILIKE filter, "trigram" always uses the search document, and
+    "auto" uses it on PostgreSQL once the migration has added the column
+    (checked once per database).
+    """
+    backend = settings.APPRAISAL_SEARCH_BACKEND
+    if backend == "ilike" or bind.dialect.name != "postgresql":
+        return False
+    if backend == "trigram":
+        return True
+
+    engine = getattr(bind, "engine", bind)
+    key = str(engine.url)
+    if key not in _trigram_support:
+        with _trigram_support_lock:
+            if key not in _trigram_support:
+                columns = inspect(bind).get_columns(VehicleAppraisal.__tablename__)
+                _trigram_support[key] = any(column["name"] == "search_document" for column in columns)
+    return _trigram_support[key]
+
+
+def ilike_search_filter(query: str):
+    """
+    Per-column ILIKE filter, used when the search document is not available (e.g. SQLite).
+    Busca en: placa, VIN, cliente, propietario, color, certificado, motor, modelo, año.
+    """
+    pattern = f"%{query}%"
+    return or_(
+        VehicleAppraisal.plate_number.ilike(pattern),
+        VehicleAppraisal.vin.ilike(pattern),
+        VehicleAppraisal.applicant.ilike(pattern),
+        VehicleAppraisal.owner.ilike(pattern),
+        VehicleAppraisal.color.ilike(pattern),
+        # Convertir cert a string de forma segura
+        cast(VehicleAppraisal.cert, String).ilike(pattern),
+        VehicleAppraisal.engine_number.ilike(pattern),
+        VehicleAppraisal.vehicle_description.ilike(pattern),
+        # Convertir model_year a string de forma segura
+        cast(VehicleAppraisal.model_year, String).ilike(pattern)
+    )
+
+
+def search_filter(db, query: str):
+    """
+    Build the filter used by the appraisal search.
+
+    Uses the trigram-indexed search document when available, otherwise the
+    per-column ILIKE filter.
+    """
+    if trigram_search_enabled(db.get_bind()):
+        return SEARCH_DOCUMENT.like(f"%{query.lower()}%")
+    return ilike_search_filter(query)
+
+
+def search_ordering(db, query: str):
+    """
+    ORDER BY clauses for search results: best match first when ranking by the
+    search document is available, then most recent appraisal.
+    """
+    ordering = [nulls_last(desc(VehicleAppraisal.appraisal_date)), desc(VehicleAppraisal.vehicle_appraisal_id)]
+    if trigram_search_enabled(db.get_bind()):
+        ordering.insert(0, desc(func.word_similarity(query.lower(), SEARCH_DOCUMENT)))
+    return ordering
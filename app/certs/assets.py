@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).parent.parent / "static"
+ASSET_CACHE_DIR = Path(__file__).parent.parent / "temp" / "assets"
+
+# Bump when the variant definitions change so stale derivatives are not reused
+PIPELINE_VERSION = 1
+
+# Derivatives produced for each static asset used by the certificate template.
+# Sizes are twice the CSS box in certificado.html so the logo stays sharp in print.
+ASSET_VARIANTS = {
+    "images/AvaluoTrochez.png": {
+        # .header-logo: max-width 200px, img max-height 180px
+        "header": {"max_size": (400, 360), "colors": 256},
+        # .watermark img: max-width 450px, drawn at 15% opacity
+        "watermark": {"max_size": (900, 900), "colors": 64},
+    },
+}
+
+
+@lru_cache(maxsize=32)
+def _cached_source_digest(path: str, mtime_ns: int, size: int) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def _source_digest(source: Path) -> str:
+    stat = source.stat()
+    return _cached_source_digest(str(source), stat.st_mtime_ns, stat.st_size)
+
+
+def derivative_path(path: str, usage: str, digest: Optional[str] = None) -> Optional[Path]:
+    """
+    Return the on-disk path of the derivative of ``path`` for ``usage``.
+
+    Args:
+        path: Asset path relative to app/static
+        usage: Variant name from ASSET_VARIANTS
+        digest: Source hash, computed from the file when omitted
+
+    Returns:
+        Path of the derivative, or None if the asset has no such variant
+    """
+    if usage not in ASSET_VARIANTS.get(path, {}):
+        return None
+    source = STATIC_DIR / path
+    if not source.exists():
+        return None
+    digest = digest or _source_digest(source)
+    return ASSET_CACHE_DIR / f"{source.stem}-{usage}-v{PIPELINE_VERSION}-{digest}.png"
+
+
+def build_derivative(source: Path, target: Path, max_size, colors: int) -> None:
+    """Resize and palette-compress ``source`` into ``target``."""
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image = image.convert("RGBA")
+        image.thumbnail(max_size, Image.Resampling.LANCZOS)
+        image = image.quantize(colors=colors, method=Image.Quantize.FASTOCTREE)
+        tmp_path = target.with_suffix(".tmp")
+        image.save(tmp_path, format="PNG", optimize=True)
+    os.replace(tmp_path, target)
+
+
+def prepare_certificate_assets() -> dict:
+    """
+    Build the missing derivatives of every certificate asset.
+
+    Derivatives are cached on disk by source hash, so this only does work the
+    first time a machine sees a given logo file.
+
+    Returns:
+        Mapping of ``(path, usage)`` to the derivative path
+    """
+    os.makedirs(ASSET_CACHE_DIR, exist_ok=True)
+    built = {}
+    for path, variants in ASSET_VARIANTS.items():
+        source = STATIC_DIR / path
+        if not source.exists():
+            logger.warning(f"Certificate asset not found: {source}")
+            continue
+        digest = _source_digest(source)
+        for usage, spec in variants.items():
+            target = derivative_path(path, usage, digest)
+            if not target.exists():
+                try:
+                    build_derivative(source, target, spec["max_size"], spec["colors"])
+                    logger.info(
+                        f"Built {usage} derivative of {path}: "
+                        f"{source.stat().st_size} -> {target.stat().st_size} bytes"
+                    )
+                except Exception as e:
+                    logger.error(f"Error building {usage} derivative of {path}: {e}")
+                    continue
+            built[(path, usage)] = target
+    return built
@@ -0,0 +1,127 @@
+import asyncio
+import io
+import json
+import logging
+import zipfile
+from datetime import datetime
+from fastapi import HTTPException
+from app.certs.render_pool import retry_when_busy
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only, unseekable buffer that ZipFile writes into and we drain."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_certificates_zip(certificate_service, vehicle_appraisal_ids, missing_ids, load_appraisal,
+                                  concurrency, retry_after):
+    """
+    Render certificates in parallel and stream them as a ZIP archive.
+
+    Entries are written as soon as each render finishes and streamed out in
+    chunks, so the archive itself is never held in memory. Renders are
+    scheduled in a window of ``2 * concurrency`` appraisals ahead of the
+    writer: a slow client pauses new renders instead of letting finished PDFs
+    pile up. A failed certificate does not abort the batch: every outcome is
+    listed in ``manifest.json``, the last entry of the archive.
+
+    Args:
+        certificate_service: CertificateService used to render each appraisal
+        vehicle_appraisal_ids: IDs of the appraisals to export, in order
+        missing_ids: Requested IDs that do not exist or were deleted
+        load_appraisal: Coroutine function returning the appraisal with its
+            deductions loaded (or None), using its own short-lived session
+        concurrency: Maximum number of renders in flight
+        retry_after: Seconds to wait when the render pool is full
+
+    Yields:
+        Chunks of the ZIP file
+    """
+    concurrency = max(concurrency, 1)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def render(vehicle_appraisal_id):
+        async with semaphore:
+            try:
+                appraisal = await load_appraisal(vehicle_appraisal_id)
+                if appraisal is None:
+                    return vehicle_appraisal_id, None, "Avalúo no encontrado"
+                certificate_pdf = await retry_when_busy(
+                    lambda: certificate_service.render_certificate(appraisal, appraisal.deductions),
+                    retry_after,
+                )
+                return vehicle_appraisal_id, certificate_pdf, None
+            except Exception as e:
+                logger.error(f"Error rendering certificate {vehicle_appraisal_id}: {e}")
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                return vehicle_appraisal_id, None, detail
+
+    manifest = {
+        "generated_at": datetime.now().isoformat(),
+        "succeeded": [],
+        "failed": [
+            {"vehicle_appraisal_id": vehicle_appraisal_id, "error": "Avalúo no encontrado"}
+            for vehicle_appraisal_id in missing_ids
+        ],
+    }
+    stream = _ZipStream()
+    # Rendering or rendered but not yet written; bounds the PDFs held in memory
+    window = 2 * concurrency
+    remaining = iter(vehicle_appraisal_ids)
+    pending = set()
+
+    def top_up():
+        while len(pending) < window:
+            vehicle_appraisal_id = next(remaining, None)
+            if vehicle_appraisal_id is None:
+                return
+            pending.add(asyncio.create_task(render(vehicle_appraisal_id)))
+
+    try:
+        top_up()
+        with zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    vehicle_appraisal_id, certificate_pdf, error = task.result()
+                    if error is not None:
+                        manifest["failed"].append({"vehicle_appraisal_id": vehicle_appraisal_id, "error": error})
+                        top_up()
+                        continue
+
+                    filename = certificate_pdf.filename
+                    content = memoryview(certificate_pdf.content)
+                    with archive.open(filename, mode="w") as entry:
+                        for offset in range(0, len(content), CHUNK_SIZE):
+                            entry.write(content[offset:offset + CHUNK_SIZE])
+                            yield stream.drain()
+                    manifest["succeeded"].append({"vehicle_appraisal_id": vehicle_appraisal_id, "file": filename})
+                    # Written out: its slot goes to the next appraisal
+                    top_up()
+                    yield stream.drain()
+
+            archive.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+        yield stream.drain()
+    finally:
+        # Client went away or the archive failed: stop the remaining renders
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy.orm import selectinload
+from app.core.config import settings
+from app.database import SessionLocal
+from app.appraisals.events import on_appraisal_changed
+from app.appraisals.models.appraisals import VehicleAppraisal
+from app.certs.pdf_cache import certificate_cache
+from app.certs.render_pool import render_pool, retry_when_busy
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RENDERING = "rendering"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class CertificateJob:
+    """State of one background certificate render."""
+
+    def __init__(self, vehicle_appraisal_id: int, prerender: bool = False):
+        self.job_id = uuid.uuid4().hex
+        self.vehicle_appraisal_id = vehicle_appraisal_id
+        self.prerender = prerender
+        self.status = JOB_QUEUED
+        self.progress = 0
+        self.error = None
+        # The PDF itself is in the disk cache under this key
+        self.cache_key = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "vehicle_appraisal_id": self.vehicle_appraisal_id,
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def _load_appraisal(vehicle_appraisal_id: int):
+    """Load an appraisal with its deductions in a dedicated session (runs in a thread)."""
+    db = SessionLocal()
+    try:
+        appraisal = db.query(VehicleAppraisal).filter(
+            VehicleAppraisal.vehicle_appraisal_id == vehicle_appraisal_id,
+            VehicleAppraisal.is_deleted == False
+        ).options(
+            selectinload(VehicleAppraisal.deductions)
+        ).first()
+        if appraisal is not None:
+            db.expunge(appraisal)
+        return appraisal
+    finally:
+        db.close()
+
+
+class CertificateJobQueue:
+    """
+    In-process queue of certificate renders served by ``workers`` asyncio tasks.
+
+    Jobs are kept in memory for ``ttl_seconds`` after they finish so clients
+    can poll their status and download the PDF, which is written to the disk
+    cache; a job only keeps its cache key. At most ``queue_depth`` jobs wait
+    for a worker and at most ``max_jobs`` are tracked (the oldest finished
+    ones are dropped first); beyond that submissions are rejected with HTTP
+    503 and a Retry-After header, like renders when the render pool is full.
+    Renders go through the shared render pool, so jobs never block the event
+    loop.
+    """
+
+    def __init__(self, workers: int, ttl_seconds: int, queue_depth: int, max_jobs: int, retry_after: int):
+        self.workers = workers
+        self.ttl_seconds = ttl_seconds
+        self.queue_depth = queue_depth
+        self.max_jobs = max_jobs
+        self.retry_after = retry_after
+        self._jobs = {}
+        self._jobs_lock = threading.Lock()
+        self._queue = None
+        self._loop = None
+        self._tasks = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        """Start the worker tasks on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=max(self.queue_depth, 1))
+        self._loop = asyncio.get_running_loop()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(max(self.workers, 1))]
+        logger.info(f"Certificate job queue started with {len(self._tasks)} workers")
+
+    async def stop(self):
+        """Cancel the worker tasks; queued jobs are dropped."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def submit(self, vehicle_appraisal_id: int, prerender: bool = False) -> CertificateJob:
+        """
+        Queue a certificate render and return its job.
+
+        A pending job for the same appraisal is reused instead of queueing a
+        second render. Safe to call from worker threads (e.g. sync endpoints
+        notifying appraisal writes).
+
+        Raises:
+            HTTPException: 503 when the queue is not running or is full
+        """
+        if not self.running:
+            raise self._unavailable()
+        self._prune()
+        with self._jobs_lock:
+            queued = 0
+            for job in self._jobs.values():
+                if job.status != JOB_QUEUED:
+                    continue
+                if job.vehicle_appraisal_id == vehicle_appraisal_id:
+                    return job
+                queued += 1
+            # Room in the queue is checked here, under the lock, so the
+            # put_nowait below (possibly scheduled from another thread) fits
+            if queued >= max(self.queue_depth, 1) or not self._make_room():
+                raise self._unavailable()
+            job = CertificateJob(vehicle_appraisal_id, prerender=prerender)
+            self._jobs[job.job_id] = job
+
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._queue.put_nowait(job)
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[CertificateJob]:
+        """Return a job by ID, or None if it does not exist or has expired."""
+        self._prune()
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def _make_room(self) -> bool:
+        """Drop the oldest finished jobs until one more fits under ``max_jobs`` (holding the lock)."""
+        if len(self._jobs) < self.max_jobs:
+            return True
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished_at)
+        for job in finished[:len(self._jobs) - self.max_jobs + 1]:
+            del self._jobs[job.job_id]
+        return len(self._jobs) < self.max_jobs
+
+    def _unavailable(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="La cola de certificados está llena, intente de nuevo",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    def _prune(self):
+        expire_before = time.time() - self.ttl_seconds
+        with self._jobs_lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job.finished and job.finished_at < expire_before]:
+                del self._jobs[job_id]
+
+    async def _worker(self):
+        from app.certs.certificate_service import get_certificate_service
+
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job, get_certificate_service())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Certificate job {job.job_id} failed: {e}")
+                job.status = JOB_FAILED
+                job.error = getattr(e, "detail", None) or str(e)
+                job.finished_at = time.time()
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: CertificateJob, certificate_service):
+        job.status = JOB_RENDERING
+        job.progress = 10
+
+        appraisal = await asyncio.to_thread(_load_appraisal, job.vehicle_appraisal_id)
+        if appraisal is None:
+            job.status = JOB_FAILED
+            job.error = "Vehicle appraisal not found"
+            job.finished_at = time.time()
+            return
+        job.progress = 30
+
+        certificate_pdf = await retry_when_busy(
+            lambda: certificate_service.render_certificate(appraisal, appraisal.deductions),
+            render_pool.retry_after,
+        )
+        if not settings.CERT_DISK_CACHE:
+            # Not stored by the service: keep it on disk rather than in the job
+            await asyncio.to_thread(
+                certificate_cache.store, job.vehicle_appraisal_id, certificate_pdf.etag, certificate_pdf.content
+            )
+        job.cache_key = certificate_pdf.etag
+        job.progress = 100
+        job.status = JOB_DONE
+        job.finished_at = time.time()
+
+
+certificate_jobs = CertificateJobQueue(
+    workers=settings.CERT_JOB_WORKERS,
+    ttl_seconds=settings.CERT_JOB_TTL_SECONDS,
+    queue_depth=settings.CERT_JOB_QUEUE_DEPTH,
+    max_jobs=settings.CERT_JOB_MAX_JOBS,
+    retry_after=settings.CERT_RENDER_RETRY_AFTER,
+)
+
+
+@on_appraisal_changed
+def _refresh_certificates(action: str, vehicle_appraisal_id: int):
+    """
+    Drop stale certificates and pre-render the new version after a save.
+    Pre-rendering only pays off when renders are kept in the disk cache.
+    """
+    if action in ("updated", "deleted"):
+        certificate_cache.invalidate(vehicle_appraisal_id)
+    if (action != "deleted" and settings.CERT_PRERENDER_ON_SAVE and settings.CERT_DISK_CACHE
+            and certificate_jobs.running):
+        try:
+            certificate_jobs.submit(vehicle_appraisal_id, prerender=True)
+        except HTTPException:
+            # Queue full: the certificate is rendered on its first request instead
+            logger.info(f"Certificate job queue full, not pre-rendering appraisal {vehicle_appraisal_id}")
@@ -1,14 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
 from typing import Optional
 
 # Importar la sesión de base de datos
-from app.database import get_db # Changed from SessionLocal to get_db
+from app.database import async_read_session_factory, get_async_db, get_async_read_db
 
 # Corregir las importaciones para usar los modelos correctos
 from app.appraisals.models.appraisals import VehicleAppraisal, AppraisalDeductions
-from app.certs.certificate_service import CertificateService
+from app.certs.certificate_service import CertificatePdf, CertificateService, get_certificate_service
+from app.certs.certificate_batch import stream_certificates_zip
+from app.certs.certificate_schemas import CertificateBatchRequest
+from app.certs.render_pool import render_pool
+from app.certs.certificate_jobs import certificate_jobs, JOB_DONE
+from app.certs.pdf_response import not_modified_response, pdf_response
+from app.certs.pdf_cache import certificate_cache
+from app.appraisals.services.search import search_filter, search_ordering
 
 # --- Add these imports ---
 # Import the JWT dependency function and User model from the security module
@@ -29,8 +40,10 @@ router = APIRouter(
 @router.get("/appraisal/{vehicle_appraisal_id}")
 async def generate_appraisal_certificate(
     vehicle_appraisal_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
     download: Optional[bool] = False,
+    certificate_service: CertificateService = Depends(get_certificate_service),
     # --- Add this dependency ---
     current_user: User = Depends(get_current_user) # Require valid JWT
     # --- End Add ---
@@ -38,8 +51,12 @@ async def generate_appraisal_certificate(
     """
     Generate a PDF certificate for a vehicle appraisal. Requires authentication.
     
+    The PDF is rendered in memory and sent with an ETag; conditional
+    (If-None-Match) and byte range requests are supported.
+    
     Args:
         vehicle_appraisal_id: ID of the vehicle appraisal
+        request: Incoming request (conditional and range headers)
         db: Database session
         download: If True, the PDF will be downloaded, otherwise it will be displayed in the browser
         current_user: The authenticated user object (from JWT token)
@@ -48,30 +65,207 @@ async def generate_appraisal_certificate(
         PDF file response
     """
     # Get the vehicle appraisal data
-    appraisal = db.query(VehicleAppraisal).filter(VehicleAppraisal.vehicle_appraisal_id == vehicle_appraisal_id).first()
+    result = await db.execute(
+        select(VehicleAppraisal).where(VehicleAppraisal.vehicle_appraisal_id == vehicle_appraisal_id)
+    )
+    appraisal = result.scalars().first()
     if not appraisal:
         raise HTTPException(status_code=404, detail="Vehicle appraisal not found")
     
     # Get the deductions for this appraisal
-    deductions = db.query(AppraisalDeductions).filter(
-        AppraisalDeductions.vehicle_appraisal_id == vehicle_appraisal_id
-    ).all()
+    result = await db.execute(
+        select(AppraisalDeductions).where(AppraisalDeductions.vehicle_appraisal_id == vehicle_appraisal_id)
+    )
+    deductions = result.scalars().all()
+    
+    # The ETag is the cache key of the render, known before rendering:
+    # a client revalidating its copy gets a 304 without a WeasyPrint run
+    template_data, key = certificate_service.prepare(appraisal, deductions)
+    # Everything the render needs is loaded: give the connection back to the
+    # pool instead of holding it for the whole render (the dependency is only
+    # torn down after the response)
+    await db.close()
+    not_modified = not_modified_response(request, key)
+    if not_modified is not None:
+        return not_modified
     
     # Generate the PDF
-    certificate_service = CertificateService()
-    pdf_path = certificate_service.generate_certificate_pdf(appraisal, deductions)
+    certificate_pdf = await certificate_service.render_prepared(vehicle_appraisal_id, template_data, key)
+    
+    # Return the PDF, inline or as a download depending on the download parameter
+    return pdf_response(request, certificate_pdf, download=download)
+
+def _select_batch_ids(db: Session, batch: CertificateBatchRequest):
+    """
+    Resolve the appraisals selected by a batch request to their IDs.
+    
+    Returns:
+        Tuple (IDs to export in order, requested IDs that were not found)
+    """
+    ids_query = db.query(VehicleAppraisal.vehicle_appraisal_id).filter(
+        VehicleAppraisal.is_deleted == False
+    )
     
-    # Set the content disposition header based on download parameter
-    headers = {}
-    if download:
-        headers["Content-Disposition"] = f"attachment; filename=certificado_avaluo_{vehicle_appraisal_id}.pdf"
+    missing_ids = []
+    if batch.vehicle_appraisal_ids:
+        requested_ids = list(dict.fromkeys(batch.vehicle_appraisal_ids))
+        found_ids = {
+            vehicle_appraisal_id for (vehicle_appraisal_id,) in ids_query.filter(
+                VehicleAppraisal.vehicle_appraisal_id.in_(requested_ids)
+            )
+        }
+        vehicle_appraisal_ids = [vehicle_appraisal_id for vehicle_appraisal_id in requested_ids if vehicle_appraisal_id in found_ids]
+        missing_ids = [vehicle_appraisal_id for vehicle_appraisal_id in requested_ids if vehicle_appraisal_id not in found_ids]
     else:
-        headers["Content-Disposition"] = f"inline; filename=certificado_avaluo_{vehicle_appraisal_id}.pdf"
-    
-    # Return the PDF file
-    return FileResponse(
-        path=str(pdf_path),
-        media_type="application/pdf",
-        headers=headers,
-        filename=f"certificado_avaluo_{vehicle_appraisal_id}.pdf"
-    )
\ No newline at end of file
+        vehicle_appraisal_ids = [
+            vehicle_appraisal_id for (vehicle_appraisal_id,) in ids_query.filter(
+                search_filter(db, batch.query.strip())
+            ).order_by(
+                *search_ordering(db, batch.query.strip())
+            ).limit(batch.limit)
+        ]
+    return vehicle_appraisal_ids, missing_ids
+
+@router.post("/batch")
+async def generate_certificates_batch(
+    batch: CertificateBatchRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    certificate_service: CertificateService = Depends(get_certificate_service),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Generate the certificates of many appraisals and stream them as a ZIP file.
+    Requires authentication.
+    
+    Appraisals are selected by ID or with the same search term as /appraisals/search.
+    Certificates are rendered in parallel and written to the archive as they finish;
+    failures are reported in manifest.json inside the archive instead of aborting
+    the batch.
+    
+    Args:
+        batch: IDs or search term selecting the appraisals
+        request: Incoming request (read routing of the per-certificate sessions)
+        db: Database session
+        current_user: The authenticated user object (from JWT token)
+
+    Returns:
+        Streamed ZIP file response
+    """
+    vehicle_appraisal_ids, missing_ids = await db.run_sync(_select_batch_ids, batch)
+    
+    if not vehicle_appraisal_ids:
+        raise HTTPException(status_code=404, detail="No se encontraron avalúos para exportar")
+    
+    # The export can take minutes: release the request's connection (the
+    # dependency is only torn down after the response) and load each
+    # appraisal in its own short-lived session instead
+    await db.close()
+    session_factory = async_read_session_factory(request)
+    
+    async def load_appraisal(vehicle_appraisal_id):
+        async with session_factory() as session:
+            result = await session.execute(
+                select(VehicleAppraisal).options(
+                    selectinload(VehicleAppraisal.deductions)
+                ).where(
+                    VehicleAppraisal.vehicle_appraisal_id == vehicle_appraisal_id,
+                    VehicleAppraisal.is_deleted == False
+                )
+            )
+            return result.scalars().first()
+    
+    filename = f"certificados_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        stream_certificates_zip(
+            certificate_service,
+            vehicle_appraisal_ids,
+            missing_ids,
+            load_appraisal,
+            concurrency=render_pool.workers,
+            retry_after=render_pool.retry_after,
+        ),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@router.post("/jobs/appraisal/{vehicle_appraisal_id}", status_code=status.HTTP_202_ACCEPTED)
+async def submit_certificate_job(
+    vehicle_appraisal_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Queue the PDF certificate of a vehicle appraisal for background rendering.
+    Requires authentication.
+    
+    Returns immediately with a job ID; poll /certificates/jobs/{job_id} and
+    download the PDF from /certificates/jobs/{job_id}/pdf when it is done.
+    Returns 503 with Retry-After when the job queue is full.
+    """
+    exists = (await db.execute(
+        select(VehicleAppraisal.vehicle_appraisal_id).where(
+            VehicleAppraisal.vehicle_appraisal_id == vehicle_appraisal_id,
+            VehicleAppraisal.is_deleted == False
+        )
+    )).first()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Vehicle appraisal not found")
+    
+    job = certificate_jobs.submit(vehicle_appraisal_id)
+    return {
+        **job.to_dict(),
+        "status_url": router.url_path_for("get_certificate_job", job_id=job.job_id),
+        "pdf_url": router.url_path_for("download_certificate_job", job_id=job.job_id),
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_certificate_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the status and progress of a certificate job. Requires authentication.
+    """
+    job = certificate_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Certificate job not found or expired")
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}/pdf")
+async def download_certificate_job(
+    job_id: str,
+    request: Request,
+    download: Optional[bool] = False,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Download the PDF produced by a finished certificate job. Requires authentication.
+    
+    Returns 409 while the job is still queued or rendering.
+    """
+    job = certificate_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Certificate job not found or expired")
+    if job.status != JOB_DONE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Certificate job is {job.status}",
+            headers={"Retry-After": "1"},
+        )
+    content = await asyncio.to_thread(certificate_cache.read, job.vehicle_appraisal_id, job.cache_key)
+    if content is None:
+        # Evicted from the disk cache
+        raise HTTPException(status_code=404, detail="Certificate job not found or expired")
+    return pdf_response(request, CertificatePdf(job.vehicle_appraisal_id, job.cache_key, content), download=download)
+
+
+@router.get("/metrics")
+async def certificate_cache_metrics(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Usage and eviction counters of the certificate disk cache. Requires authentication.
+    """
+    return certificate_cache.metrics()
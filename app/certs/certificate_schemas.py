@@ -0,0 +1,15 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+
+
+class CertificateBatchRequest(BaseModel):
+    """IDs or a search term selecting the certificates to export as a ZIP."""
+    vehicle_appraisal_ids: Optional[List[int]] = Field(None, max_length=200)
+    query: Optional[str] = Field(None, description="Término de búsqueda, igual que /appraisals/search")
+    limit: int = Field(50, ge=1, le=200, description="Máximo de certificados cuando se usa query")
+
+    @model_validator(mode="after")
+    def validate_selection(self):
+        if not self.vehicle_appraisal_ids and not (self.query and self.query.strip()):
+            raise ValueError("Debe proporcionar vehicle_appraisal_ids o query")
+        return self
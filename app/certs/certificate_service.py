@@ -1,12 +1,90 @@
+import asyncio
+import logging
 import os
+import hashlib
+import uuid
+import json
+from functools import lru_cache
 from pathlib import Path
-import tempfile
-from datetime import datetime
+from types import SimpleNamespace
+from datetime import date
+import threading
 from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML, CSS
-import locale
+from app.core.config import settings
+from app.certs.pdf_cache import certificate_cache
+from app.certs.render_pool import render_pool
+from app.certs.singleflight import SingleFlight
+from app.certs.number_words import number_to_words
+from app.certs.assets import ASSET_VARIANTS, derivative_path, PIPELINE_VERSION, prepare_certificate_assets
+
+logger = logging.getLogger(__name__)
+
+# Spanish month abbreviations, as printed by strftime("%b") under es_ES
+SPANISH_MONTHS = ['ene', 'feb', 'mar', 'abr', 'may', 'jun', 'jul', 'ago', 'sep', 'oct', 'nov', 'dic']
+
+
+@lru_cache(maxsize=64)
+def _cached_file_digest(path, mtime_ns, size):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _file_digest(path):
+    """Return the sha256 of a file, recomputed only when it changes on disk."""
+    stat = os.stat(path)
+    return _cached_file_digest(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _json_default(value):
+    """Serialize template values (namespaces, dates, decimals) for hashing."""
+    if isinstance(value, SimpleNamespace):
+        return vars(value)
+    return str(value)
+
+# Renders in progress in this process, keyed by appraisal and content hash
+_inflight_renders = SingleFlight()
+
+# WeasyPrint (cairo, pango, fonttools) is imported on the first render, not at
+# module load: with the render pool enabled the API process never needs it.
+PAGE_CSS = '''
+    @page {
+        size: A4;
+        margin: 0;
+    }
+    body {
+        margin: 0;
+        padding: 0;
+    }
+'''
+
+
+@lru_cache(maxsize=1)
+def _page_stylesheet():
+    from weasyprint import CSS
+
+    return CSS(string=PAGE_CSS)
+
+
+class CertificatePdf:
+    """A rendered certificate: PDF content plus the cache key used as its ETag."""
+    
+    def __init__(self, vehicle_appraisal_id, etag, content):
+        self.vehicle_appraisal_id = vehicle_appraisal_id
+        self.etag = etag
+        self.content = content
+    
+    @property
+    def filename(self):
+        return f"certificado_avaluo_{self.vehicle_appraisal_id}.pdf"
 
 class CertificateService:
+    """
+    Builds and renders appraisal certificates.
+    
+    The service holds no per-request state, so a single instance (see
+    get_certificate_service) is shared by every request and thread.
+    """
+    
     def __init__(self):
         # Set up paths
         self.base_dir = Path(__file__).parent
@@ -16,52 +94,88 @@ class CertificateService:
         # Create temp directory if it doesn't exist
         self.temp_dir = self.base_dir.parent / "temp"
         os.makedirs(self.temp_dir, exist_ok=True)
+        self.cache = certificate_cache
+        self.use_asset_derivatives = True
         
         # Set up Jinja2 environment with custom functions
         self.env = Environment(loader=FileSystemLoader(self.template_dir))
         
         # Add a static_url function to the Jinja environment
-        # --- Change this line to use the new absolute URL function ---
         self.env.globals['static_url'] = self.static_url_absolute
-        # --- End Change ---
         self.env.globals['formatted_date'] = self.format_date
         self.env.globals['number_to_words'] = self.number_to_words
         
-        # Set locale for date formatting
-        try:
-            locale.setlocale(locale.LC_TIME, 'es_ES.UTF-8')
-        except:
-            try:
-                locale.setlocale(locale.LC_TIME, 'es_ES')
-            except:
-                pass  # Fall back to default locale if Spanish is not available
+        # Compile the template and resolve asset URLs once for the service lifetime
+        self.template = self.env.get_template("certificado.html")
+        self.refresh_static_urls()
     
     # Optional: Keep the old relative path function if needed elsewhere
     # def static_url(self, path):
     #     """Generate a relative URL for static files"""
     #     return f"../static/{path}"
     
-    # --- Add this function ---
-    def static_url_absolute(self, path):
-        """Generate an absolute file:// URL for static files"""
+    def static_url_absolute(self, path, usage=None):
+        """
+        Generate an absolute file:// URL for static files.
+        
+        When ``usage`` names a variant from app.certs.assets (e.g. "header" or
+        "watermark") and its optimized derivative has been built, the derivative
+        is returned instead of the original file.
+        """
+        url = self.static_urls.get((path, usage if self.use_asset_derivatives else None))
+        if url is not None:
+            return url
+        if usage and self.use_asset_derivatives:
+            derivative = derivative_path(path, usage)
+            if derivative is not None and derivative.exists():
+                return derivative.as_uri()
         absolute_path = self.static_dir / path
         # Ensure the path exists and convert to file URI
         if absolute_path.exists():
              return absolute_path.as_uri()
         else:
              # Handle missing file case - maybe return empty string or log warning
-             print(f"Warning: Static file not found at {absolute_path}")
+             logger.warning(f"Static file not found at {absolute_path}")
              return "" # Or raise an error
-    # --- End Add ---
+
+    def refresh_static_urls(self):
+        """
+        Precompute the file:// URLs of the certificate assets and the version
+        hash of the template and assets used in cache keys.
+        Call again after the asset derivatives are rebuilt.
+        """
+        static_urls = {}
+        for path, variants in ASSET_VARIANTS.items():
+            absolute_path = self.static_dir / path
+            if not absolute_path.exists():
+                continue
+            static_urls[(path, None)] = absolute_path.as_uri()
+            for usage in variants:
+                derivative = derivative_path(path, usage)
+                if derivative is not None and derivative.exists():
+                    static_urls[(path, usage)] = derivative.as_uri()
+        self.static_urls = static_urls
+        
+        digest = hashlib.sha256()
+        digest.update(f"assets-v{PIPELINE_VERSION}".encode())
+        digest.update(_file_digest(self.template_dir / "certificado.html").encode())
+        for asset in sorted(self.static_dir.rglob("*")):
+            if asset.is_file():
+                digest.update(_file_digest(asset).encode())
+        self.version = digest.hexdigest()
 
     def format_date(self, date_obj):
-        """Generate a URL for static files"""
-        return f"../static/{path}"
+        """Format a date as "05 ene 2025" without depending on the process locale."""
+        return f"{date_obj.day:02d} {SPANISH_MONTHS[date_obj.month - 1]} {date_obj.year}"
     
     def generate_certificate_pdf(self, vehicle_appraisal, deductions):
         """
         Generate a PDF certificate for a vehicle appraisal.
         
+        The PDF is served from the certificate cache when the appraisal, its
+        deductions, the template and the static assets are unchanged since the
+        last render.
+        
         Args:
             vehicle_appraisal: Vehicle appraisal data from database
             deductions: List of deductions for this appraisal
@@ -69,12 +183,90 @@ class CertificateService:
         Returns:
             Path to the generated PDF file
         """
-        # Format date
+        template_data = self.build_template_data(vehicle_appraisal, deductions)
+        key = self.cache_key(template_data)
+        
+        cached_path = self.cache.get(vehicle_appraisal.vehicle_appraisal_id, key)
+        if cached_path is not None:
+            return cached_path
+        
+        output_path = self.cache.path_for(vehicle_appraisal.vehicle_appraisal_id, key)
+        replaced_size = self.cache.file_size(output_path)
+        self.render_pdf(template_data, output_path)
+        self.cache.put(output_path, replaced_size)
+        return output_path
+    
+    async def render_certificate(self, vehicle_appraisal, deductions):
+        """
+        Render a certificate in memory using the certificate render pool, so the
+        event loop is not blocked while WeasyPrint runs.
+        
+        With CERT_DISK_CACHE enabled, renders are also stored in (and served
+        from) the on-disk PDF cache. Concurrent calls for the same appraisal
+        version share a single render.
+        
+        Args:
+            vehicle_appraisal: Vehicle appraisal data from database
+            deductions: List of deductions for this appraisal
+            
+        Returns:
+            CertificatePdf with the PDF content and its ETag
+        """
+        template_data, key = self.prepare(vehicle_appraisal, deductions)
+        return await self.render_prepared(vehicle_appraisal.vehicle_appraisal_id, template_data, key)
+    
+    def prepare(self, vehicle_appraisal, deductions):
+        """
+        Build the template context of a certificate and its cache key.
+        
+        The key is also the ETag, so conditional requests can be answered
+        from it without rendering.
+        
+        Returns:
+            Tuple (template_data, cache key)
+        """
+        template_data = self.build_template_data(vehicle_appraisal, deductions)
+        return template_data, self.cache_key(template_data)
+    
+    async def render_prepared(self, vehicle_appraisal_id, template_data, key):
+        """
+        Render a certificate from the output of ``prepare`` (see render_certificate).
+        
+        Returns:
+            CertificatePdf with the PDF content and its ETag
+        """
+        if settings.CERT_DISK_CACHE:
+            content = await asyncio.to_thread(self.cache.read, vehicle_appraisal_id, key)
+            if content is not None:
+                return CertificatePdf(vehicle_appraisal_id, key, content)
+        
+        async def render():
+            content = await render_pool.render(template_data)
+            if settings.CERT_DISK_CACHE:
+                await asyncio.to_thread(self.cache.store, vehicle_appraisal_id, key, content)
+            return CertificatePdf(vehicle_appraisal_id, key, content)
+        
+        return await _inflight_renders.do((vehicle_appraisal_id, key), render)
+    
+    def build_template_data(self, vehicle_appraisal, deductions):
+        """
+        Build the template context for a certificate.
+        
+        Args:
+            vehicle_appraisal: Vehicle appraisal data from database
+            deductions: List of deductions for this appraisal
+            
+        Returns:
+            Dictionary with the values used by certificado.html
+        """
+        # Format date (appraisal_date is a Date column; datetime is a date too).
+        # Without one the render date is printed, filled in by render_pdf_bytes
+        # so it stays out of the cache key
         appraisal_date = vehicle_appraisal.appraisal_date
-        if isinstance(appraisal_date, datetime):
-            formatted_date = appraisal_date.strftime("%d %b %Y")
+        if isinstance(appraisal_date, date):
+            formatted_date = self.format_date(appraisal_date)
         else:
-            formatted_date = datetime.now().strftime("%d %b %Y")
+            formatted_date = None
         
         # Calculate total deductions amount
         total_deductions = sum(deduction.amount or 0 for deduction in deductions)
@@ -125,48 +317,48 @@ class CertificateService:
         # Create safe deductions with null handling
         safe_deductions = []
         for deduction in deductions:
-            safe_deduction = type('SafeDeduction', (), {
-                'appraisal_deductions_id': deduction.appraisal_deductions_id,
-                'vehicle_appraisal_id': deduction.vehicle_appraisal_id,
-                'description': safe_str(deduction.description),
-                'amount': deduction.amount or 0
-            })()
+            safe_deduction = SimpleNamespace(
+                appraisal_deductions_id=deduction.appraisal_deductions_id,
+                vehicle_appraisal_id=deduction.vehicle_appraisal_id,
+                description=safe_str(deduction.description),
+                amount=deduction.amount or 0
+            )
             safe_deductions.append(safe_deduction)
         
         # Create a safe appraisal object with null handling
-        safe_appraisal = type('SafeAppraisal', (), {
-            'vehicle_appraisal_id': vehicle_appraisal.vehicle_appraisal_id,
-            'appraisal_date': vehicle_appraisal.appraisal_date,
-            'vehicle_description': safe_str(vehicle_appraisal.vehicle_description),
-            'brand': safe_str(vehicle_appraisal.brand),
-            'model_year': vehicle_appraisal.model_year,
-            'color': safe_str(vehicle_appraisal.color),
-            'mileage': vehicle_appraisal.mileage,
-            'fuel_type': safe_str(vehicle_appraisal.fuel_type),
-            'engine_size': vehicle_appraisal.engine_size,
-            'plate_number': safe_str(vehicle_appraisal.plate_number),
-            'applicant': safe_str(vehicle_appraisal.applicant),
-            'owner': safe_str(vehicle_appraisal.owner),
-            'appraisal_value_usd': vehicle_appraisal.appraisal_value_usd,
-            'appraisal_value_trochez': vehicle_appraisal.appraisal_value_trochez,
-            'vin': safe_str(vehicle_appraisal.vin),
-            'engine_number': safe_str(vehicle_appraisal.engine_number),
-            'notes': safe_str(vehicle_appraisal.notes),
-            'validity_days': vehicle_appraisal.validity_days,
-            'validity_kms': vehicle_appraisal.validity_kms,
-            'apprasail_value_lower_cost': vehicle_appraisal.apprasail_value_lower_cost,
-            'apprasail_value_bank': vehicle_appraisal.apprasail_value_bank,
-            'apprasail_value_lower_bank': vehicle_appraisal.apprasail_value_lower_bank,
-            'extras': safe_str(vehicle_appraisal.extras),
-            'vin_card': safe_str(vehicle_appraisal.vin_card),
-            'engine_number_card': safe_str(vehicle_appraisal.engine_number_card),
-            'modified_km': vehicle_appraisal.modified_km,
-            'extra_value': vehicle_appraisal.extra_value,
-            'discounts': vehicle_appraisal.discounts,
-            'bank_value_in_dollars': vehicle_appraisal.bank_value_in_dollars,
-            'referencia_original': safe_str(vehicle_appraisal.referencia_original),
-            'cert': safe_str(vehicle_appraisal.cert)
-        })()
+        safe_appraisal = SimpleNamespace(
+            vehicle_appraisal_id=vehicle_appraisal.vehicle_appraisal_id,
+            appraisal_date=vehicle_appraisal.appraisal_date,
+            vehicle_description=safe_str(vehicle_appraisal.vehicle_description),
+            brand=safe_str(vehicle_appraisal.brand),
+            model_year=vehicle_appraisal.model_year,
+            color=safe_str(vehicle_appraisal.color),
+            mileage=vehicle_appraisal.mileage,
+            fuel_type=safe_str(vehicle_appraisal.fuel_type),
+            engine_size=vehicle_appraisal.engine_size,
+            plate_number=safe_str(vehicle_appraisal.plate_number),
+            applicant=safe_str(vehicle_appraisal.applicant),
+            owner=safe_str(vehicle_appraisal.owner),
+            appraisal_value_usd=vehicle_appraisal.appraisal_value_usd,
+            appraisal_value_trochez=vehicle_appraisal.appraisal_value_trochez,
+            vin=safe_str(vehicle_appraisal.vin),
+            engine_number=safe_str(vehicle_appraisal.engine_number),
+            notes=safe_str(vehicle_appraisal.notes),
+            validity_days=vehicle_appraisal.validity_days,
+            validity_kms=vehicle_appraisal.validity_kms,
+            apprasail_value_lower_cost=vehicle_appraisal.apprasail_value_lower_cost,
+            apprasail_value_bank=vehicle_appraisal.apprasail_value_bank,
+            apprasail_value_lower_bank=vehicle_appraisal.apprasail_value_lower_bank,
+            extras=safe_str(vehicle_appraisal.extras),
+            vin_card=safe_str(vehicle_appraisal.vin_card),
+            engine_number_card=safe_str(vehicle_appraisal.engine_number_card),
+            modified_km=vehicle_appraisal.modified_km,
+            extra_value=vehicle_appraisal.extra_value,
+            discounts=vehicle_appraisal.discounts,
+            bank_value_in_dollars=vehicle_appraisal.bank_value_in_dollars,
+            referencia_original=safe_str(vehicle_appraisal.referencia_original),
+            cert=safe_str(vehicle_appraisal.cert)
+        )
         
         # Prepare template data
         template_data = {
@@ -183,81 +375,104 @@ class CertificateService:
             "appraisal_value_words_crc": appraisal_value_words_crc
         }
         
-        # Render HTML template
-        template = self.env.get_template("certificado.html")  # Use the correct filename with 'r'
-        html_content = template.render(**template_data)
+        return template_data
+    
+    def cache_key(self, template_data):
+        """
+        Compute the content hash identifying a certificate render.
+        
+        The key covers the template context, the template source and the static
+        assets, so any change to one of them produces a different PDF entry.
+        """
+        digest = hashlib.sha256()
+        digest.update(self.version.encode())
+        digest.update(json.dumps(template_data, default=_json_default, sort_keys=True).encode())
+        return digest.hexdigest()[:32]
+    
+    def render_pdf_bytes(self, template_data):
+        """
+        Render the certificate template to PDF content in memory.
         
-        # Create a temporary file for the PDF
-        output_path = self.temp_dir / f"certificate_{vehicle_appraisal.vehicle_appraisal_id}.pdf"
+        Args:
+            template_data: Template context from build_template_data
+            
+        Returns:
+            The PDF as bytes
+        """
+        # Render HTML template
+        if template_data.get("formatted_date") is None:
+            template_data = {**template_data, "formatted_date": self.format_date(date.today())}
+        html_content = self.template.render(**template_data)
         
         # Generate PDF using WeasyPrint
+        from weasyprint import HTML
+
         base_url = self.base_dir.as_uri()
-        # --- Modify HTML object creation ---
-        # No base_url needed when using absolute file:// URLs for assets
-        html = HTML(string=html_content)
-        # --- End Modify ---
-        HTML(string=html_content, base_url=base_url).write_pdf(
-            output_path,
-            stylesheets=[
-                CSS(string='''
-                    @page {
-                        size: A4;
-                        margin: 0;
-                    }
-                    body {
-                        margin: 0;
-                        padding: 0;
-                    }
-                ''')
-            ]
+        return HTML(string=html_content, base_url=base_url).write_pdf(
+            stylesheets=[_page_stylesheet()]
         )
-        
-        return output_path
     
-    def clean_old_pdfs(self):
-        """Delete all PDF files from the temp directory."""
+    def render_pdf(self, template_data, output_path):
+        """
+        Render the certificate template to a PDF file.
+        
+        Args:
+            template_data: Template context from build_template_data
+            output_path: Destination path of the PDF
+        """
+        content = self.render_pdf_bytes(template_data)
+        
+        # Write next to the target and rename, so readers never see a partial PDF
+        output_path = Path(output_path)
+        tmp_path = output_path.with_name(f".{output_path.name}.{uuid.uuid4().hex}.tmp")
         try:
-            if not self.temp_dir.exists():
-                return
-            
-            pdf_files = list(self.temp_dir.glob("certificate_*.pdf"))
-            deleted_count = 0
-            
-            for pdf_file in pdf_files:
-                try:
-                    pdf_file.unlink()
-                    deleted_count += 1
-                except Exception as e:
-                    print(f"Error deleting {pdf_file}: {e}")
-            
-            print(f"Cleaned {deleted_count} PDF files from temp directory at {datetime.now()}")
-        except Exception as e:
-            print(f"Error cleaning PDFs: {e}")
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, output_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+    
+    def warm_up(self):
+        """Import WeasyPrint and load its fonts ahead of the first render."""
+        from weasyprint import HTML
+
+        HTML(string="<p>Avalúos Trochez</p>").write_pdf(stylesheets=[_page_stylesheet()])
     
     def number_to_words(self, number):
         """Convert a number to words in Spanish."""
-        units = ['', 'UN', 'DOS', 'TRES', 'CUATRO', 'CINCO', 'SEIS', 'SIETE', 'OCHO', 'NUEVE']
-        teens = ['DIEZ', 'ONCE', 'DOCE', 'TRECE', 'CATORCE', 'QUINCE', 'DIECISEIS', 'DIECISIETE', 'DIECIOCHO', 'DIECINUEVE']
-        tens = ['', 'DIEZ', 'VEINTE', 'TREINTA', 'CUARENTA', 'CINCUENTA', 'SESENTA', 'SETENTA', 'OCHENTA', 'NOVENTA']
-        
-        if number == 0:
-            return 'CERO'
-        
-        if number < 10:
-            return units[number]
-        
-        if number < 20:
-            return teens[number - 10]
-        
-        if number < 100:
-            return tens[number // 10] + (' Y ' + units[number % 10] if number % 10 != 0 else '')
-        
-        if number < 1000:
-            hundreds = 'CIEN' if number == 100 else 'CIENTO' if number < 200 else 'DOSCIENTOS' if number < 300 else 'TRESCIENTOS' if number < 400 else 'CUATROCIENTOS' if number < 500 else 'QUINIENTOS' if number < 600 else 'SEISCIENTOS' if number < 700 else 'SETECIENTOS' if number < 800 else 'OCHOCIENTOS' if number < 900 else 'NOVECIENTOS'
-            return hundreds + (' ' + self.number_to_words(number % 100) if number % 100 != 0 else '')
-        
-        if number < 1000000:
-            return ('UN MIL' if number < 2000 else self.number_to_words(number // 1000) + ' MIL') + (' ' + self.number_to_words(number % 1000) if number % 1000 != 0 else '')
-        
-        # For simplicity, we'll just handle up to millions
-        return ('UN MILLÓN' if number < 2000000 else self.number_to_words(number // 1000000) + ' MILLONES') + (' ' + self.number_to_words(number % 1000000) if number % 1000000 != 0 else '')
\ No newline at end of file
+        return number_to_words(number)
+
+_certificate_service = None
+_certificate_service_lock = threading.Lock()
+
+def get_certificate_service():
+    """
+    Return the process-wide CertificateService, creating it on first use.
+    Also usable as a FastAPI dependency.
+    """
+    global _certificate_service
+    if _certificate_service is None:
+        with _certificate_service_lock:
+            if _certificate_service is None:
+                _certificate_service = CertificateService()
+    return _certificate_service
+
+
+async def warm_up_certificates():
+    """
+    Prepare the certificate machinery in the background after startup.
+
+    Builds the asset derivatives and the shared service off the event loop,
+    then starts the render pool. Until it finishes, renders fall back to the
+    thread pool of the event loop. With CERT_PREWARM and no worker processes,
+    WeasyPrint is also imported and warmed up in this process.
+    """
+    try:
+        await asyncio.to_thread(prepare_certificate_assets)
+        certificate_service = await asyncio.to_thread(get_certificate_service)
+        render_pool.start()
+        if render_pool.workers <= 0 and settings.CERT_PREWARM:
+            await asyncio.to_thread(certificate_service.warm_up)
+        logger.info("Certificate service warmed up")
+    except Exception as e:
+        logger.error(f"Error warming up the certificate service: {e}")
@@ -0,0 +1,117 @@
+"""
+Conversion of amounts to Spanish words for certificates and exports.
+
+Numbers use the forms that precede a currency name ("VEINTIÚN DÓLARES",
+"UN MILLÓN") and the long scale: 10^9 is "MIL MILLONES" and 10^12 is
+"UN BILLÓN". Amounts up to 10^18 - 1 are supported.
+"""
+from functools import lru_cache
+from typing import Iterable, List
+
+UNITS = ['', 'UN', 'DOS', 'TRES', 'CUATRO', 'CINCO', 'SEIS', 'SIETE', 'OCHO', 'NUEVE']
+TEENS = ['DIEZ', 'ONCE', 'DOCE', 'TRECE', 'CATORCE', 'QUINCE', 'DIECISÉIS', 'DIECISIETE', 'DIECIOCHO', 'DIECINUEVE']
+TWENTIES = ['VEINTE', 'VEINTIÚN', 'VEINTIDÓS', 'VEINTITRÉS', 'VEINTICUATRO', 'VEINTICINCO', 'VEINTISÉIS', 'VEINTISIETE', 'VEINTIOCHO', 'VEINTINUEVE']
+TENS = ['', '', '', 'TREINTA', 'CUARENTA', 'CINCUENTA', 'SESENTA', 'SETENTA', 'OCHENTA', 'NOVENTA']
+HUNDREDS = ['', 'CIENTO', 'DOSCIENTOS', 'TRESCIENTOS', 'CUATROCIENTOS', 'QUINIENTOS', 'SEISCIENTOS', 'SETECIENTOS', 'OCHOCIENTOS', 'NOVECIENTOS']
+
+# (value, singular, plural), largest first
+SCALES = [
+    (10 ** 12, 'BILLÓN', 'BILLONES'),
+    (10 ** 6, 'MILLÓN', 'MILLONES'),
+]
+
+MAX_NUMBER = 10 ** 18 - 1
+
+
+@lru_cache(maxsize=1000)
+def _below_thousand(number: int) -> str:
+    """Words for 0-999 (empty string for 0)."""
+    if number == 100:
+        return 'CIEN'
+    hundreds, rest = divmod(number, 100)
+    parts = []
+    if hundreds:
+        parts.append(HUNDREDS[hundreds])
+    if rest:
+        if rest < 10:
+            parts.append(UNITS[rest])
+        elif rest < 20:
+            parts.append(TEENS[rest - 10])
+        elif rest < 30:
+            parts.append(TWENTIES[rest - 20])
+        else:
+            tens, units = divmod(rest, 10)
+            parts.append(TENS[tens] + (f' Y {UNITS[units]}' if units else ''))
+    return ' '.join(parts)
+
+
+def _below_million(number: int) -> str:
+    """Words for 0-999999 (empty string for 0)."""
+    thousands, rest = divmod(number, 1000)
+    parts = []
+    if thousands == 1:
+        parts.append('MIL')
+    elif thousands:
+        parts.append(f'{_below_thousand(thousands)} MIL')
+    if rest:
+        parts.append(_below_thousand(rest))
+    return ' '.join(parts)
+
+
+@lru_cache(maxsize=4096)
+def _number_to_words(number: int) -> str:
+    if number == 0:
+        return 'CERO'
+    if number < 0:
+        return 'MENOS ' + _number_to_words(-number)
+
+    parts = []
+    for scale, singular, plural in SCALES:
+        count, number = divmod(number, scale)
+        if count == 1:
+            parts.append(f'UN {singular}')
+        elif count:
+            parts.append(f'{_below_million(count)} {plural}')
+    if number:
+        parts.append(_below_million(number))
+    return ' '.join(parts)
+
+
+def number_to_words(number) -> str:
+    """
+    Convert an integer amount to Spanish words.
+
+    Args:
+        number: Amount to convert; Decimal and float values are truncated
+
+    Returns:
+        The amount in upper-case words, e.g. "MIL DOSCIENTOS VEINTIÚN"
+
+    Raises:
+        ValueError: If the absolute value is larger than MAX_NUMBER
+    """
+    number = int(number)
+    if abs(number) > MAX_NUMBER:
+        raise ValueError(f"Number out of range for conversion to words: {number}")
+    return _number_to_words(number)
+
+
+def numbers_to_words(numbers: Iterable) -> List[str]:
+    """
+    Convert many amounts at once, converting each distinct amount only once.
+
+    Args:
+        numbers: Amounts to convert
+
+    Returns:
+        Words for each amount, in the same order
+    """
+    converted = {}
+    result = []
+    for number in numbers:
+        number = int(number)
+        words = converted.get(number)
+        if words is None:
+            words = converted[number] = number_to_words(number)
+        result.append(words)
+    return result
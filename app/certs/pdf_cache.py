@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+
+class PdfCache:
+    """
+    Content-addressed cache of rendered certificate PDFs stored on disk.
+
+    Each entry is named ``certificate_{id}_{key}.pdf`` where ``key`` is a hash of
+    everything that goes into the render, so a changed appraisal simply produces
+    a new entry. The directory is kept under ``max_bytes`` and entries older than
+    ``max_age_seconds`` are dropped by ``sweep``, which evicts the least recently
+    used files first (a cache hit refreshes the file's mtime).
+    """
+
+    # Leftover temp files from interrupted writes are removed after this long
+    TMP_FILE_MAX_AGE_SECONDS = 3600
+
+    def __init__(self, cache_dir: Path, max_bytes: int, max_age_seconds: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._usage_bytes = 0
+        self._file_count = 0
+        self._evictions = {"size": 0, "age": 0, "invalidated": 0}
+        self._last_sweep = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path_for(self, vehicle_appraisal_id: int, key: str) -> Path:
+        """Return the cache path for an appraisal render identified by ``key``."""
+        return self.cache_dir / f"certificate_{vehicle_appraisal_id}_{key}.pdf"
+
+    def get(self, vehicle_appraisal_id: int, key: str) -> Optional[Path]:
+        """Return the cached PDF path, or None if it has not been rendered yet."""
+        path = self.path_for(vehicle_appraisal_id, key)
+        try:
+            # Touch the file so LRU eviction sees it as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def read(self, vehicle_appraisal_id: int, key: str) -> Optional[bytes]:
+        """Return the cached PDF content, or None if it is not cached."""
+        path = self.get(vehicle_appraisal_id, key)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            # Evicted between the lookup and the read
+            return None
+
+    def put(self, path: Path, replaced_size: Optional[int] = None) -> None:
+        """
+        Account for a freshly written PDF; sweeps right away when over budget.
+
+        Args:
+            path: The PDF written into the cache directory
+            replaced_size: Size of the file it overwrote, or None if it is a new entry
+        """
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if replaced_size is None:
+                self._usage_bytes += size
+                self._file_count += 1
+            else:
+                self._usage_bytes += size - replaced_size
+            over_budget = self._usage_bytes > self.max_bytes
+        if over_budget:
+            self.sweep()
+
+    def store(self, vehicle_appraisal_id: int, key: str, content: bytes) -> Path:
+        """Atomically write rendered PDF content into the cache."""
+        path = self.path_for(vehicle_appraisal_id, key)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            tmp_path.write_bytes(content)
+            # Another render of the same key may have stored it meanwhile
+            replaced_size = self.file_size(path)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        self.put(path, replaced_size)
+        return path
+
+    def invalidate(self, vehicle_appraisal_id: int) -> int:
+        """Delete every cached render for an appraisal. Returns the number removed."""
+        removed = 0
+        with self._lock:
+            for path in self.cache_dir.glob(f"certificate_{vehicle_appraisal_id}_*.pdf"):
+                try:
+                    size = path.stat().st_size
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+                removed += 1
+                self._usage_bytes -= size
+                self._file_count -= 1
+            self._evictions["invalidated"] += removed
+        return removed
+
+    def sweep(self) -> dict:
+        """
+        Enforce the age limit and the byte budget on the cache directory.
+
+        Expired PDFs are removed first, then the least recently used ones until
+        the directory fits ``max_bytes``. Blocking file I/O: run it off the
+        event loop.
+
+        Returns:
+            The cache metrics after the sweep
+        """
+        with self._lock:
+            now = time.time()
+            entries = []
+            total = 0
+            for path in self.cache_dir.glob("certificate_*.pdf"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                if now - stat.st_mtime > self.max_age_seconds:
+                    if self._unlink(path):
+                        self._evictions["age"] += 1
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+            entries.sort(key=lambda entry: entry[0])
+            kept = len(entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if self._unlink(path):
+                    self._evictions["size"] += 1
+                total -= size
+                kept -= 1
+
+            for path in self.cache_dir.glob(".certificate_*.tmp"):
+                try:
+                    if now - path.stat().st_mtime > self.TMP_FILE_MAX_AGE_SECONDS:
+                        path.unlink()
+                except FileNotFoundError:
+                    pass
+
+            self._usage_bytes = total
+            self._file_count = kept
+            self._last_sweep = now
+        return self.metrics()
+
+    def metrics(self) -> dict:
+        """Current usage and eviction counters of the cache."""
+        return {
+            "usage_bytes": self._usage_bytes,
+            "max_bytes": self.max_bytes,
+            "files": self._file_count,
+            "max_age_seconds": self.max_age_seconds,
+            "evictions": dict(self._evictions),
+            "last_sweep": self._last_sweep,
+        }
+
+    @staticmethod
+    def file_size(path: Path) -> Optional[int]:
+        """Size of a cached file in bytes, or None if it does not exist."""
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _unlink(path: Path) -> bool:
+        try:
+            path.unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+
+# Shared cache for the app/temp directory, used by the service and the routers
+certificate_cache = PdfCache(
+    Path(__file__).parent.parent / "temp",
+    settings.CERT_CACHE_MAX_BYTES,
+    settings.CERT_CACHE_MAX_AGE_SECONDS,
+)
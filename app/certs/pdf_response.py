@@ -0,0 +1,113 @@
+import re
+from typing import Optional
+from fastapi import Request, Response, status
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _parse_range(range_header: str, size: int):
+    """
+    Parse a single-range ``Range`` header.
+
+    Returns:
+        (start, end) inclusive, or None when the header is not a single byte
+        range and should be ignored
+
+    Raises:
+        ValueError: If the range cannot be satisfied
+    """
+    match = _RANGE_RE.match(range_header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("Range outside of the content")
+    return start, min(end, size - 1)
+
+
+def _etag_matches(header_value: str, etag: str) -> bool:
+    if header_value.strip() == "*":
+        return True
+    candidates = [value.strip() for value in header_value.split(",")]
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def _cache_headers(etag: str) -> dict:
+    return {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+    }
+
+
+def not_modified_response(request: Request, cache_key: str) -> Optional[Response]:
+    """
+    Answer ``If-None-Match`` before anything is rendered.
+
+    Args:
+        request: Incoming request
+        cache_key: Certificate cache key (CertificateService.cache_key), used as ETag
+
+    Returns:
+        A 304 response when the client already has this version, otherwise None
+    """
+    etag = f'"{cache_key}"'
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_cache_headers(etag))
+    return None
+
+
+def pdf_response(request: Request, certificate_pdf, download: bool = False) -> Response:
+    """
+    Build the HTTP response for an in-memory certificate PDF.
+
+    Sets Content-Length and an ETag derived from the certificate cache key,
+    answers ``If-None-Match`` with 304 and single byte ``Range`` requests with
+    206 (honouring ``If-Range``).
+
+    Args:
+        request: Incoming request (for the conditional and range headers)
+        certificate_pdf: CertificatePdf returned by CertificateService.render_certificate
+        download: If True, the PDF is sent as an attachment instead of inline
+    """
+    not_modified = not_modified_response(request, certificate_pdf.etag)
+    if not_modified is not None:
+        return not_modified
+
+    etag = f'"{certificate_pdf.etag}"'
+    disposition = "attachment" if download else "inline"
+    headers = {
+        **_cache_headers(etag),
+        "Content-Disposition": f"{disposition}; filename={certificate_pdf.filename}",
+    }
+
+    content = certificate_pdf.content
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, len(content))
+        except ValueError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{len(content)}"},
+            )
+        if byte_range is not None:
+            start, end = byte_range
+            return Response(
+                content=content[start:end + 1],
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                media_type="application/pdf",
+                headers={**headers, "Content-Range": f"bytes {start}-{end}/{len(content)}"},
+            )
+
+    return Response(content=content, media_type="application/pdf", headers=headers)
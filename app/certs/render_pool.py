@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import HTTPException, status
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Certificate service owned by a worker process (built once by _init_worker)
+_worker_service = None
+
+
+def _init_worker():
+    """Build the certificate service in a worker and warm up WeasyPrint."""
+    global _worker_service
+    from app.certs.certificate_service import get_certificate_service
+
+    _worker_service = get_certificate_service()
+    _worker_service.warm_up()
+
+
+def _worker_pid():
+    return os.getpid()
+
+
+def _render_in_worker(template_data):
+    return _worker_service.render_pdf_bytes(template_data)
+
+
+class RenderPool:
+    """
+    Bounded process pool that renders certificate PDFs off the event loop.
+
+    At most ``workers + queue_depth`` renders are accepted at once; further
+    requests are rejected with HTTP 503 and a Retry-After header instead of
+    piling up behind the workers. With ``workers=0`` renders run in the default
+    thread pool of the event loop (useful for local development).
+
+    A worker that dies (a WeasyPrint crash, the OOM killer) breaks the whole
+    process pool; the pool is then replaced and the render retried once.
+    """
+
+    def __init__(self, workers: int, queue_depth: int, retry_after: int):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of renders running or waiting for a worker."""
+        return self._pending
+
+    def start(self):
+        """Start the worker processes and make sure every worker is warm."""
+        with self._executor_lock:
+            if self.workers <= 0 or self._executor is not None:
+                return
+            self._executor = self._new_executor()
+        logger.info(f"Certificate render pool started with {self.workers} workers")
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            logger.info("Certificate render pool shutdown complete")
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        # Workers are spawned on demand; one task per worker starts them all now
+        for future in [executor.submit(_worker_pid) for _ in range(self.workers)]:
+            future.add_done_callback(_log_worker_start)
+        return executor
+
+    def _replace_broken(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        """Replace ``broken`` with a new pool, unless another render already did."""
+        with self._executor_lock:
+            if self._executor is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._new_executor()
+                logger.warning("Certificate render pool was broken by a dead worker and has been restarted")
+            return self._executor
+
+    async def render(self, template_data) -> bytes:
+        """
+        Render a certificate PDF without blocking the event loop.
+
+        Args:
+            template_data: Template context from CertificateService.build_template_data
+
+        Returns:
+            The PDF content
+
+        Raises:
+            HTTPException: 503 when the render queue is full
+            BrokenProcessPool: When the render also kills the replacement pool
+        """
+        if self._pending >= max(self.workers, 1) + self.queue_depth:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="El servicio de certificados está ocupado, intente de nuevo",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._executor
+            if executor is None:
+                from app.certs.certificate_service import get_certificate_service
+
+                return await loop.run_in_executor(
+                    None, get_certificate_service().render_pdf_bytes, template_data
+                )
+            try:
+                return await loop.run_in_executor(executor, _render_in_worker, template_data)
+            except BrokenProcessPool:
+                executor = self._replace_broken(executor)
+                if executor is None:
+                    # Shut down meanwhile
+                    raise
+            try:
+                return await loop.run_in_executor(executor, _render_in_worker, template_data)
+            except BrokenProcessPool:
+                # Most likely this render itself crashes the worker: leave a
+                # working pool for the next ones and report the failure
+                self._replace_broken(executor)
+                raise
+        finally:
+            self._pending -= 1
+
+
+async def retry_when_busy(render, retry_after: int, attempts: int = 3):
+    """
+    Await ``render()``, retrying while the render pool answers 503.
+
+    Used by background renders (batches, jobs) so they wait for capacity
+    instead of failing when interactive requests fill the queue.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return await render()
+        except HTTPException as e:
+            if e.status_code != status.HTTP_503_SERVICE_UNAVAILABLE or attempt == attempts:
+                raise
+            await asyncio.sleep(retry_after)
+
+
+def _log_worker_start(future):
+    if future.exception() is not None:
+        logger.error(f"Certificate render worker failed to start: {future.exception()}")
+
+
+render_pool = RenderPool(
+    workers=settings.CERT_RENDER_WORKERS,
+    queue_depth=settings.CERT_RENDER_QUEUE_DEPTH,
+    retry_after=settings.CERT_RENDER_RETRY_AFTER,
+)
@@ -0,0 +1,328 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CachePolicy(NamedTuple):
+    """How long a cached response is served."""
+    # Seconds an entry is fresh
+    ttl: int
+    # Extra seconds a stale entry is still served while it is recomputed in the background
+    stale: int = 0
+
+
+class CacheEntry(NamedTuple):
+    value: object
+    # Wall-clock time, so entries shared through Redis age the same in every process
+    stored_at: float
+    # Time of the last write when the computation started; the entry is
+    # discarded once a later write is recorded
+    generation: float = 0
+
+
+class MemoryBackend:
+    """In-process LRU of at most ``max_entries`` entries."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str, generation_key: str) -> Tuple[Optional[CacheEntry], float]:
+        """Return the entry stored under ``key`` (or None) and the current generation."""
+        with self._lock:
+            generation = self._generations.get(generation_key, 0)
+            item = self._entries.get(key)
+            if item is None:
+                return None, generation
+            entry, expires_at = item
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None, generation
+            self._entries.move_to_end(key)
+            return entry, generation
+
+    def generation(self, generation_key: str) -> float:
+        with self._lock:
+            return self._generations.get(generation_key, 0)
+
+    def set_generation(self, generation_key: str, generation: float) -> None:
+        with self._lock:
+            self._generations[generation_key] = generation
+
+    def set(self, key: str, entry: CacheEntry, expire_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (entry, time.time() + expire_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """
+    Entries shared by every API instance through Redis, stored as JSON.
+
+    Needs the optional ``redis`` package; locally any Redis-compatible server
+    works (e.g. ``docker run -p 6379:6379 redis:7``).
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        # Optional dependency, only imported when a Redis URL is configured
+        import redis
+        self._client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+
+    def lookup(self, key: str, generation_key: str) -> Tuple[Optional[CacheEntry], float]:
+        """Return the entry stored under ``key`` (or None) and the current generation, in one round-trip."""
+        raw, generation = self._client.mget(key, generation_key)
+        generation = float(generation) if generation is not None else 0
+        if raw is None:
+            return None, generation
+        stored_at, value, entry_generation = json.loads(raw)
+        return CacheEntry(value, stored_at, entry_generation), generation
+
+    def generation(self, generation_key: str) -> float:
+        generation = self._client.get(generation_key)
+        return float(generation) if generation is not None else 0
+
+    def set_generation(self, generation_key: str, generation: float) -> None:
+        self._client.set(generation_key, repr(generation))
+
+    def set(self, key: str, entry: CacheEntry, expire_seconds: float) -> None:
+        payload = json.dumps([entry.stored_at, entry.value, entry.generation], default=str)
+        self._client.set(key, payload, ex=max(int(expire_seconds), 1))
+
+    def delete_prefix(self, prefix: str) -> int:
+        keys = list(self._client.scan_iter(match=f"{prefix}*", count=500))
+        if keys:
+            self._client.delete(*keys)
+        return len(keys)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+def build_backend(url: str, max_entries: int = 256):
+    """
+    Cache backend for a cache URL.
+
+    Args:
+        url: "memory://", "redis://..." / "rediss://...", or empty to disable caching
+        max_entries: Size of the in-process LRU
+
+    Returns:
+        The backend, or None when caching is disabled
+    """
+    if not url:
+        return None
+    if url.startswith(("redis://", "rediss://")):
+        return RedisBackend(url)
+    if url.startswith("memory://"):
+        return MemoryBackend(max_entries)
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+class ResponseCache:
+    """
+    Cache of computed responses with per-call TTLs and stale-while-revalidate.
+
+    ``fetch`` serves a fresh entry as is. A stale entry (older than the TTL
+    but within the stale window) is served too, while one background thread
+    recomputes it with a session from ``session_factory``. Anything older is
+    recomputed in the request.
+
+    ``invalidate`` drops every entry of the namespace and records the time of
+    the write in the backend, as the generation of the namespace. Every entry
+    carries the generation its computation started in and is ignored once a
+    later write is recorded, so a response computed before a write (in this
+    process or another one sharing the backend) is never served after it.
+    For ``settle_seconds`` after a write, misses and background refreshes are
+    computed with a session from ``primary_session_factory``, since a read
+    replica may not have the write yet; without a primary factory the values
+    computed in that window are not stored.
+
+    Backend errors are logged and counted, and the response is computed as if
+    the cache were empty.
+    """
+
+    def __init__(self, backend, namespace: str, session_factory=None, primary_session_factory=None,
+                 settle_seconds: float = 0, refresh_workers: int = 2):
+        self.backend = backend
+        self.namespace = namespace
+        self.session_factory = session_factory
+        self.primary_session_factory = primary_session_factory
+        self.settle_seconds = settle_seconds
+        self.refresh_workers = refresh_workers
+        # Outside the entries prefix, so invalidate() does not delete it
+        self.generation_key = f"{namespace}@generation"
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._executor = None
+        self._stats = {}
+
+    def key_for(self, name: str, *parts) -> str:
+        return ":".join([self.namespace, name, *(str(part) for part in parts)])
+
+    def fetch(self, name: str, key_parts, compute, db, policy: CachePolicy):
+        """
+        Return the cached response of ``name`` for ``key_parts``, computing it when needed.
+
+        Args:
+            name: Endpoint name, used for the metrics
+            key_parts: Values identifying the response (query parameters, day...)
+            compute: Callable taking a database session and returning a JSON-serializable value
+            db: Session of the current request, used when computing inline
+            policy: TTL and stale window of this endpoint
+        """
+        if self.backend is None:
+            return compute(db)
+        key = self.key_for(name, *key_parts)
+        entry, generation = self._backend_call(name, self.backend.lookup, key, self.generation_key) or (None, None)
+        # Computed before the latest write: treated as a miss
+        if entry is not None and entry.generation == generation:
+            age = time.time() - entry.stored_at
+            if age < policy.ttl:
+                self._count(name, "hits")
+                return entry.value
+            if age < policy.ttl + policy.stale and self.session_factory is not None:
+                self._count(name, "stale_hits")
+                self._revalidate(name, key, compute, policy, generation)
+                return entry.value
+        self._count(name, "misses")
+        if self._settling(generation):
+            return self._compute_on_primary(name, key, compute, db, policy, generation)
+        return self._compute_and_store(name, key, compute, db, policy, generation)
+
+    def recompute(self, name: str, key_parts, compute, db, policy: CachePolicy):
+        """
+        Compute the response of ``name`` with ``db`` and store it, without looking the cache up.
+
+        Used by callers that already know the entry is outdated (e.g. right
+        after a write), so ``db`` should be a session on the primary.
+        """
+        if self.backend is None:
+            return compute(db)
+        key = self.key_for(name, *key_parts)
+        generation = self._backend_call(name, self.backend.generation, self.generation_key)
+        self._count(name, "refreshes")
+        return self._compute_and_store(name, key, compute, db, policy, generation)
+
+    def invalidate(self) -> None:
+        """Drop every entry of the namespace and start a new generation."""
+        if self.backend is None:
+            return
+        self._backend_call("invalidations", self.backend.set_generation, self.generation_key, time.time())
+        removed = self._backend_call("invalidations", self.backend.delete_prefix, f"{self.namespace}:")
+        self._count("invalidations", "count")
+        logger.debug(f"Invalidated {removed} '{self.namespace}' cache entries")
+
+    def _settling(self, generation) -> bool:
+        """Whether the latest write may not have reached the read replica yet."""
+        return bool(generation) and time.time() - generation < self.settle_seconds
+
+    def _compute_and_store(self, name: str, key: str, compute, db, policy: CachePolicy, generation):
+        value = compute(db)
+        if generation is not None:
+            entry = CacheEntry(value, time.time(), generation)
+            self._backend_call(name, self.backend.set, key, entry, policy.ttl + policy.stale)
+        return value
+
+    def _compute_on_primary(self, name: str, key: str, compute, db, policy: CachePolicy, generation):
+        if self.primary_session_factory is None:
+            # Maybe from a replica behind the write: served, not stored
+            return compute(db)
+        with self.primary_session_factory() as primary_db:
+            return self._compute_and_store(name, key, compute, primary_db, policy, generation)
+
+    def _revalidate(self, name: str, key: str, compute, policy: CachePolicy, generation) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.refresh_workers, thread_name_prefix=f"{self.namespace}-cache"
+                )
+            executor = self._executor
+        executor.submit(self._refresh, name, key, compute, policy, generation)
+
+    def _refresh(self, name: str, key: str, compute, policy: CachePolicy, generation) -> None:
+        try:
+            session_factory = self.session_factory
+            if self._settling(generation):
+                if self.primary_session_factory is None:
+                    # Keep serving the stale entry until the replica has the write
+                    return
+                session_factory = self.primary_session_factory
+            with session_factory() as db:
+                self._compute_and_store(name, key, compute, db, policy, generation)
+            self._count(name, "refreshes")
+        except Exception as e:
+            self._count(name, "errors")
+            logger.error(f"Error refreshing cache entry {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _backend_call(self, name: str, method, *args):
+        try:
+            return method(*args)
+        except Exception as e:
+            self._count(name, "errors")
+            logger.warning(f"Cache backend {self.backend.name} failed: {e}")
+            return None
+
+    def _count(self, name: str, counter: str) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(name, {})
+            stats[counter] = stats.get(counter, 0) + 1
+
+    def metrics(self) -> dict:
+        """Hit, stale hit and miss counters with hit rates, per endpoint and in total."""
+        with self._lock:
+            stats = {name: dict(counters) for name, counters in self._stats.items()}
+        invalidations = stats.pop("invalidations", {})
+
+        def with_rate(counters):
+            lookups = sum(counters.get(counter, 0) for counter in ("hits", "stale_hits", "misses"))
+            served = counters.get("hits", 0) + counters.get("stale_hits", 0)
+            return {**counters, "hit_rate": round(served / lookups, 4) if lookups else None}
+
+        total = {}
+        for counters in stats.values():
+            for counter, value in counters.items():
+                total[counter] = total.get(counter, 0) + value
+        return {
+            "backend": self.backend.name if self.backend is not None else None,
+            "entries": self.backend.size() if self.backend is not None else 0,
+            "invalidations": {"count": invalidations.get("count", 0), "errors": invalidations.get("errors", 0)},
+            "total": with_rate(total),
+            "endpoints": {name: with_rate(counters) for name, counters in sorted(stats.items())},
+        }
+
+    def shutdown(self) -> None:
+        """Stop the background refresh threads."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -18,6 +18,62 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     DB_NAME: str
 
+    # Connection pool, per process: at most DB_POOL_SIZE + DB_MAX_OVERFLOW connections
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Seconds a request waits for a free connection before failing
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 300
+    # Test connections with a round-trip on every checkout; when disabled, stale
+    # connections are detected on use and the pool is invalidated instead
+    DB_POOL_PRE_PING: bool = True
+    # PostgreSQL statement_timeout for every connection (0 disables it)
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+
+    # Read replica for list, search and dashboard queries (same format as
+    # DATABASE_URL; reads use the primary when unset)
+    DB_REPLICA_URL: Optional[str] = None
+    # After a write, the same client reads from the primary for this long
+    DB_READ_YOUR_WRITES_SECONDS: int = 5
+
+    # Appraisal search backend: "auto", "trigram" or "ilike"
+    APPRAISAL_SEARCH_BACKEND: str = "auto"
+    # Schema handling at startup: "none" (managed by `alembic upgrade head`, no
+    # introspection at boot), "migrate" (run the Alembic migrations) or
+    # "create_all" (legacy Base.metadata.create_all)
+    DB_SCHEMA_MODE: str = "none"
+    # Lifetime of memoized totals for count=cached pagination
+    APPRAISAL_COUNT_CACHE_TTL_SECONDS: int = 30
+    # Dashboard response cache: "memory://" (in-process LRU), "redis://host:6379/0"
+    # (shared between instances, needs the redis package) or "" to disable it
+    DASHBOARD_CACHE_URL: str = "memory://"
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 256
+    # /dashboard/stream: writes within this window are pushed as one snapshot
+    DASHBOARD_STREAM_DEBOUNCE_SECONDS: float = 2.0
+    DASHBOARD_STREAM_KEEPALIVE_SECONDS: int = 15
+    # Periodic recomputation (changes made by other instances, change of day); 0 disables it
+    DASHBOARD_STREAM_REFRESH_SECONDS: int = 300
+    # Lifetime of the tokens browsers pass to /dashboard/stream in the URL
+    DASHBOARD_STREAM_TOKEN_SECONDS: int = 60
+
+    # Certificate settings
+    CERT_DISK_CACHE: bool = False
+    CERT_CACHE_MAX_BYTES: int = 200 * 1024 * 1024
+    CERT_CACHE_MAX_AGE_SECONDS: int = 7 * 24 * 3600
+    CERT_JANITOR_INTERVAL_SECONDS: int = 300
+    CERT_RENDER_WORKERS: int = 1
+    # Import and warm up WeasyPrint in the API process after startup (only when CERT_RENDER_WORKERS is 0)
+    CERT_PREWARM: bool = True
+    CERT_RENDER_QUEUE_DEPTH: int = 8
+    CERT_RENDER_RETRY_AFTER: int = 5
+    CERT_JOB_WORKERS: int = 1
+    CERT_JOB_TTL_SECONDS: int = 3600
+    # Jobs waiting for a worker; further submissions get a 503
+    CERT_JOB_QUEUE_DEPTH: int = 32
+    # Jobs tracked at once (finished ones included until they expire)
+    CERT_JOB_MAX_JOBS: int = 1000
+    CERT_PRERENDER_ON_SAVE: bool = True
+
     # Alias properties to maintain compatibility with existing code
     @property
     def MYSQL_HOST(self) -> str:
@@ -0,0 +1,150 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.config import settings
+from app.core.metrics import Histogram
+
+
+class PoolStats:
+    """Counters and checkout latency of a connection pool, kept across pool recreation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkout_ms = Histogram()
+        self.counters = {"checkouts": 0, "waits": 0, "timeouts": 0, "connects": 0, "invalidations": 0}
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        return {**counters, "checkout_ms": self.checkout_ms.snapshot()}
+
+
+class InstrumentedPoolMixin:
+    """
+    Records checkout latency and pool pressure of a QueuePool.
+
+    A checkout counts as a wait when no idle connection was available and the
+    overflow was exhausted, i.e. the request had to queue for a connection.
+    """
+
+    def __init__(self, *args, stats=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = stats or PoolStats()
+        self.max_overflow = kwargs.get("max_overflow", 10)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        pool.max_overflow = self.max_overflow
+        return pool
+
+    def connect(self):
+        waited = self.checkedin() == 0 and 0 <= self.max_overflow <= self.overflow()
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.stats.incr("timeouts")
+            raise
+        finally:
+            self.stats.checkout_ms.observe((time.perf_counter() - start) * 1000)
+        self.stats.incr("checkouts")
+        if waited:
+            self.stats.incr("waits")
+        return connection
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    """QueuePool of the sync engine with checkout metrics."""
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """Pool of the asyncio engine with checkout metrics."""
+
+
+# Async drivers used for the sync drivers of DB_URL
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_url(url: str) -> str:
+    """
+    Translate a sync database URL (psycopg2, pysqlite) to its asyncio driver.
+
+    asyncpg does not understand libpq's ``sslmode`` parameter; it is passed on
+    as ``ssl``, which accepts the same values.
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver configured for {backend} databases")
+    url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    if backend == "postgresql" and "sslmode" in url.query:
+        query = dict(url.query)
+        query["ssl"] = query.pop("sslmode")
+        url = url.set(query=query)
+    return url.render_as_string(hide_password=False)
+
+
+def engine_options(url: str) -> dict:
+    """
+    create_engine / create_async_engine keyword arguments for the pool
+    settings (DB_POOL_*) and the PostgreSQL statement timeout.
+    """
+    url = make_url(url)
+    is_async = url.get_driver_name() in ASYNC_DRIVERS.values()
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.get_backend_name() == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def instrument_engine(engine) -> None:
+    """
+    Count new and invalidated DBAPI connections in the pool stats of ``engine``
+    (for an AsyncEngine, pass ``async_engine.sync_engine``).
+    """
+    stats = engine.pool.stats
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats.incr("connects")
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats.incr("invalidations")
+
+
+def pool_metrics(engine) -> dict:
+    """Current pool occupancy plus the accumulated PoolStats of ``engine``."""
+    pool = engine.pool
+    metrics = {
+        "pool": {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": getattr(pool, "max_overflow", None),
+            "timeout": pool.timeout(),
+        }
+    }
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        metrics.update(stats.to_dict())
+    return metrics
@@ -0,0 +1,75 @@
+import bisect
+import threading
+
+# Latency buckets in milliseconds (upper bounds)
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """
+    Thread-safe fixed-bucket histogram.
+
+    Keeps one counter per bucket plus count, sum and max, so observing is O(log
+    buckets) and memory does not grow with traffic. Percentiles are estimated
+    as the upper bound of the bucket they fall in.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            # Last counter is the overflow bucket (+Inf)
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._count = 0
+            self._sum = 0.0
+            self._max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    def percentile(self, fraction: float):
+        """Upper bound of the bucket holding the given fraction of observations."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            maximum = self._max
+        if not total:
+            return None
+        target = fraction * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[index] if index < len(self.buckets) else maximum
+        return maximum
+
+    def snapshot(self) -> dict:
+        """Cumulative bucket counts (Prometheus style) and summary statistics."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            total_sum = self._sum
+            maximum = self._max
+        cumulative = {}
+        seen = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], counts):
+            seen += count
+            cumulative[str(bound)] = seen
+        return {
+            "count": total,
+            "sum": round(total_sum, 3),
+            "max": round(maximum, 3),
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "buckets": cumulative,
+        }
@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import time
+from typing import Optional
+from app.core.config import settings
+
+# Requests with these methods never write
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class WriteTracker:
+    """
+    Remembers which clients wrote recently, so their reads can go to the
+    primary until the replica has caught up (read-your-writes).
+
+    State is per process: with several machines a client may still read from
+    the replica on another machine, which is why the window should cover the
+    usual replication lag only.
+    """
+
+    def __init__(self, window_seconds: int):
+        self.window_seconds = window_seconds
+        self._writes = {}
+        self._lock = threading.Lock()
+
+    def mark(self, key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._writes[key] = now + self.window_seconds
+            if len(self._writes) > 1024:
+                # Drop expired entries now and then so the map stays small
+                self._writes = {k: until for k, until in self._writes.items() if until > now}
+
+    def recently_wrote(self, key: Optional[str]) -> bool:
+        if key is None:
+            return False
+        until = self._writes.get(key)
+        return until is not None and until > time.monotonic()
+
+
+write_tracker = WriteTracker(settings.DB_READ_YOUR_WRITES_SECONDS)
+
+
+def client_key(authorization: Optional[str]) -> Optional[str]:
+    """Stable key for the client behind an Authorization header (its bearer token)."""
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()[:32]
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware marking the client of every successful write request in
+    ``write_tracker``. The read session dependencies then send that client's
+    reads to the primary for DB_READ_YOUR_WRITES_SECONDS.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        authorization = dict(scope["headers"]).get(b"authorization")
+        key = client_key(authorization.decode("latin-1") if authorization else None)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_track(message):
+            # The endpoint has committed by the time the response starts
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                write_tracker.mark(key)
+            await send(message)
+
+        await self.app(scope, receive, send_and_track)
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Date, Numeric, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+# Rollups of live (is_deleted = false) vehicle appraisals per appraisal_date,
+# maintained by app.dashboard.services.rollups
+
+
+class AppraisalDailyStats(Base):
+    __tablename__ = "appraisal_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    appraisals_count = Column(Integer, nullable=False, default=0)
+    value_usd_sum = Column(Numeric(18, 2), nullable=False, default=0)
+    value_trochez_sum = Column(Numeric(18, 2), nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
+
+
+class AppraisalDailyBrandStats(Base):
+    __tablename__ = "appraisal_daily_brand_stats"
+
+    day = Column(Date, primary_key=True)
+    # Appraisals without brand are counted under ''
+    brand = Column(String(50), primary_key=True)
+    appraisals_count = Column(Integer, nullable=False, default=0)
+
+
+class AppraisalDailyApplicants(Base):
+    __tablename__ = "appraisal_daily_applicants"
+
+    day = Column(Date, primary_key=True)
+    applicant = Column(String(100), primary_key=True)
+    appraisals_count = Column(Integer, nullable=False, default=0)
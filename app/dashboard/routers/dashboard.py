@@ -1,134 +1,117 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, extract
-from datetime import datetime, date, timedelta
-from app.database import get_db
-from app.appraisals.models.appraisals import VehicleAppraisal
-from app.security.utils import get_current_user
+from datetime import date, timedelta
+from app.core.config import settings
+from app.database import SessionLocal, get_read_db
+from app.appraisals.events import on_appraisal_changed
+from app.dashboard.models.daily_stats import AppraisalDailyStats, AppraisalDailyBrandStats
+from app.dashboard.services.cache import cached, recompute
+from app.dashboard.services.periods import METRICS, compare, latest_nonempty_bucket, period_bounds, period_windows, variation
+from app.dashboard.services.stream import DashboardStream
+from app.security.utils import create_access_token, get_current_user, get_user_for_token, optional_oauth2_scheme
 from app.security.models.users import User
 
 router = APIRouter()
 
 # 1. Resumen general
+def _summary(db: Session) -> dict:
+    # Mes actual contra el mes anterior, en una sola consulta sobre los
+    # acumulados diarios (solo avalúos no eliminados)
+    totals = compare(db, period_windows("month"))
+    current, previous = totals["current"], totals["previous"]
+
+    return {
+        "total_avaluos": current["total_avaluos"],
+        "total_avaluos_variation": variation(current["total_avaluos"], previous["total_avaluos"]),
+        "total_ingresos": int(current["total_ingresos"]),
+        "total_ingresos_variation": variation(current["total_ingresos"], previous["total_ingresos"]),
+        "clientes_nuevos": current["clientes_nuevos"],
+        "clientes_nuevos_variation": variation(current["clientes_nuevos"], previous["clientes_nuevos"])
+    }
+
 @router.get("/summary")
 def dashboard_summary(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    today = date.today()
-    first_day_month = today.replace(day=1)
-    first_day_last_month = (first_day_month - timedelta(days=1)).replace(day=1)
-    last_day_last_month = first_day_month - timedelta(days=1)
-
-    # Total avalúos este mes
-    total_avaluos = db.query(func.count(VehicleAppraisal.vehicle_appraisal_id))\
-        .filter(VehicleAppraisal.appraisal_date >= first_day_month).scalar() or 0
-    # Total avalúos mes anterior
-    total_avaluos_last = db.query(func.count(VehicleAppraisal.vehicle_appraisal_id))\
-        .filter(VehicleAppraisal.appraisal_date >= first_day_last_month)\
-        .filter(VehicleAppraisal.appraisal_date <= last_day_last_month).scalar() or 0
-    # Variación
-    if total_avaluos_last:
-        var = ((total_avaluos - total_avaluos_last) / total_avaluos_last) * 100
-        total_avaluos_variation = f"{var:+.0f}%"
-    else:
-        total_avaluos_variation = "0%"
-
-    # Ingresos totales (suma appraisal_value_usd)
-    total_ingresos = db.query(func.coalesce(func.sum(VehicleAppraisal.appraisal_value_trochez), 0))\
-        .filter(VehicleAppraisal.appraisal_date >= first_day_month).scalar() or 0
-    total_ingresos_last = db.query(func.coalesce(func.sum(VehicleAppraisal.appraisal_value_trochez), 0))\
-        .filter(VehicleAppraisal.appraisal_date >= first_day_last_month)\
-        .filter(VehicleAppraisal.appraisal_date <= last_day_last_month).scalar() or 0
-    if total_ingresos_last:
-        var = ((total_ingresos - total_ingresos_last) / total_ingresos_last) * 100
-        total_ingresos_variation = f"{var:+.0f}%"
-    else:
-        total_ingresos_variation = "0%"
-
-    # Clientes nuevos (por applicant único)
-    clientes_nuevos = db.query(func.count(func.distinct(VehicleAppraisal.applicant)))\
-        .filter(VehicleAppraisal.appraisal_date >= first_day_month).scalar() or 0
-    clientes_nuevos_last = db.query(func.count(func.distinct(VehicleAppraisal.applicant)))\
-        .filter(VehicleAppraisal.appraisal_date >= first_day_last_month)\
-        .filter(VehicleAppraisal.appraisal_date <= last_day_last_month).scalar() or 0
-    if clientes_nuevos_last:
-        var = ((clientes_nuevos - clientes_nuevos_last) / clientes_nuevos_last) * 100
-        clientes_nuevos_variation = f"{var:+.0f}%"
-    else:
-        clientes_nuevos_variation = "0%"
+    return cached("summary", [date.today()], _summary, db)
 
+# 1b. Comparación del periodo actual contra el anterior
+def _compare(db: Session, period: str, reference_date: Optional[date]) -> dict:
+    windows = period_windows(period, reference_date)
+    totals = compare(db, windows)
     return {
-        "total_avaluos": total_avaluos,
-        "total_avaluos_variation": total_avaluos_variation,
-        "total_ingresos": int(total_ingresos),
-        "total_ingresos_variation": total_ingresos_variation,
-        "clientes_nuevos": clientes_nuevos,
-        "clientes_nuevos_variation": clientes_nuevos_variation
+        "period": period,
+        **{
+            label: {"start": start.isoformat(), "end": end.isoformat(), **totals[label]}
+            for label, (start, end) in windows.items()
+        },
+        "variation": {
+            metric: variation(totals["current"][metric], totals["previous"][metric])
+            for metric in METRICS
+        }
     }
 
-# 2. Ventas del día (últimos 7 días agrupados por día de la semana)
-@router.get("/ventas-dia")
-def dashboard_ventas_dia(
-    db: Session = Depends(get_db),
+@router.get("/compare")
+def dashboard_compare(
+    period: str = Query("month", pattern="^(week|month|quarter|year)$", description="Periodo: week, month, quarter o year"),
+    reference_date: Optional[date] = Query(None, description="Fecha dentro del periodo actual (por defecto hoy)"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    dias = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
-    max_weeks_back = 12  # Limita la búsqueda a 12 semanas atrás
-    week_offset = 0
+    return cached(
+        "compare", [period, reference_date or date.today()],
+        lambda session: _compare(session, period, reference_date), db
+    )
 
-    while week_offset < max_weeks_back:
-        today = date.today() - timedelta(weeks=week_offset)
-        # Encuentra el lunes de la semana correspondiente
-        week_start = today - timedelta(days=today.weekday())
-        week_end = week_start + timedelta(days=6)
+# 2. Ventas del día (últimos 7 días agrupados por día de la semana)
+def _ventas_dia(db: Session) -> dict:
+    dias = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
+    # Semana más reciente con ventas dentro de las últimas 12 semanas
+    bucket = latest_nonempty_bucket(
+        db, AppraisalDailyStats.day, "week", max_periods=12,
+        conditions=[AppraisalDailyStats.value_usd_sum != 0]
+    )
+    # Si no encuentra ninguna semana con datos, devuelve ceros y la semana actual
+    week_start, week_end = bucket or period_bounds("week", date.today())
 
+    valores = [0]*7
+    if bucket:
+        # Una fila por día de la semana con avalúos
         ventas = db.query(
-            extract('dow', VehicleAppraisal.appraisal_date).label('dow'),
-            func.coalesce(func.sum(VehicleAppraisal.appraisal_value_usd), 0)
-        ).filter(
-            VehicleAppraisal.appraisal_date >= week_start,
-            VehicleAppraisal.appraisal_date <= week_end
-        ).group_by('dow').all()
-
-        valores = [0]*7
-        for dow, total in ventas:
-            idx = int(dow) - 1 if int(dow) > 0 else 6  # PostgreSQL: 0=Domingo
-            valores[idx] = float(total)
-
-        if any(valores):  # Si hay al menos un valor distinto de 0, devuelve esa semana
-            return {
-                "labels": dias,
-                "values": valores,
-                "week_start": week_start.isoformat(),
-                "week_end": week_end.isoformat()
-            }
-
-        week_offset += 1
+            AppraisalDailyStats.day,
+            AppraisalDailyStats.value_usd_sum
+        ).filter(AppraisalDailyStats.day.between(week_start, week_end)).all()
+        for dia, total in ventas:
+            valores[dia.weekday()] = float(total)  # 0=Lunes
 
-    # Si no encuentra ninguna semana con datos, devuelve ceros y la semana actual
-    today = date.today()
-    week_start = today - timedelta(days=today.weekday())
-    week_end = week_start + timedelta(days=6)
     return {
         "labels": dias,
-        "values": [0]*7,
+        "values": valores,
         "week_start": week_start.isoformat(),
         "week_end": week_end.isoformat()
     }
 
-# 3. Ventas mensuales (año actual)
-@router.get("/ventas-mes")
-def dashboard_ventas_mes(
-    db: Session = Depends(get_db),
+@router.get("/ventas-dia")
+def dashboard_ventas_dia(
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
+    return cached("ventas-dia", [date.today()], _ventas_dia, db)
+
+# 3. Ventas mensuales (año actual)
+def _ventas_mes(db: Session) -> dict:
     year = date.today().year
     ventas = db.query(
-        extract('month', VehicleAppraisal.appraisal_date).label('mes'),
-        func.coalesce(func.sum(VehicleAppraisal.appraisal_value_usd), 0)
+        extract('month', AppraisalDailyStats.day).label('mes'),
+        func.coalesce(func.sum(AppraisalDailyStats.value_usd_sum), 0)
     ).filter(
-        extract('year', VehicleAppraisal.appraisal_date) == year
+        # Rango de fechas en lugar de extract('year') para poder usar la llave primaria
+        AppraisalDailyStats.day >= date(year, 1, 1),
+        AppraisalDailyStats.day < date(year + 1, 1, 1)
     ).group_by('mes').all()
     meses = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
     valores = [0]*12
@@ -137,52 +120,131 @@ def dashboard_ventas_mes(
         valores[idx] = float(total)
     return {"labels": meses, "values": valores}
 
+@router.get("/ventas-mes")
+def dashboard_ventas_mes(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    return cached("ventas-mes", [date.today()], _ventas_mes, db)
+
 # 4. Carros con más avalúos (top 5)
+def _carros_mas_avaluos(db: Session) -> dict:
+    # Mes más reciente con avalúos dentro de los últimos 12 meses
+    bucket = latest_nonempty_bucket(db, AppraisalDailyBrandStats.day, "month", max_periods=12)
+    if bucket is None:
+        # Si no hay datos en los últimos 12 meses, devuelve vacío y el mes actual
+        today = date.today()
+        return {
+            "labels": [],
+            "values": [],
+            "month": today.month,
+            "year": today.year
+        }
+
+    first_day, last_day = bucket
+    cantidad = func.sum(AppraisalDailyBrandStats.appraisals_count)
+    top = db.query(
+        AppraisalDailyBrandStats.brand,
+        cantidad.label('cantidad')
+    ).filter(
+        AppraisalDailyBrandStats.day.between(first_day, last_day)
+    ).group_by(AppraisalDailyBrandStats.brand)
+    top = top.order_by(cantidad.desc()).limit(5).all()
+
+    labels = [x[0] or "" for x in top]
+    values = [x[1] for x in top]
+    return {
+        "labels": labels,
+        "values": values,
+        "month": first_day.month,
+        "year": first_day.year
+    }
+
 @router.get("/carros-mas-avaluos")
 def dashboard_carros_mas_avaluos(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    from calendar import monthrange
-    max_months_back = 12
-    month_offset = 0
-    today = date.today()
-
-    while month_offset < max_months_back:
-        # Calcular mes y año a consultar
-        year = today.year
-        month = today.month - month_offset
-        while month <= 0:
-            month += 12
-            year -= 1
-        # Primer y último día del mes
-        first_day = date(year, month, 1)
-        last_day = date(year, month, monthrange(year, month)[1])
-
-        top = db.query(
-            VehicleAppraisal.brand,
-            func.count(VehicleAppraisal.vehicle_appraisal_id).label('cantidad')
-        ).filter(
-            VehicleAppraisal.appraisal_date >= first_day,
-            VehicleAppraisal.appraisal_date <= last_day
-        ).group_by(VehicleAppraisal.brand)
-        top = top.order_by(func.count(VehicleAppraisal.vehicle_appraisal_id).desc()).limit(5).all()
-
-        if top:
-            labels = [x[0] or "" for x in top]
-            values = [x[1] for x in top]
-            return {
-                "labels": labels,
-                "values": values,
-                "month": month,
-                "year": year
-            }
-        month_offset += 1
-
-    # Si no hay datos en los últimos 12 meses, devuelve vacío y el mes actual
-    return {
-        "labels": [],
-        "values": [],
-        "month": today.month,
-        "year": today.year
-    } 
\ No newline at end of file
+    return cached("carros-mas-avaluos", [date.today()], _carros_mas_avaluos, db)
+
+# 5. Actualizaciones en vivo (server-sent events)
+# Widgets pushed by /stream, same payloads as their endpoints
+STREAM_WIDGETS = {
+    "summary": _summary,
+    "ventas-dia": _ventas_dia,
+    "ventas-mes": _ventas_mes,
+    "carros-mas-avaluos": _carros_mas_avaluos,
+}
+
+
+def _snapshot(db: Session) -> dict:
+    # Always computed with the primary session, never read from the cache (it
+    # may still hold data from before the write); the result is stored so it
+    # also serves the polling endpoints
+    return {name: recompute(name, [date.today()], compute, db) for name, compute in STREAM_WIDGETS.items()}
+
+
+# Computed on the primary: it runs right after writes, which a replica may not have yet
+dashboard_stream = DashboardStream(
+    _snapshot,
+    SessionLocal,
+    debounce_seconds=settings.DASHBOARD_STREAM_DEBOUNCE_SECONDS,
+    keepalive_seconds=settings.DASHBOARD_STREAM_KEEPALIVE_SECONDS,
+    refresh_seconds=settings.DASHBOARD_STREAM_REFRESH_SECONDS,
+)
+on_appraisal_changed(dashboard_stream.notify)
+
+
+# Alcance de los tokens que aceptan /stream en la URL
+STREAM_TOKEN_SCOPE = "dashboard-stream"
+
+
+@router.post("/stream/token")
+async def dashboard_stream_token(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Token de corta duración para abrir /stream desde un EventSource del
+    navegador, que no puede enviar el encabezado Authorization. Solo sirve
+    para /stream y solo se valida al conectarse.
+    """
+    expires_in = settings.DASHBOARD_STREAM_TOKEN_SECONDS
+    token = create_access_token(
+        {"sub": current_user.email, "scope": STREAM_TOKEN_SCOPE},
+        expires_delta=timedelta(seconds=expires_in)
+    )
+    return {"token": token, "expires_in": expires_in}
+
+
+async def _stream_user(
+    token: Optional[str] = Query(None, description="Token de /dashboard/stream/token"),
+    bearer: Optional[str] = Depends(optional_oauth2_scheme)
+) -> User:
+    if token is not None:
+        return await get_user_for_token(token, scope=STREAM_TOKEN_SCOPE)
+    if bearer is not None:
+        return await get_user_for_token(bearer)
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Credenciales inválidas",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+@router.get("/stream")
+async def dashboard_stream_events(
+    current_user: User = Depends(_stream_user)
+):
+    """
+    Stream de eventos (text/event-stream) con los datos de summary, ventas-dia,
+    ventas-mes y carros-mas-avaluos. Envía un evento "dashboard" al conectarse
+    y otro cada vez que un alta, edición, eliminación o duplicado los cambia.
+    
+    Se autentica con el parámetro ``token`` (de /stream/token, para
+    EventSource) o con el encabezado Authorization (clientes basados en fetch).
+    """
+    return StreamingResponse(
+        dashboard_stream.events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
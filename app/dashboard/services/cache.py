@@ -0,0 +1,53 @@
+import logging
+from app.core.cache import CachePolicy, ResponseCache, build_backend
+from app.core.config import settings
+from app.database import ReplicaSessionLocal, SessionLocal
+from app.appraisals.events import on_appraisal_changed
+
+logger = logging.getLogger(__name__)
+
+# Freshness of each dashboard endpoint. Writes made through the API clear the
+# cache right away, so the TTL only bounds how long changes made elsewhere
+# (other instances with the in-process backend, manual fixes) take to show up.
+CACHE_POLICIES = {
+    "summary": CachePolicy(ttl=60, stale=300),
+    "compare": CachePolicy(ttl=300, stale=900),
+    "ventas-dia": CachePolicy(ttl=60, stale=300),
+    "ventas-mes": CachePolicy(ttl=300, stale=900),
+    "carros-mas-avaluos": CachePolicy(ttl=300, stale=900),
+}
+
+
+def _build_dashboard_cache() -> ResponseCache:
+    try:
+        backend = build_backend(settings.DASHBOARD_CACHE_URL, settings.DASHBOARD_CACHE_MAX_ENTRIES)
+    except ImportError:
+        logger.warning("redis package not installed, using the in-process dashboard cache")
+        backend = build_backend("memory://", settings.DASHBOARD_CACHE_MAX_ENTRIES)
+    # Stale entries are recomputed in the background from the read replica;
+    # right after a write, until the replica has caught up, from the primary
+    return ResponseCache(
+        backend, "dashboard",
+        session_factory=ReplicaSessionLocal,
+        primary_session_factory=SessionLocal,
+        settle_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+    )
+
+
+dashboard_cache = _build_dashboard_cache()
+
+
+def cached(name: str, key_parts, compute, db):
+    """Serve dashboard endpoint ``name`` from the cache with its CACHE_POLICIES entry."""
+    return dashboard_cache.fetch(name, key_parts, compute, db, CACHE_POLICIES[name])
+
+
+def recompute(name: str, key_parts, compute, db):
+    """Compute dashboard endpoint ``name`` with ``db`` (a primary session) and store it in the cache."""
+    return dashboard_cache.recompute(name, key_parts, compute, db, CACHE_POLICIES[name])
+
+
+@on_appraisal_changed
+def _invalidate_dashboard(action: str, vehicle_appraisal_id: int) -> None:
+    # Every write changes at least one day of the rollups the dashboard reads
+    dashboard_cache.invalidate()
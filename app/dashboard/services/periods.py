@@ -0,0 +1,160 @@
+"""
+Period-over-period aggregates over the dashboard rollups.
+
+Every window of a comparison is answered by the same statement: each metric
+is aggregated once per window with ``FILTER (WHERE day BETWEEN ...)`` while
+the scan itself is limited to the range covering all the windows, so the
+primary key on ``day`` bounds the work and the database is hit once.
+"""
+from datetime import date, timedelta
+from sqlalchemy import distinct, func, select, true
+from app.dashboard.models.daily_stats import AppraisalDailyStats, AppraisalDailyApplicants
+
+PERIODS = ("week", "month", "quarter", "year")
+
+_PERIOD_MONTHS = {"month": 1, "quarter": 3, "year": 12}
+
+# Metrics summed from appraisal_daily_stats
+SUM_METRICS = {
+    "total_avaluos": AppraisalDailyStats.appraisals_count,
+    "total_ingresos": AppraisalDailyStats.value_trochez_sum,
+    "total_ingresos_usd": AppraisalDailyStats.value_usd_sum,
+}
+# Distinct applicants come from appraisal_daily_applicants
+APPLICANTS_METRIC = "clientes_nuevos"
+METRICS = (*SUM_METRICS, APPLICANTS_METRIC)
+
+COUNT_METRICS = {"total_avaluos", APPLICANTS_METRIC}
+
+
+def period_start(period: str, day: date) -> date:
+    """First day of the week (Monday), month, quarter or year containing ``day``."""
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    if period == "quarter":
+        return date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+    if period == "year":
+        return date(day.year, 1, 1)
+    raise ValueError(f"Unknown period: {period}")
+
+
+def _next_period_start(period: str, start: date) -> date:
+    if period == "week":
+        return start + timedelta(days=7)
+    month = start.month - 1 + _PERIOD_MONTHS[period]
+    return date(start.year + month // 12, month % 12 + 1, 1)
+
+
+def period_bounds(period: str, day: date) -> tuple:
+    """Inclusive (start, end) of the period containing ``day``."""
+    start = period_start(period, day)
+    return start, _next_period_start(period, start) - timedelta(days=1)
+
+
+def period_windows(period: str, today: date = None) -> dict:
+    """
+    Windows of the period containing ``today`` and of the one before it.
+
+    Args:
+        period: One of PERIODS
+        today: Reference day (defaults to the current date)
+
+    Returns:
+        Dict {"current": (start, end), "previous": (start, end)}, inclusive
+    """
+    current = period_bounds(period, today or date.today())
+    return {
+        "current": current,
+        "previous": period_bounds(period, current[0] - timedelta(days=1)),
+    }
+
+
+def latest_nonempty_bucket(db, day_column, period: str, max_periods: int = 12, today: date = None, conditions=()):
+    """
+    Find the most recent period with rows, looking back at most ``max_periods``.
+
+    One query takes ``max(day_column)`` over the whole look-back range (a
+    range scan on the rollup primary key); the caller then aggregates the
+    returned bucket with a single grouped query.
+
+    Args:
+        db: Database session
+        day_column: Date column of the rollup table to probe
+        period: One of PERIODS
+        max_periods: Number of periods to look back, the current one included
+        today: Reference day (defaults to the current date)
+        conditions: Extra filters a row must match to count as data
+
+    Returns:
+        Inclusive (start, end) of the latest non-empty period, or None
+    """
+    start, end = period_bounds(period, today or date.today())
+    for _ in range(max_periods - 1):
+        start = period_start(period, start - timedelta(days=1))
+    latest = db.query(func.max(day_column)).filter(day_column.between(start, end), *conditions).scalar()
+    if latest is None:
+        return None
+    return period_bounds(period, latest)
+
+
+def comparison_query(windows: dict):
+    """
+    Build the single statement computing every metric for every window.
+
+    Args:
+        windows: Dict {label: (start, end)} of inclusive date windows
+
+    Returns:
+        Select returning one row with a ``{metric}__{label}`` column per pair
+    """
+    first = min(start for start, _ in windows.values())
+    last = max(end for _, end in windows.values())
+
+    day = AppraisalDailyStats.day
+    stats = select(*[
+        func.coalesce(func.sum(column).filter(day.between(start, end)), 0).label(f"{metric}__{label}")
+        for label, (start, end) in windows.items()
+        for metric, column in SUM_METRICS.items()
+    ]).where(day.between(first, last)).subquery("stats")
+
+    day = AppraisalDailyApplicants.day
+    applicants = select(*[
+        func.count(distinct(AppraisalDailyApplicants.applicant))
+        .filter(day.between(start, end))
+        .label(f"{APPLICANTS_METRIC}__{label}")
+        for label, (start, end) in windows.items()
+    ]).where(day.between(first, last)).subquery("applicants")
+
+    # Both subqueries return exactly one row
+    return select(stats, applicants).select_from(stats.join(applicants, true()))
+
+
+def compare(db, windows: dict) -> dict:
+    """
+    Compute the dashboard metrics for each window in one round-trip.
+
+    Args:
+        db: Database session
+        windows: Dict {label: (start, end)} of inclusive date windows
+
+    Returns:
+        Dict {label: {metric: value}}; counts are int and amounts float
+    """
+    row = db.execute(comparison_query(windows)).one()._mapping
+    result = {}
+    for label in windows:
+        values = {}
+        for metric in METRICS:
+            value = row[f"{metric}__{label}"] or 0
+            values[metric] = int(value) if metric in COUNT_METRICS else float(value)
+        result[label] = values
+    return result
+
+
+def variation(current, previous) -> str:
+    """Percent change from ``previous`` to ``current`` as shown in the dashboard ("+12%")."""
+    if not previous:
+        return "0%"
+    return f"{(current - previous) / previous * 100:+.0f}%"
@@ -0,0 +1,230 @@
+"""
+Maintenance of the dashboard rollup tables (app.dashboard.models.daily_stats).
+
+The write endpoints call ``refresh_days`` with the appraisal dates they touch,
+inside their own transaction, so the rollups commit together with the change.
+For backfills and audits:
+
+    python -m app.dashboard.services.rollups rebuild [--start 2024-01-01] [--end 2024-12-31]
+    python -m app.dashboard.services.rollups check [--start ...] [--end ...]
+"""
+import argparse
+import sys
+from datetime import date
+from sqlalchemy import and_, delete, func, insert, select, update
+from app.appraisals.models.appraisals import VehicleAppraisal
+from app.dashboard.models.daily_stats import AppraisalDailyStats, AppraisalDailyBrandStats, AppraisalDailyApplicants
+
+BRAND_KEY = func.coalesce(VehicleAppraisal.brand, "")
+
+
+def _live(*conditions):
+    """Filter for live appraisals with a date, plus extra conditions."""
+    return and_(
+        VehicleAppraisal.is_deleted == False,
+        VehicleAppraisal.appraisal_date.isnot(None),
+        *conditions
+    )
+
+
+def _date_range(column, start=None, end=None):
+    conditions = []
+    if start is not None:
+        conditions.append(column >= start)
+    if end is not None:
+        conditions.append(column <= end)
+    return conditions
+
+
+def _lock_day(db, day: date) -> None:
+    """
+    Make sure the day's stats row exists and lock it for this transaction.
+
+    Concurrent writers touching the same day queue here. Each statement that
+    follows sees their committed changes, so the last refresh always wins
+    with complete data.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as upsert
+    else:
+        if db.get(AppraisalDailyStats, day, with_for_update=True) is None:
+            db.execute(insert(AppraisalDailyStats).values(day=day, appraisals_count=0, value_usd_sum=0, value_trochez_sum=0))
+        return
+    statement = upsert(AppraisalDailyStats).values(day=day, appraisals_count=0, value_usd_sum=0, value_trochez_sum=0)
+    db.execute(statement.on_conflict_do_update(index_elements=["day"], set_={"day": statement.excluded.day}))
+
+
+def refresh_days(db, days) -> None:
+    """
+    Recompute the rollup rows of ``days`` from vehicle_appraisal.
+
+    Runs in the caller's transaction (flushing its pending changes first);
+    the caller commits.
+
+    Args:
+        db: Database session
+        days: Appraisal dates affected by a write; None values are ignored
+    """
+    days = sorted({day for day in days if day is not None})
+    if not days:
+        return
+    db.flush()
+    # Sorted days keep the lock order stable between concurrent writers
+    for day in days:
+        _lock_day(db, day)
+        count, usd_sum, trochez_sum = db.execute(
+            select(
+                func.count(),
+                func.coalesce(func.sum(VehicleAppraisal.appraisal_value_usd), 0),
+                func.coalesce(func.sum(VehicleAppraisal.appraisal_value_trochez), 0)
+            ).where(_live(VehicleAppraisal.appraisal_date == day))
+        ).one()
+
+        db.execute(delete(AppraisalDailyBrandStats).where(AppraisalDailyBrandStats.day == day))
+        db.execute(delete(AppraisalDailyApplicants).where(AppraisalDailyApplicants.day == day))
+        if not count:
+            db.execute(delete(AppraisalDailyStats).where(AppraisalDailyStats.day == day))
+            continue
+
+        db.execute(
+            update(AppraisalDailyStats).where(AppraisalDailyStats.day == day).values(
+                appraisals_count=count, value_usd_sum=usd_sum, value_trochez_sum=trochez_sum
+            )
+        )
+        _insert_groups(db, _live(VehicleAppraisal.appraisal_date == day))
+
+
+def _insert_groups(db, condition) -> None:
+    """Insert the brand and applicant rollup rows of the appraisals matching ``condition``."""
+    day = VehicleAppraisal.appraisal_date
+    db.execute(
+        insert(AppraisalDailyBrandStats).from_select(
+            ["day", "brand", "appraisals_count"],
+            select(day, BRAND_KEY, func.count()).where(condition).group_by(day, BRAND_KEY)
+        )
+    )
+    db.execute(
+        insert(AppraisalDailyApplicants).from_select(
+            ["day", "applicant", "appraisals_count"],
+            select(day, VehicleAppraisal.applicant, func.count()).where(
+                condition, VehicleAppraisal.applicant.isnot(None)
+            ).group_by(day, VehicleAppraisal.applicant)
+        )
+    )
+
+
+def rebuild(db, start: date = None, end: date = None) -> int:
+    """
+    Rebuild the rollups of a date range (everything by default) from scratch.
+
+    Returns:
+        Number of days with appraisals in the range
+    """
+    for model in (AppraisalDailyStats, AppraisalDailyBrandStats, AppraisalDailyApplicants):
+        db.execute(delete(model).where(*_date_range(model.day, start, end)))
+
+    condition = _live(*_date_range(VehicleAppraisal.appraisal_date, start, end))
+    day = VehicleAppraisal.appraisal_date
+    result = db.execute(
+        insert(AppraisalDailyStats).from_select(
+            ["day", "appraisals_count", "value_usd_sum", "value_trochez_sum"],
+            select(
+                day,
+                func.count(),
+                func.coalesce(func.sum(VehicleAppraisal.appraisal_value_usd), 0),
+                func.coalesce(func.sum(VehicleAppraisal.appraisal_value_trochez), 0)
+            ).where(condition).group_by(day)
+        )
+    )
+    _insert_groups(db, condition)
+    return result.rowcount
+
+
+def check(db, start: date = None, end: date = None) -> list:
+    """
+    Compare the rollups with aggregates computed from vehicle_appraisal.
+
+    Returns:
+        List of mismatches as dicts (table, key, expected, actual); empty when consistent
+    """
+    condition = _live(*_date_range(VehicleAppraisal.appraisal_date, start, end))
+    day = VehicleAppraisal.appraisal_date
+    comparisons = [
+        (
+            AppraisalDailyStats.__tablename__,
+            select(
+                day, func.count(),
+                func.coalesce(func.sum(VehicleAppraisal.appraisal_value_usd), 0),
+                func.coalesce(func.sum(VehicleAppraisal.appraisal_value_trochez), 0)
+            ).where(condition).group_by(day),
+            select(
+                AppraisalDailyStats.day, AppraisalDailyStats.appraisals_count,
+                AppraisalDailyStats.value_usd_sum, AppraisalDailyStats.value_trochez_sum
+            ).where(*_date_range(AppraisalDailyStats.day, start, end)),
+        ),
+        (
+            AppraisalDailyBrandStats.__tablename__,
+            select(day, BRAND_KEY, func.count()).where(condition).group_by(day, BRAND_KEY),
+            select(
+                AppraisalDailyBrandStats.day, AppraisalDailyBrandStats.brand, AppraisalDailyBrandStats.appraisals_count
+            ).where(*_date_range(AppraisalDailyBrandStats.day, start, end)),
+        ),
+        (
+            AppraisalDailyApplicants.__tablename__,
+            select(day, VehicleAppraisal.applicant, func.count()).where(
+                condition, VehicleAppraisal.applicant.isnot(None)
+            ).group_by(day, VehicleAppraisal.applicant),
+            select(
+                AppraisalDailyApplicants.day, AppraisalDailyApplicants.applicant, AppraisalDailyApplicants.appraisals_count
+            ).where(*_date_range(AppraisalDailyApplicants.day, start, end)),
+        ),
+    ]
+
+    mismatches = []
+    for table, expected_query, actual_query in comparisons:
+        key_size = 1 if table == AppraisalDailyStats.__tablename__ else 2
+        expected = {tuple(row[:key_size]): tuple(row[key_size:]) for row in db.execute(expected_query)}
+        actual = {tuple(row[:key_size]): tuple(row[key_size:]) for row in db.execute(actual_query)}
+        for key in sorted(expected.keys() | actual.keys(), key=str):
+            if _normalize(expected.get(key)) != _normalize(actual.get(key)):
+                mismatches.append({"table": table, "key": key, "expected": expected.get(key), "actual": actual.get(key)})
+    return mismatches
+
+
+def _normalize(values):
+    # Sums come back as Decimal, int or float depending on the database
+    return None if values is None else tuple(round(float(value), 2) for value in values)
+
+
+def main():
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Dashboard rollup maintenance")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="Last day (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            days = rebuild(db, args.start, args.end)
+            db.commit()
+            print(f"Rebuilt rollups for {days} days")
+            return
+        mismatches = check(db, args.start, args.end)
+        for mismatch in mismatches[:20]:
+            print(f"{mismatch['table']} {mismatch['key']}: expected {mismatch['expected']}, found {mismatch['actual']}")
+        if mismatches:
+            print(f"{len(mismatches)} mismatches; run 'rebuild' for the affected range")
+            sys.exit(1)
+        print("Rollups are consistent with vehicle_appraisal")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardStream:
+    """
+    Fan-out of dashboard snapshots to server-sent events subscribers.
+
+    Appraisal writes call ``notify`` (from any thread). Writes arriving within
+    ``debounce_seconds`` of each other are coalesced into one recomputation,
+    whose result is pushed to every subscriber; nothing is computed while
+    nobody is subscribed. Every ``refresh_seconds`` the snapshot is recomputed
+    anyway, to pick up changes made by other instances and the change of day,
+    and pushed only if it differs from the last one.
+
+    Each subscriber has a queue holding only the latest snapshot, so a slow
+    client skips intermediate versions instead of buffering them.
+    """
+
+    def __init__(self, compute, session_factory, debounce_seconds: float = 2.0,
+                 keepalive_seconds: float = 15, refresh_seconds: float = 300):
+        self.compute = compute
+        self.session_factory = session_factory
+        self.debounce_seconds = debounce_seconds
+        self.keepalive_seconds = keepalive_seconds
+        self.refresh_seconds = refresh_seconds
+        self._subscribers = set()
+        self._loop = None
+        self._pending = None
+        self._refresher = None
+        self._dirty = False
+        self._latest = None
+        self._publish_lock = None
+
+    async def start(self) -> None:
+        """Bind the stream to the running event loop. Called from the app lifespan."""
+        self._loop = asyncio.get_running_loop()
+        self._publish_lock = asyncio.Lock()
+        if self.refresh_seconds > 0:
+            self._refresher = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        """Cancel the background tasks and end every open stream."""
+        for task in (self._pending, self._refresher):
+            if task is not None:
+                task.cancel()
+        for queue in list(self._subscribers):
+            self._offer(queue, None)
+        self._loop = None
+
+    def notify(self, action: str = None, vehicle_appraisal_id: int = None) -> None:
+        """Schedule a recomputation. Safe to call from any thread, e.g. a write endpoint."""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._schedule)
+        except RuntimeError:
+            # Event loop already closed (shutdown)
+            pass
+
+    def _schedule(self) -> None:
+        self._dirty = True
+        if not self._subscribers:
+            # Recomputed when the next client subscribes
+            self._latest = None
+            return
+        if self._pending is None or self._pending.done():
+            self._pending = asyncio.create_task(self._drain())
+
+    async def _drain(self) -> None:
+        # Writes made during the computation trigger another round
+        while self._dirty:
+            await asyncio.sleep(self.debounce_seconds)
+            self._dirty = False
+            try:
+                await self._publish()
+            except Exception as e:
+                logger.error(f"Error computing the dashboard stream snapshot: {e}")
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            if not self._subscribers:
+                continue
+            try:
+                await self._publish()
+            except Exception as e:
+                logger.error(f"Error refreshing the dashboard stream snapshot: {e}")
+
+    def _compute(self) -> str:
+        with self.session_factory() as db:
+            return json.dumps(self.compute(db), default=str)
+
+    async def _publish(self, only_if_missing: bool = False) -> None:
+        """Compute the snapshot once and push it to every subscriber if it changed."""
+        async with self._publish_lock:
+            if only_if_missing and self._latest is not None:
+                return
+            data = await asyncio.to_thread(self._compute)
+            if data == self._latest:
+                return
+            self._latest = data
+            for queue in list(self._subscribers):
+                self._offer(queue, data)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, data) -> None:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(data)
+
+    async def subscribe(self) -> asyncio.Queue:
+        """Register a subscriber; its queue starts with the current snapshot."""
+        queue = asyncio.Queue(maxsize=1)
+        self._subscribers.add(queue)
+        if self._latest is None:
+            try:
+                await self._publish(only_if_missing=True)
+            except Exception as e:
+                # The client gets the next snapshot that can be computed
+                logger.error(f"Error computing the dashboard stream snapshot: {e}")
+        if queue.empty() and self._latest is not None:
+            queue.put_nowait(self._latest)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    async def events(self):
+        """
+        Server-sent events for one client: a ``dashboard`` event per snapshot
+        and a comment every ``keepalive_seconds`` to keep proxies from closing
+        the connection.
+        """
+        queue = await self.subscribe()
+        try:
+            # Reconnection delay for the browser, in milliseconds
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if data is None:
+                    break
+                yield f"event: dashboard\ndata: {data}\n\n"
+        finally:
+            self.unsubscribe(queue)
@@ -1,8 +1,16 @@
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, inspect, MetaData
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from app.core.config import settings
+from app.core.db_pool import async_url, engine_options, instrument_engine
+from app.core.read_routing import client_key, write_tracker
+from fastapi import Request
+import logging
 import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
 
 # Create metadata object
 metadata = MetaData()
@@ -15,19 +23,45 @@ if not DB_URL:
     # Construct the database URL for PostgreSQL with explicit SSL parameters
     DB_URL = f"postgresql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
 
-# Create the engine with modified configuration
+# Create the engine; pool sizing, pre-ping and statement timeout come from settings (DB_POOL_*)
 engine = create_engine(
     DB_URL,
     # Remove SSL parameters from here as they're in the URL
     echo=False,  # Set to False in production
-    pool_pre_ping=True,
-    pool_recycle=300,
-    # Add connect_args only if needed for local development
-    # connect_args={"sslmode": "prefer"}
+    **engine_options(DB_URL)
 )
+instrument_engine(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Asyncio engine over the same database (asyncpg), for the async routers.
+# The sync engine above stays for scripts, migrations and sync endpoints.
+ASYNC_DB_URL = async_url(DB_URL)
+async_engine = create_async_engine(
+    ASYNC_DB_URL,
+    echo=False,
+    **engine_options(ASYNC_DB_URL)
+)
+instrument_engine(async_engine.sync_engine)
+
+# expire_on_commit=False: objects stay readable after commit without lazy
+# loads, which are not allowed on an AsyncSession
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Read replica engines; without DB_REPLICA_URL they are the primary engines
+if settings.DB_REPLICA_URL:
+    replica_engine = create_engine(settings.DB_REPLICA_URL, echo=False, **engine_options(settings.DB_REPLICA_URL))
+    instrument_engine(replica_engine)
+    ASYNC_REPLICA_URL = async_url(settings.DB_REPLICA_URL)
+    async_replica_engine = create_async_engine(ASYNC_REPLICA_URL, echo=False, **engine_options(ASYNC_REPLICA_URL))
+    instrument_engine(async_replica_engine.sync_engine)
+else:
+    replica_engine = engine
+    async_replica_engine = async_engine
+
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+AsyncReplicaSessionLocal = async_sessionmaker(async_replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base(metadata=metadata)
 
 # Dependency to get DB session
@@ -38,19 +72,101 @@ def get_db():
     finally:
         db.close()
 
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _reads_from_primary(request: Request) -> bool:
+    """Whether a read-only request must use the primary (no replica, or a recent write by the same client)."""
+    return replica_engine is engine or write_tracker.recently_wrote(
+        client_key(request.headers.get("authorization"))
+    )
+
+# Dependency to get a read-only DB session: replica, or primary right after the client's own write
+def get_read_db(request: Request):
+    db = SessionLocal() if _reads_from_primary(request) else ReplicaSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Async session factory for a read-only request (same routing as get_read_db)
+def async_read_session_factory(request: Request):
+    return AsyncSessionLocal if _reads_from_primary(request) else AsyncReplicaSessionLocal
+
+# Async variant of get_read_db
+async def get_async_read_db(request: Request):
+    async with async_read_session_factory(request)() as db:
+        yield db
+
+# Tables created by alembic/versions/0001_baseline.py
+BASELINE_TABLES = ("user_types", "users", "vehicle_appraisal", "appraisal_deductions")
+
+# Apply the Alembic migrations (deploy release command and DB_SCHEMA_MODE=migrate)
+def upgrade_schema(configure_logger: bool = True):
+    """
+    Run ``alembic upgrade head``.
+    
+    A database created before migrations were introduced has the baseline
+    tables but no alembic_version table: it is stamped with 0001_baseline
+    first, so the baseline does not try to create tables that exist.
+    
+    Raises:
+        RuntimeError: If only some of the baseline tables exist
+    """
+    from alembic import command
+    from alembic.config import Config
+    
+    root = Path(__file__).resolve().parent.parent
+    config = Config(str(root / "alembic.ini"))
+    config.set_main_option("script_location", str(root / "alembic"))
+    config.attributes["configure_logger"] = configure_logger
+    
+    tables = set(inspect(engine).get_table_names())
+    if "alembic_version" not in tables:
+        existing = [table for table in BASELINE_TABLES if table in tables]
+        if len(existing) == len(BASELINE_TABLES):
+            logger.info("Existing schema without alembic_version, stamping it as 0001_baseline")
+            command.stamp(config, "0001_baseline")
+        elif existing:
+            missing = [table for table in BASELINE_TABLES if table not in tables]
+            raise RuntimeError(
+                f"Database has tables {existing} but not {missing} and no alembic_version; "
+                "fix the schema and stamp it by hand"
+            )
+    command.upgrade(config, "head")
+
 # Initialize database function
-def init_db():
+def init_db(mode: str = None):
     """
-    Initialize the database by creating all tables.
+    Prepare the database schema according to DB_SCHEMA_MODE.
     This function should be called when the application starts.
+
+    Args:
+        mode: "none" skips schema handling (the default: migrations run as a
+            separate deploy step, so booting does not touch the schema),
+            "migrate" runs ``alembic upgrade head`` and "create_all" creates
+            missing tables from the models
     """
+    mode = mode or settings.DB_SCHEMA_MODE
+    if mode == "none":
+        return
+    
+    if mode == "migrate":
+        upgrade_schema(configure_logger=False)
+        return
+    
+    if mode != "create_all":
+        raise ValueError(f"Unknown DB_SCHEMA_MODE: {mode}")
+    
     # Import all models here to ensure they are registered with the Base metadata
     from app.security.models.users import User
     from app.security.models.user_types import UserType
     # Import appraisal models
     from app.appraisals.models.appraisals import VehicleAppraisal, AppraisalDeductions
+    # Import dashboard rollup models
+    from app.dashboard.models.daily_stats import AppraisalDailyStats, AppraisalDailyBrandStats, AppraisalDailyApplicants
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
-    
-    return Base.metadata.create_all
\ No newline at end of file
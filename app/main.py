@@ -1,31 +1,54 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import init_db
+from app.database import init_db, engine, async_engine, replica_engine, async_replica_engine
+from app.core.read_routing import ReadYourWritesMiddleware
+from app.core.db_pool import pool_metrics
+from app.security.utils import get_current_user
+from app.security.models.users import User
 from app.core.config import settings
 from contextlib import asynccontextmanager
+import asyncio
 
 # Import the certificate router
 from app.certs.certificate_routes import router as certificate_router
 
 # Importar los routers
 from app.security.routers import user_types_router, users_router, signin_router
-from app.dashboard.routers.dashboard import router as dashboard_router
+from app.dashboard.routers.dashboard import router as dashboard_router, dashboard_stream
+from app.dashboard.services.cache import dashboard_cache
 from app.appraisals import appraisals_router
 from fastapi.staticfiles import StaticFiles
 import os
 
 # Import scheduler
 from app.scheduler import start_scheduler, shutdown_scheduler
+from app.certs.render_pool import render_pool
+from app.certs.certificate_jobs import certificate_jobs
+from app.certs.certificate_service import warm_up_certificates
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle startup and shutdown events."""
     # Startup
+    # Schema per DB_SCHEMA_MODE; by default nothing, migrations run on deploy
     init_db()
     start_scheduler()
+    # Certificate assets, service and render workers are prepared in the
+    # background so the server accepts requests without waiting for them
+    certificate_warm_up = asyncio.create_task(warm_up_certificates())
+    await certificate_jobs.start()
+    await dashboard_stream.start()
     yield
     # Shutdown
+    certificate_warm_up.cancel()
+    await dashboard_stream.stop()
+    await certificate_jobs.stop()
+    render_pool.shutdown()
+    dashboard_cache.shutdown()
     shutdown_scheduler()
+    await async_engine.dispose()
+    if async_replica_engine is not async_engine:
+        await async_replica_engine.dispose()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -41,6 +64,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Reads of a client that just wrote go to the primary instead of the replica
+app.add_middleware(ReadYourWritesMiddleware)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -53,6 +78,23 @@ app.include_router(dashboard_router, prefix=f"{settings.API_V1_STR}/dashboard",
 # Include the certificate routes
 app.include_router(certificate_router)
 
+@app.get(f"{settings.API_V1_STR}/metrics/database", tags=["metrics"])
+def database_metrics(current_user: User = Depends(get_current_user)):
+    """Connection pool occupancy, checkout counters and checkout latency histogram of every engine."""
+    metrics = {
+        "sync": pool_metrics(engine),
+        "async": pool_metrics(async_engine.sync_engine)
+    }
+    if replica_engine is not engine:
+        metrics["replica_sync"] = pool_metrics(replica_engine)
+        metrics["replica_async"] = pool_metrics(async_replica_engine.sync_engine)
+    return metrics
+
+@app.get(f"{settings.API_V1_STR}/metrics/cache", tags=["metrics"])
+def cache_metrics(current_user: User = Depends(get_current_user)):
+    """Hit, stale hit and miss counters and hit rates of the dashboard response cache."""
+    return {"dashboard": dashboard_cache.metrics()}
+
 @app.get("/")
 def read_root():
     return {"message": "Bienvenido a la API de Trochez"}
@@ -1,6 +1,8 @@
+from datetime import datetime
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
-from app.certs.certificate_service import CertificateService
+from apscheduler.triggers.interval import IntervalTrigger
+from app.core.config import settings
+from app.certs.pdf_cache import certificate_cache
 import logging
 
 # Configure logging
@@ -10,28 +12,36 @@ logger = logging.getLogger(__name__)
 # Create scheduler instance
 scheduler = AsyncIOScheduler()
 
-def clean_pdfs_job():
-    """Job to clean PDF files from temp directory."""
+def certificate_janitor_job():
+    """
+    Job to keep the certificate temp directory within its size and age limits.
+    Being a plain function, the scheduler runs it in a worker thread, off the event loop.
+    """
     try:
-        certificate_service = CertificateService()
-        certificate_service.clean_old_pdfs()
-        logger.info("Daily PDF cleanup completed successfully")
+        metrics = certificate_cache.sweep()
+        logger.debug(f"Certificate cache sweep completed: {metrics}")
     except Exception as e:
-        logger.error(f"Error during PDF cleanup: {e}")
+        logger.error(f"Error during certificate cache sweep: {e}")
 
 def start_scheduler():
     """Start the scheduler with all scheduled jobs."""
-    # Schedule PDF cleanup at midnight (00:00) every day
+    # Sweep the certificate cache continuously instead of wiping it at midnight
     scheduler.add_job(
-        clean_pdfs_job,
-        trigger=CronTrigger(hour=0, minute=0),
-        id='clean_pdfs_daily',
-        name='Clean PDF files daily at midnight',
-        replace_existing=True
+        certificate_janitor_job,
+        trigger=IntervalTrigger(seconds=settings.CERT_JANITOR_INTERVAL_SECONDS),
+        id='certificate_janitor',
+        name='Enforce certificate cache size and age limits',
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+        next_run_time=datetime.now(),  # first sweep right away to measure current usage
     )
     
     scheduler.start()
-    logger.info("Scheduler started - PDF cleanup scheduled for midnight daily")
+    logger.info(
+        f"Scheduler started - certificate cache janitor runs every "
+        f"{settings.CERT_JANITOR_INTERVAL_SECONDS} seconds"
+    )
 
 def shutdown_scheduler():
     """Shutdown the scheduler gracefully."""
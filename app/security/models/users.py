@@ -9,7 +9,7 @@ class User(Base):
     user_type_id = Column(Integer, ForeignKey("user_types.user_type_id"), nullable=False)
     name = Column(String(100), nullable=False)
     password = Column(String(100), nullable=False)
-    email = Column(String(45), nullable=False)
+    email = Column(String(45), nullable=False, index=True)
     profile_picture_url = Column(String(150), nullable=True)
     change_pass = Column(Boolean, nullable=True)
     is_active = Column(Boolean, nullable=False, default=True)
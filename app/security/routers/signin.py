@@ -1,8 +1,10 @@
+import asyncio
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.security.models.users import User
 from app.security.schemas.signin import SignInRequest, Token
 from app.security.utils import verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
@@ -12,14 +14,16 @@ router = APIRouter()
 @router.post("/token", response_model=Token)
 async def login_oauth(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Endpoint para iniciar sesión usando OAuth2 password flow.
     Acepta form-data con username y password.
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password):
+    result = await db.execute(select(User).where(User.email == form_data.username))
+    user = result.scalars().first()
+    # bcrypt is CPU bound; verify off the event loop
+    if not user or not await asyncio.to_thread(verify_password, form_data.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Correo o contraseña incorrectos",
@@ -52,14 +56,16 @@ async def login_oauth(
 @router.post("/signin", response_model=Token)
 async def login_json(
     credentials: SignInRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Endpoint para iniciar sesión usando JSON.
     Acepta un objeto JSON con email y password.
     """
-    user = db.query(User).filter(User.email == credentials.email).first()
-    if not user or not verify_password(credentials.password, user.password):
+    result = await db.execute(select(User).where(User.email == credentials.email))
+    user = result.scalars().first()
+    # bcrypt is CPU bound; verify off the event loop
+    if not user or not await asyncio.to_thread(verify_password, credentials.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Correo o contraseña incorrectos",
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.database import get_db
+from app.database import get_async_db
 from app.security.models.users import User
 from app.security.models.user_types import UserType
 from app.security.schemas.users import UserCreate, UserUpdate, UserInDB
@@ -13,7 +15,7 @@ router = APIRouter()
 @router.post("/", response_model=UserInDB, status_code=status.HTTP_201_CREATED)
 async def create_user(
     user: UserCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user) # Assuming authentication is required
 ):
     """
@@ -22,7 +24,9 @@ async def create_user(
     """
     # Verificar si el tipo de usuario existe
     # Corrected line: Use UserType.user_type_id instead of UserType.id
-    user_type = db.query(UserType).filter(UserType.user_type_id == user.user_type_id).first()
+    user_type = (await db.execute(
+        select(UserType).where(UserType.user_type_id == user.user_type_id)
+    )).scalars().first()
     if not user_type:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -30,14 +34,15 @@ async def create_user(
         )
     
     # Verificar si el correo ya está registrado
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = (await db.execute(select(User).where(User.email == user.email))).scalars().first()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="El correo ya está registrado"
         )
     
-    hashed_password = get_password_hash(user.password)
+    # bcrypt is CPU bound; hash off the event loop
+    hashed_password = await asyncio.to_thread(get_password_hash, user.password)
     
     # Corrected lines:
     # 1. Use the correct attribute from the UserCreate schema (likely user.name)
@@ -52,22 +57,23 @@ async def create_user(
         # Add other fields if necessary, ensuring they match the User model definition
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.get("/", response_model=List[UserInDB])
 async def read_users(
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Obtener lista de usuarios.
     Solo usuarios autenticados pueden ver la lista.
     """
-    return db.query(User).offset(skip).limit(limit).all()
+    result = await db.execute(select(User).offset(skip).limit(limit))
+    return result.scalars().all()
 
 @router.get("/me", response_model=UserInDB)
 async def read_user_me(current_user: User = Depends(get_current_user)):
@@ -79,14 +85,14 @@ async def read_user_me(current_user: User = Depends(get_current_user)):
 @router.get("/{user_id}", response_model=UserInDB)
 async def read_user(
     user_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Obtener un usuario específico por ID.
     Solo usuarios autenticados pueden ver otros usuarios.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = (await db.execute(select(User).where(User.user_id == user_id))).scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
@@ -98,14 +104,14 @@ async def read_user(
 async def update_user(
     user_id: int, 
     user: UserUpdate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Actualizar un usuario.
     Solo usuarios autenticados pueden actualizar usuarios.
     """
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = (await db.execute(select(User).where(User.user_id == user_id))).scalars().first()
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
@@ -114,7 +120,9 @@ async def update_user(
     
     # Si se está actualizando el tipo de usuario, verificar que exista
     if user.user_type_id is not None:
-        user_type = db.query(UserType).filter(UserType.id == user.user_type_id).first()
+        user_type = (await db.execute(
+            select(UserType).where(UserType.user_type_id == user.user_type_id)
+        )).scalars().first()
         if not user_type:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -123,31 +131,32 @@ async def update_user(
     
     update_data = user.model_dump(exclude_unset=True)
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        # The model column is "password"; it holds the hash
+        update_data["password"] = await asyncio.to_thread(get_password_hash, update_data.pop("password"))
     
     for key, value in update_data.items():
         setattr(db_user, key, value)
     
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Eliminar un usuario.
     Solo usuarios autenticados pueden eliminar usuarios.
     """
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = (await db.execute(select(User).where(User.user_id == user_id))).scalars().first()
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="Usuario no encontrado"
         )
-    db.delete(db_user)
-    db.commit()
+    await db.delete(db_user)
+    await db.commit()
     return None
\ No newline at end of file
@@ -13,6 +13,7 @@ class UserCreate(UserBase):
     password: str = Field(..., min_length=8, max_length=100)
 
 class UserUpdate(BaseModel):
+    user_type_id: Optional[int] = None
     name: Optional[str] = Field(None, max_length=100)
     email: Optional[EmailStr] = None
     password: Optional[str] = Field(None, min_length=8, max_length=100)
@@ -4,8 +4,8 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from app.database import AsyncSessionLocal
 from app.security.models.users import User
 import os
 from dotenv import load_dotenv
@@ -23,6 +23,8 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # OAuth2 scheme para obtener el token del header
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/security/token")
+# Igual, pero sin responder 401 cuando falta el encabezado
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/security/token", auto_error=False)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica si la contraseña en texto plano coincide con el hash."""
@@ -43,14 +45,24 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     """
     Obtiene el usuario actual basado en el token JWT.
     Se usa como dependencia en las rutas protegidas.
     """
+    return await get_user_for_token(token)
+
+async def get_user_for_token(token: str, scope: Optional[str] = None) -> User:
+    """
+    Valida un token JWT y obtiene su usuario.
+    
+    Los tokens de alcance limitado (claim "scope", p. ej. los del stream del
+    dashboard) solo valen para ese alcance, y los de acceso normales no valen
+    para ninguno.
+    
+    Usa su propia sesión, cerrada al terminar la consulta, para no retener
+    una segunda conexión del pool durante toda la petición.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciales inválidas",
@@ -61,13 +73,15 @@ async def get_current_user(
         # Decodificar el token
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or payload.get("scope") != scope:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
     # Buscar el usuario en la base de datos
-    user = db.query(User).filter(User.email == email).first()
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).where(User.email == email))
+        user = result.scalars().first()
     if user is None:
         raise credentials_exception
     if not user.is_active:
@@ -0,0 +1,125 @@
+"""
+Page fetch cost of the appraisal listing against a seeded SQLite database.
+
+Compares the previous joinedload page, the full view (selectinload) and the
+slim list view on a table of --rows appraisals (three deductions each), at
+the first page and at a deep page.
+
+Usage:
+    python -m benchmarks.bench_appraisal_list [--rows 100000] [--limit 50] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, joinedload
+
+from app.database import Base
+from app.appraisals.models.appraisals import VehicleAppraisal, AppraisalDeductions
+from app.appraisals.services.listing import VIEW_FULL, VIEW_LIST, listing_options, list_items
+from app.appraisals.services.pagination import paginate
+
+BRANDS = ["TOYOTA", "HONDA", "NISSAN", "HYUNDAI", "KIA", "MAZDA", "FORD", "CHEVROLET"]
+
+
+def seed(engine, rows: int, seed_value: int) -> None:
+    rng = random.Random(seed_value)
+    Base.metadata.create_all(engine, tables=[VehicleAppraisal.__table__, AppraisalDeductions.__table__])
+    start_date = date(2015, 1, 1)
+    appraisals = []
+    deductions = []
+    for appraisal_id in range(1, rows + 1):
+        appraisals.append({
+            "vehicle_appraisal_id": appraisal_id,
+            "appraisal_date": start_date + timedelta(days=rng.randint(0, 3650)),
+            "vehicle_description": f"SEDAN {rng.randint(1, 999)}",
+            "brand": rng.choice(BRANDS),
+            "model_year": rng.randint(1995, 2025),
+            "color": "BLANCO",
+            "mileage": rng.randint(0, 300000),
+            "plate_number": f"P{appraisal_id:07d}",
+            "applicant": f"SOLICITANTE {rng.randint(1, 5000)}",
+            "owner": f"PROPIETARIO {rng.randint(1, 5000)}",
+            "appraisal_value_usd": Decimal(rng.randint(2000, 60000)),
+            "appraisal_value_trochez": Decimal(rng.randint(50000, 1500000)),
+            "vin": f"VIN{appraisal_id:014d}",
+            "engine_number": f"E{appraisal_id:09d}",
+            "notes": "Observaciones del avalúo. " * 20,
+            "extras": "Aros de lujo, sistema de sonido, polarizado. " * 10,
+            "cert": appraisal_id,
+            "is_deleted": False,
+        })
+        for _ in range(3):
+            deductions.append({
+                "vehicle_appraisal_id": appraisal_id,
+                "description": "Llantas desgastadas",
+                "amount": Decimal(rng.randint(100, 5000)),
+            })
+    with engine.begin() as connection:
+        for offset in range(0, rows, 10000):
+            connection.execute(insert(VehicleAppraisal), appraisals[offset:offset + 10000])
+        for offset in range(0, len(deductions), 30000):
+            connection.execute(insert(AppraisalDeductions), deductions[offset:offset + 30000])
+
+
+def timed(label: str, repeat: int, fetch) -> None:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fetch()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"{label:32s} median {timings[len(timings) // 2] * 1000:8.2f} ms   min {timings[0] * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Appraisal list page benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        start = time.perf_counter()
+        seed(engine, args.rows, args.seed)
+        print(f"Seeded {args.rows:,} appraisals in {time.perf_counter() - start:.1f}s\n")
+
+        deep_page = args.rows // args.limit // 2
+        for page in (1, deep_page):
+            print(f"page {page} (limit {args.limit}, count=none)")
+            with Session(engine) as db:
+                base = db.query(VehicleAppraisal).filter(VehicleAppraisal.is_deleted == False)
+
+                def joined():
+                    db.expunge_all()
+                    rows, _ = paginate(db, base, page, args.limit, count_mode="none",
+                                       options=[joinedload(VehicleAppraisal.deductions)])
+                    [appraisal.deductions for appraisal in rows]
+
+                def full():
+                    db.expunge_all()
+                    rows, _ = paginate(db, base, page, args.limit, count_mode="none",
+                                       options=listing_options(VIEW_FULL))
+                    [appraisal.deductions for appraisal in rows]
+
+                def slim():
+                    db.expunge_all()
+                    rows, _ = paginate(db, base, page, args.limit, count_mode="none",
+                                       options=listing_options(VIEW_LIST))
+                    list_items(db, rows)
+
+                timed("  joinedload (before)", args.repeat, joined)
+                timed("  view=full (selectinload)", args.repeat, full)
+                timed("  view=list", args.repeat, slim)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Latency of the appraisal list query under 50 concurrent clients, comparing
+database access patterns inside one event loop.
+
+- async-def + sync Session: the previous routers, blocking the event loop
+- def + sync Session: FastAPI runs the endpoint in its threadpool
+- async-def + AsyncSession: asyncpg through get_async_db (current routers)
+
+Each variant runs the same query as GET /api/appraisals/ (first page, exact
+count) against the configured database (DATABASE_URL or the DB_* settings),
+served in-process through httpx's ASGI transport. Both engines use the
+DB_POOL_* settings, so raise DB_POOL_SIZE to compare without pool waits.
+
+Usage:
+    python -m benchmarks.bench_async_load [--clients 50] [--requests 20] [--limit 10]
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database import async_engine, engine, get_async_db, get_db
+from app.appraisals.routers.appraisals import _list_page
+
+
+def build_app(limit: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/async-def-sync-session")
+    async def blocking(db: Session = Depends(get_db)):
+        rows, pagination = _list_page(db, 1, limit, None, "exact", "full")
+        return {"rows": len(rows), "total": pagination["total_count"]}
+
+    @app.get("/def-sync-session")
+    def threadpool(db: Session = Depends(get_db)):
+        rows, pagination = _list_page(db, 1, limit, None, "exact", "full")
+        return {"rows": len(rows), "total": pagination["total_count"]}
+
+    @app.get("/async-def-async-session")
+    async def non_blocking(db: AsyncSession = Depends(get_async_db)):
+        rows, pagination = await db.run_sync(_list_page, 1, limit, None, "exact", "full")
+        return {"rows": len(rows), "total": pagination["total_count"]}
+
+    return app
+
+
+async def run_variant(client: httpx.AsyncClient, path: str, clients: int, requests: int):
+    latencies = []
+
+    async def worker():
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p99": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000,
+        "rps": len(latencies) / elapsed,
+    }
+
+
+async def main_async(args):
+    app = build_app(args.limit)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        print(f"{args.clients} clients x {args.requests} requests, limit {args.limit}\n")
+        for path in ("/async-def-sync-session", "/def-sync-session", "/async-def-async-session"):
+            # Warm up the pools before measuring
+            await run_variant(client, path, min(args.clients, 5), 2)
+            result = await run_variant(client, path, args.clients, args.requests)
+            print(f"{path:26s} p50 {result['p50']:8.1f} ms   p99 {result['p99']:8.1f} ms   {result['rps']:8.1f} req/s")
+    await async_engine.dispose()
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async database access under concurrent load")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Compare certificate PDF size and render time with the original logo versus the
+optimized derivatives produced by app.certs.assets.
+
+Usage:
+    python -m benchmarks.bench_certificate_assets [--runs 5]
+
+Needs the same environment as the API (WeasyPrint, Pillow and the .env values
+read by app.core.config), but no database: a sample appraisal is built in memory.
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+from app.certs.assets import prepare_certificate_assets
+from app.certs.certificate_service import CertificateService
+
+
+def sample_appraisal():
+    return SimpleNamespace(
+        vehicle_appraisal_id=999999,
+        appraisal_date=date.today(),
+        vehicle_description="SEDAN 4 PUERTAS AUTOMATICO",
+        brand="TOYOTA",
+        model_year=2021,
+        color="BLANCO",
+        mileage=45210,
+        fuel_type="GASOLINA",
+        engine_size=Decimal("1.8"),
+        plate_number="BCD123",
+        applicant="BANCO NACIONAL",
+        owner="JUAN PEREZ",
+        appraisal_value_usd=Decimal("18500.00"),
+        appraisal_value_trochez=Decimal("150.00"),
+        apprasail_value_lower_cost=Decimal("17000.00"),
+        apprasail_value_bank=Decimal("16000.00"),
+        apprasail_value_lower_bank=Decimal("9850000.00"),
+        vin="JTDBR32E720012345",
+        engine_number="2ZR1234567",
+        notes="SIN OBSERVACIONES",
+        validity_days=30,
+        validity_kms=1000,
+        extras="AROS DE LUJO",
+        vin_card="JTDBR32E720012345",
+        engine_number_card="2ZR1234567",
+        modified_km=None,
+        extra_value=None,
+        discounts=None,
+        bank_value_in_dollars=Decimal("15000.00"),
+        referencia_original=None,
+        cert=1234,
+    )
+
+
+def sample_deductions():
+    return [
+        SimpleNamespace(appraisal_deductions_id=1, vehicle_appraisal_id=999999,
+                        description="PINTURA", amount=Decimal("150000")),
+        SimpleNamespace(appraisal_deductions_id=2, vehicle_appraisal_id=999999,
+                        description="LLANTAS", amount=Decimal("80000")),
+    ]
+
+
+def measure(service, template_data, runs, output_dir, label):
+    timings = []
+    output_path = Path(output_dir) / f"{label}.pdf"
+    for _ in range(runs):
+        start = time.perf_counter()
+        service.render_pdf(template_data, output_path)
+        timings.append(time.perf_counter() - start)
+    return output_path.stat().st_size, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    prepare_certificate_assets()
+    service = CertificateService()
+    service.warm_up()
+    template_data = service.build_template_data(sample_appraisal(), sample_deductions())
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        results = {}
+        for label, use_derivatives in (("original", False), ("optimized", True)):
+            service.use_asset_derivatives = use_derivatives
+            results[label] = measure(service, template_data, args.runs, output_dir, label)
+
+    print(f"{'variant':<10} {'pdf bytes':>12} {'median ms':>10} {'min ms':>8}")
+    for label, (size, timings) in results.items():
+        print(f"{label:<10} {size:>12,} {statistics.median(timings) * 1000:>10.1f} "
+              f"{min(timings) * 1000:>8.1f}")
+
+    original_size = results["original"][0]
+    optimized_size = results["optimized"][0]
+    print(f"PDF size reduction: {100 * (1 - optimized_size / original_size):.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Measure the per-request setup cost removed by sharing one CertificateService.
+
+Compares building a new service (Jinja environment, template compile, asset
+URL map) plus the template context on every request against reusing the
+singleton from get_certificate_service. No WeasyPrint render is performed.
+
+Usage:
+    python -m benchmarks.bench_certificate_service_setup [--iterations 500]
+"""
+import argparse
+import time
+
+from benchmarks.bench_certificate_assets import sample_appraisal, sample_deductions
+from app.certs.certificate_service import CertificateService, get_certificate_service
+
+
+def per_request_service(appraisal, deductions):
+    service = CertificateService()
+    template_data = service.build_template_data(appraisal, deductions)
+    return service.cache_key(template_data)
+
+
+def shared_service(appraisal, deductions):
+    service = get_certificate_service()
+    template_data = service.build_template_data(appraisal, deductions)
+    return service.cache_key(template_data)
+
+
+def timed(func, iterations, *args):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(*args)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CertificateService setup microbenchmark")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    appraisal, deductions = sample_appraisal(), sample_deductions()
+    # Warm both paths (imports, file digests, singleton creation)
+    per_request_service(appraisal, deductions)
+    shared_service(appraisal, deductions)
+
+    per_request = timed(per_request_service, args.iterations, appraisal, deductions)
+    shared = timed(shared_service, args.iterations, appraisal, deductions)
+
+    print(f"new service per request: {per_request * 1e6:10.1f} us/request")
+    print(f"shared singleton:        {shared * 1e6:10.1f} us/request")
+    print(f"setup cost eliminated:   {(per_request - shared) * 1e6:10.1f} us/request "
+          f"({per_request / shared:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Round-trips and latency of the dashboard summary against a seeded SQLite database.
+
+Compares the six-query summary (on vehicle_appraisal, then on the rollups)
+with the single-pass conditional aggregation of
+app.dashboard.services.periods, and times /dashboard/compare for each period.
+
+SQLite runs in-process, so a round-trip costs nothing here; --rtt-ms adds a
+simulated network round-trip to every statement, as against a remote
+PostgreSQL.
+
+Usage:
+    python -m benchmarks.bench_dashboard_summary [--rows 100000] [--repeat 50] [--rtt-ms 0]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.appraisals.models.appraisals import VehicleAppraisal
+from app.dashboard.models.daily_stats import AppraisalDailyStats, AppraisalDailyBrandStats, AppraisalDailyApplicants
+from app.dashboard.services.periods import PERIODS, compare, period_bounds, period_windows
+from app.dashboard.services.rollups import rebuild
+from benchmarks.bench_appraisal_list import seed
+
+# Inside the seeded date range (2015-2024)
+REFERENCE_DATE = date(2020, 6, 15)
+
+
+def six_queries(db, metrics, today, *conditions):
+    """
+    The summary as it was: one query per metric and month. The current month
+    is bounded like the single pass (the old endpoint left it open-ended), so
+    both variants aggregate the same rows.
+
+    Args:
+        metrics: (aggregate, day column) pairs for count, amount and applicants
+        conditions: Extra filters applied to every query
+    """
+    first_day_month, last_day_month = period_bounds("month", today)
+    last_day_last_month = first_day_month - timedelta(days=1)
+    first_day_last_month = last_day_last_month.replace(day=1)
+    result = []
+    for expression, day in metrics:
+        result.append(db.query(expression).filter(
+            day >= first_day_month, day <= last_day_month, *conditions
+        ).scalar())
+        result.append(db.query(expression).filter(
+            day >= first_day_last_month, day <= last_day_last_month, *conditions
+        ).scalar())
+    return result
+
+
+def timed(label: str, repeat: int, engine, fetch, rtt_ms: float = 0) -> None:
+    statements = []
+
+    def count_statement(*args):
+        statements.append(1)
+        if rtt_ms:
+            time.sleep(rtt_ms / 1000)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    timings = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fetch()
+            timings.append(time.perf_counter() - start)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    timings.sort()
+    print(f"{label:40s} {len(statements) // repeat:3d} round-trips   "
+          f"median {timings[len(timings) // 2] * 1000:8.2f} ms   min {timings[0] * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard summary benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rtt-ms", type=float, default=0, help="Simulated network round-trip per statement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        start = time.perf_counter()
+        seed(engine, args.rows, args.seed)
+        Base.metadata.create_all(engine, tables=[
+            AppraisalDailyStats.__table__, AppraisalDailyBrandStats.__table__, AppraisalDailyApplicants.__table__
+        ])
+        with Session(engine) as db:
+            days = rebuild(db)
+            db.commit()
+        print(f"Seeded {args.rows:,} appraisals ({days:,} days) in {time.perf_counter() - start:.1f}s\n")
+
+        with Session(engine) as db:
+            print(f"summary ({REFERENCE_DATE:%Y-%m} vs previous month, simulated RTT {args.rtt_ms} ms)")
+            appraisal_date = VehicleAppraisal.appraisal_date
+            base_metrics = [
+                (func.count(VehicleAppraisal.vehicle_appraisal_id), appraisal_date),
+                (func.coalesce(func.sum(VehicleAppraisal.appraisal_value_trochez), 0), appraisal_date),
+                (func.count(func.distinct(VehicleAppraisal.applicant)), appraisal_date),
+            ]
+            rollup_metrics = [
+                (func.coalesce(func.sum(AppraisalDailyStats.appraisals_count), 0), AppraisalDailyStats.day),
+                (func.coalesce(func.sum(AppraisalDailyStats.value_trochez_sum), 0), AppraisalDailyStats.day),
+                (func.count(func.distinct(AppraisalDailyApplicants.applicant)), AppraisalDailyApplicants.day),
+            ]
+            timed("  six queries, vehicle_appraisal", args.repeat, engine, rtt_ms=args.rtt_ms,
+                  fetch=lambda: six_queries(db, base_metrics, REFERENCE_DATE, VehicleAppraisal.is_deleted == False))
+            timed("  six queries, rollups (before)", args.repeat, engine, rtt_ms=args.rtt_ms,
+                  fetch=lambda: six_queries(db, rollup_metrics, REFERENCE_DATE))
+            timed("  single pass, rollups", args.repeat, engine, rtt_ms=args.rtt_ms,
+                  fetch=lambda: compare(db, period_windows("month", REFERENCE_DATE)))
+
+            print("\ncompare (current vs previous period, single pass)")
+            for period in PERIODS:
+                windows = period_windows(period, REFERENCE_DATE)
+                timed(f"  period={period}", args.repeat, engine, rtt_ms=args.rtt_ms,
+                      fetch=lambda: compare(db, windows))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
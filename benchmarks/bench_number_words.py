@@ -0,0 +1,44 @@
+"""
+Throughput of the Spanish amount-to-words engine in app.certs.number_words.
+
+Usage:
+    python -m benchmarks.bench_number_words [--amounts 200000]
+"""
+import argparse
+import random
+import time
+
+from app.certs import number_words
+
+
+def main():
+    parser = argparse.ArgumentParser(description="number_to_words throughput")
+    parser.add_argument("--amounts", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Mix of typical certificate amounts (USD, colones) and large totals
+    amounts = [
+        rng.choice((rng.randint(1000, 60000), rng.randint(500000, 50000000), rng.randint(0, number_words.MAX_NUMBER)))
+        for _ in range(args.amounts)
+    ]
+
+    number_words._number_to_words.cache_clear()
+    start = time.perf_counter()
+    for amount in amounts:
+        number_words.number_to_words(amount)
+    single = time.perf_counter() - start
+
+    number_words._number_to_words.cache_clear()
+    start = time.perf_counter()
+    number_words.numbers_to_words(amounts)
+    batch = time.perf_counter() - start
+
+    print(f"number_to_words:  {args.amounts / single:12,.0f} amounts/s")
+    print(f"numbers_to_words: {args.amounts / batch:12,.0f} amounts/s")
+    print(f"chunk cache: {number_words._below_thousand.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
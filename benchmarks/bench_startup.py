@@ -0,0 +1,112 @@
+"""
+Cold start cost of the API process.
+
+Each step runs in a fresh interpreter so module caches do not hide import
+time:
+
+- import of app.main (everything uvicorn loads before serving)
+- import of weasyprint alone
+- first database connection plus ``SELECT 1``
+- Base.metadata.create_all, the schema check the app used to run on boot
+
+It then prints an import-time profile of app.main (``python -X importtime``)
+with the slowest top-level packages, which shows whether weasyprint, PIL or
+other heavy dependencies are loaded at import time.
+
+Usage:
+    python -m benchmarks.bench_startup [--repeat 3] [--skip-db] [--top 15]
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+STEPS = {
+    "import app.main": "import app.main",
+    "import weasyprint": "import weasyprint",
+    "db connect + SELECT 1": (
+        "from sqlalchemy import text\n"
+        "from app.database import engine\n"
+        "start = time.perf_counter()\n"
+        "with engine.connect() as connection:\n"
+        "    connection.execute(text('SELECT 1'))\n"
+    ),
+    "create_all (legacy boot)": (
+        "from app.database import init_db\n"
+        "start = time.perf_counter()\n"
+        "init_db('create_all')\n"
+    ),
+}
+DB_STEPS = ("db connect + SELECT 1", "create_all (legacy boot)")
+HEAVY_PACKAGES = ("weasyprint", "PIL", "fontTools", "cffi", "pydyf", "tinycss2")
+
+# Steps time themselves from `start`; snippets that reset it exclude their setup imports
+RUNNER = "import time\nstart = time.perf_counter()\n{code}\nprint(time.perf_counter() - start)\n"
+
+
+def run_step(code: str) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", RUNNER.format(code=code)],
+        capture_output=True, text=True, check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile(module: str):
+    """
+    Cumulative import time per top-level package from ``-X importtime``.
+
+    Returns:
+        List of (package, cumulative microseconds), slowest first
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (field.strip() for field in line[len("import time:"):].split("|"))
+        # Top-level entries are not indented; their cumulative time covers their submodules
+        if name == name.lstrip():
+            top = name.split(".")[0]
+            packages[top] = packages.get(top, 0) + int(cumulative)
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API cold start benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-db", action="store_true", help="Skip the steps that need a database")
+    parser.add_argument("--top", type=int, default=15, help="Packages shown in the import profile")
+    args = parser.parse_args()
+
+    for name, code in STEPS.items():
+        if args.skip_db and name in DB_STEPS:
+            continue
+        try:
+            timings = sorted(run_step(code) for _ in range(args.repeat))
+        except subprocess.CalledProcessError as e:
+            print(f"{name:28s} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{name:28s} median {timings[len(timings) // 2] * 1000:9.1f} ms   min {timings[0] * 1000:9.1f} ms")
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    print(f"{'interpreter start':28s}        {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+    try:
+        profile = import_profile("app.main")
+    except subprocess.CalledProcessError as e:
+        print(f"\nimport profile failed: {e.stderr.strip().splitlines()[-1]}")
+        return
+    print(f"\nimport time of app.main by package (-X importtime), top {args.top}:")
+    for package, microseconds in profile[:args.top]:
+        print(f"  {package:28s} {microseconds / 1000:9.1f} ms")
+    loaded = [package for package, _ in profile if package in HEAVY_PACKAGES]
+    print(f"heavy packages imported at startup: {', '.join(loaded) if loaded else 'none'}")
+
+
+if __name__ == "__main__":
+    main()
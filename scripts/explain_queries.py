@@ -0,0 +1,138 @@
+"""
+Print the query plan of every hot router query and flag full table scans.
+
+Builds the same queries the routers run (listing, cursor page, search, counts,
+single appraisal, deductions, dashboard and login lookups) and runs EXPLAIN on
+them against the configured database (DATABASE_URL or the MYSQL_* settings).
+Exits with status 1 when a query scans vehicle_appraisal, appraisal_deductions
+or users sequentially, so it can be used after migrating. On nearly empty
+tables PostgreSQL rightly prefers sequential scans; run it against a copy of
+production data.
+
+Usage:
+    python -m scripts.explain_queries [--analyze] [--search TOYOTA]
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import func, extract
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.appraisals.models.appraisals import VehicleAppraisal, AppraisalDeductions
+from app.appraisals.services.pagination import KEYSET_ORDERING, encode_cursor, keyset_filter
+from app.appraisals.services.search import search_filter, search_ordering
+from app.security.models.users import User
+from app.dashboard.models.daily_stats import AppraisalDailyStats, AppraisalDailyBrandStats
+from app.dashboard.services.periods import comparison_query, period_windows
+
+SCANNED_TABLES = ("vehicle_appraisal", "appraisal_deductions", "users")
+
+
+def router_queries(db: Session, search: str):
+    """(name, query) pairs mirroring the queries issued by the routers."""
+    live = db.query(VehicleAppraisal).filter(VehicleAppraisal.is_deleted == False)
+    today = date.today()
+    month_start = today.replace(day=1)
+    week_start = today - timedelta(days=today.weekday())
+
+    first = live.order_by(*KEYSET_ORDERING).first()
+    queries = [
+        ("appraisals: page 1", live.order_by(*KEYSET_ORDERING).limit(11)),
+        ("appraisals: page 50", live.order_by(*KEYSET_ORDERING).offset(490).limit(11)),
+        ("appraisals: count", live.with_entities(func.count())),
+    ]
+    if first is not None:
+        queries.append((
+            "appraisals: cursor page",
+            live.filter(keyset_filter(encode_cursor(first))).order_by(*KEYSET_ORDERING).limit(11),
+        ))
+    searched = live.filter(search_filter(db, search))
+    queries += [
+        ("search: page 1", searched.order_by(*search_ordering(db, search)).limit(11)),
+        ("search: count", searched.with_entities(func.count())),
+        ("appraisal by id", live.filter(VehicleAppraisal.vehicle_appraisal_id == (first.vehicle_appraisal_id if first else 1))),
+        ("deductions by appraisal", db.query(AppraisalDeductions).filter(
+            AppraisalDeductions.vehicle_appraisal_id.in_([first.vehicle_appraisal_id if first else 1])
+        )),
+        ("dashboard: summary / compare", comparison_query(period_windows("month", today))),
+        ("dashboard: latest week", db.query(func.max(AppraisalDailyStats.day)).filter(
+            AppraisalDailyStats.day.between(week_start - timedelta(weeks=11), week_start + timedelta(days=6)),
+        )),
+        ("dashboard: ventas-dia", db.query(
+            AppraisalDailyStats.day, AppraisalDailyStats.value_usd_sum,
+        ).filter(
+            AppraisalDailyStats.day >= week_start,
+            AppraisalDailyStats.day <= week_start + timedelta(days=6),
+        )),
+        ("dashboard: ventas-mes", db.query(
+            extract('month', AppraisalDailyStats.day).label('mes'),
+            func.coalesce(func.sum(AppraisalDailyStats.value_usd_sum), 0),
+        ).filter(
+            AppraisalDailyStats.day >= date(today.year, 1, 1),
+            AppraisalDailyStats.day < date(today.year + 1, 1, 1),
+        ).group_by('mes')),
+        ("dashboard: carros-mas-avaluos", db.query(
+            AppraisalDailyBrandStats.brand,
+            func.sum(AppraisalDailyBrandStats.appraisals_count),
+        ).filter(AppraisalDailyBrandStats.day >= month_start).group_by(AppraisalDailyBrandStats.brand)
+            .order_by(func.sum(AppraisalDailyBrandStats.appraisals_count).desc()).limit(5)),
+        ("login: user by email", db.query(User).filter(User.email == "usuario@example.com")),
+    ]
+    return queries
+
+
+def explain(db: Session, query, analyze: bool):
+    """Plan lines for ``query`` on the session's database."""
+    dialect = db.get_bind().dialect
+    # Query objects and plain select() statements
+    compiled = getattr(query, "statement", query).compile(dialect=dialect)
+    if dialect.name == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS)" if analyze else "EXPLAIN"
+        rows = db.connection().exec_driver_sql(f"{prefix} {compiled}", compiled.params).all()
+        return [row[0] for row in rows]
+    if dialect.name == "sqlite":
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+        return [row[-1] for row in rows]
+    raise SystemExit(f"EXPLAIN is not supported for {dialect.name}")
+
+
+def sequential_scans(plan):
+    """Tables of SCANNED_TABLES read without an index in the plan."""
+    scanned = set()
+    for line in plan:
+        for table in SCANNED_TABLES:
+            if f"Seq Scan on {table}" in line or line.strip() == f"SCAN {table}":
+                scanned.add(table)
+    return scanned
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the router queries")
+    parser.add_argument("--analyze", action="store_true", help="Run EXPLAIN ANALYZE (PostgreSQL)")
+    parser.add_argument("--search", default="toyota", help="Search term for the search queries")
+    args = parser.parse_args()
+
+    failures = []
+    with Session(engine) as db:
+        for name, query in router_queries(db, args.search):
+            plan = explain(db, query, args.analyze)
+            scans = sequential_scans(plan)
+            status = f"SEQ SCAN: {', '.join(sorted(scans))}" if scans else "ok"
+            print(f"== {name} [{status}]")
+            for line in plan:
+                print(f"   {line}")
+            print()
+            if scans:
+                failures.append(name)
+
+    if failures:
+        print(f"{len(failures)} queries without index use: {', '.join(failures)}")
+        sys.exit(1)
+    print("All queries use indexes")
+
+
+if __name__ == "__main__":
+    main()
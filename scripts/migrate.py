@@ -0,0 +1,22 @@
+"""
+Apply the database migrations; the release command of every deploy.
+
+Unlike a bare ``alembic upgrade head``, a database created before migrations
+were introduced (tables present, no alembic_version) is stamped with the
+baseline revision first instead of failing on its existing tables.
+
+Usage:
+    python -m scripts.migrate
+"""
+import logging
+
+from app.database import upgrade_schema
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    upgrade_schema()
+
+
+if __name__ == "__main__":
+    main()
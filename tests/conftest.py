@@ -0,0 +1,18 @@
+import os
+import tempfile
+
+# app/__init__ imports app.database, which needs the settings and a database
+# URL. A SQLite file rather than an in-memory database, so the sync and async
+# engines of the router tests see the same tables
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+for name, value in {
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "DB_NAME": "test",
+}.items():
+    os.environ.setdefault(name, value)
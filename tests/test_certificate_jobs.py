@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.certs.certificate_jobs import JOB_DONE, CertificateJobQueue
+
+
+def make_queue(queue_depth=2, max_jobs=10):
+    return CertificateJobQueue(workers=1, ttl_seconds=3600, queue_depth=queue_depth, max_jobs=max_jobs, retry_after=7)
+
+
+def assert_unavailable(excinfo):
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.headers["Retry-After"] == "7"
+
+
+def test_submit_before_start_is_rejected_with_503():
+    with pytest.raises(HTTPException) as excinfo:
+        make_queue().submit(1)
+    assert_unavailable(excinfo)
+
+
+def test_full_queue_is_rejected_with_503():
+    async def scenario():
+        queue = make_queue(queue_depth=2)
+        await queue.start()
+        try:
+            # Nothing is awaited, so the workers do not pick these up
+            queue.submit(1)
+            queue.submit(2)
+            assert queue.submit(1) is queue.submit(1)
+            with pytest.raises(HTTPException) as excinfo:
+                queue.submit(3)
+            assert_unavailable(excinfo)
+        finally:
+            await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_oldest_finished_jobs_make_room_under_the_cap():
+    async def scenario():
+        queue = make_queue(queue_depth=5, max_jobs=3)
+        await queue.start()
+        try:
+            jobs = [queue.submit(vehicle_appraisal_id) for vehicle_appraisal_id in (1, 2, 3)]
+            for offset, job in enumerate(jobs):
+                job.status = JOB_DONE
+                job.finished_at = time.time() + offset
+            queue.submit(4)
+            assert queue.get(jobs[0].job_id) is None
+            assert queue.get(jobs[1].job_id) is jobs[1]
+        finally:
+            await queue.stop()
+
+    asyncio.run(scenario())
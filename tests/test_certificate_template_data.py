@@ -0,0 +1,29 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.appraisals.models.appraisals import VehicleAppraisal
+from app.certs.certificate_service import get_certificate_service
+
+
+@pytest.fixture(scope="module")
+def service():
+    return get_certificate_service()
+
+
+def template_data(service, appraisal_date):
+    appraisal = VehicleAppraisal(vehicle_appraisal_id=1, appraisal_date=appraisal_date)
+    return service.build_template_data(appraisal, [])
+
+
+def test_appraisal_date_is_printed(service):
+    # appraisal_date is a Date column
+    assert template_data(service, date(2024, 3, 5))["formatted_date"] == "05 mar 2024"
+    assert template_data(service, datetime(2024, 3, 5, 10, 30))["formatted_date"] == "05 mar 2024"
+
+
+def test_cache_key_does_not_depend_on_the_render_day(service):
+    # Undated appraisals print the render date, filled in at render time
+    data = template_data(service, None)
+    assert data["formatted_date"] is None
+    assert service.cache_key(data) == service.cache_key(template_data(service, None))
@@ -0,0 +1,119 @@
+import re
+from decimal import Decimal
+
+import pytest
+from hypothesis import assume, given, strategies as st
+
+from app.certs.number_words import MAX_NUMBER, number_to_words, numbers_to_words
+
+supported = st.integers(min_value=-MAX_NUMBER, max_value=MAX_NUMBER)
+non_negative = st.integers(min_value=0, max_value=MAX_NUMBER)
+
+
+@given(supported)
+def test_words_are_non_empty_and_well_spaced(number):
+    words = number_to_words(number)
+    assert words
+    assert words == words.strip()
+    assert "  " not in words
+    assert words == words.upper()
+
+
+@given(st.integers(min_value=1, max_value=MAX_NUMBER))
+def test_negative_numbers_are_prefixed(number):
+    assert number_to_words(-number) == "MENOS " + number_to_words(number)
+
+
+@given(non_negative)
+def test_full_forms_are_never_used_before_a_noun(number):
+    # Amounts precede the currency name: UN / VEINTIÚN, never UNO / VEINTIUNO
+    words = number_to_words(number)
+    assert "UNO" not in words.split()
+    assert "VEINTIUNO" not in words
+    assert "VEINTE Y" not in words
+
+
+@given(non_negative)
+def test_thousand_has_no_un_prefix(number):
+    # A thousands group of exactly one is "MIL" ("CIENTO UN MIL" is fine, it is 101)
+    assert not re.search(r"(^|\b(MILLÓN|MILLONES|BILLÓN|BILLONES) )UN MIL\b", number_to_words(number))
+
+
+@given(st.integers(min_value=0, max_value=10 ** 12 - 1), st.integers(min_value=0, max_value=999))
+def test_single_thousand_is_mil(millions, rest):
+    words = number_to_words(millions * 10 ** 6 + 1000 + rest)
+    assert re.search(r"(^|\b(MILLÓN|MILLONES|BILLÓN|BILLONES) )MIL\b", words)
+    assert not re.search(r"(^|\b(MILLÓN|MILLONES|BILLÓN|BILLONES) )UN MIL\b", words)
+
+
+@given(st.integers(min_value=2, max_value=999), st.integers(min_value=0, max_value=999))
+def test_thousands_compose(thousands, rest):
+    expected = f"{number_to_words(thousands)} MIL"
+    if rest:
+        expected += f" {number_to_words(rest)}"
+    assert number_to_words(thousands * 1000 + rest) == expected
+
+
+@given(st.integers(min_value=1, max_value=10 ** 6 - 1), st.integers(min_value=0, max_value=10 ** 6 - 1))
+def test_millions_compose(millions, rest):
+    expected = "UN MILLÓN" if millions == 1 else f"{number_to_words(millions)} MILLONES"
+    if rest:
+        expected += f" {number_to_words(rest)}"
+    assert number_to_words(millions * 10 ** 6 + rest) == expected
+
+
+@given(st.integers(min_value=1, max_value=10 ** 6 - 1), st.integers(min_value=0, max_value=10 ** 12 - 1))
+def test_billions_compose(billions, rest):
+    expected = "UN BILLÓN" if billions == 1 else f"{number_to_words(billions)} BILLONES"
+    if rest:
+        expected += f" {number_to_words(rest)}"
+    assert number_to_words(billions * 10 ** 12 + rest) == expected
+
+
+@given(non_negative, non_negative)
+def test_distinct_numbers_have_distinct_words(first, second):
+    assume(first != second)
+    assert number_to_words(first) != number_to_words(second)
+
+
+@given(st.lists(supported, max_size=50))
+def test_batch_conversion_matches_single_conversion(numbers):
+    assert numbers_to_words(numbers) == [number_to_words(number) for number in numbers]
+
+
+@pytest.mark.parametrize("number, words", [
+    (0, "CERO"),
+    (1, "UN"),
+    (16, "DIECISÉIS"),
+    (21, "VEINTIÚN"),
+    (22, "VEINTIDÓS"),
+    (31, "TREINTA Y UN"),
+    (100, "CIEN"),
+    (101, "CIENTO UN"),
+    (1000, "MIL"),
+    (1001, "MIL UN"),
+    (21000, "VEINTIÚN MIL"),
+    (31000, "TREINTA Y UN MIL"),
+    (10 ** 6, "UN MILLÓN"),
+    (21 * 10 ** 6, "VEINTIÚN MILLONES"),
+    (10 ** 9, "MIL MILLONES"),
+    (10 ** 12, "UN BILLÓN"),
+    (2 * 10 ** 12 + 1000, "DOS BILLONES MIL"),
+])
+def test_known_values(number, words):
+    assert number_to_words(number) == words
+
+
+def test_largest_supported_number():
+    assert number_to_words(MAX_NUMBER).startswith("NOVECIENTOS NOVENTA Y NUEVE MIL NOVECIENTOS NOVENTA Y NUEVE BILLONES")
+
+
+@pytest.mark.parametrize("number", [MAX_NUMBER + 1, -MAX_NUMBER - 1, 10 ** 30])
+def test_out_of_range_raises(number):
+    with pytest.raises(ValueError):
+        number_to_words(number)
+
+
+def test_decimal_and_float_amounts_are_truncated():
+    assert number_to_words(Decimal("1234.99")) == number_to_words(1234)
+    assert number_to_words(21.7) == "VEINTIÚN"
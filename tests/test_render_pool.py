@@ -0,0 +1,54 @@
+import asyncio
+import os
+import signal
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.certs import render_pool as render_pool_module
+from app.certs.render_pool import RenderPool, _worker_pid
+
+# Workers are spawned, so they import these functions from this module; they
+# stand in for the WeasyPrint initializer and render
+
+
+def _init_without_weasyprint():
+    pass
+
+
+def _render_or_crash(template_data):
+    if template_data == "crash":
+        os.kill(os.getpid(), signal.SIGKILL)
+    return f"pdf:{template_data}".encode()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(render_pool_module, "_init_worker", _init_without_weasyprint)
+    monkeypatch.setattr(render_pool_module, "_render_in_worker", _render_or_crash)
+    pool = RenderPool(workers=1, queue_depth=2, retry_after=1)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def test_renders_in_the_worker(pool):
+    assert asyncio.run(pool.render("ok")) == b"pdf:ok"
+
+
+def test_killed_worker_is_replaced_and_the_render_retried(pool):
+    executor = pool._executor
+    worker_pid = executor.submit(_worker_pid).result(timeout=30)
+    os.kill(worker_pid, signal.SIGKILL)
+
+    assert asyncio.run(pool.render("ok")) == b"pdf:ok"
+    assert pool._executor is not executor
+    assert pool.pending == 0
+
+
+def test_render_crashing_every_worker_fails_but_leaves_a_working_pool(pool):
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(pool.render("crash"))
+
+    assert asyncio.run(pool.render("ok")) == b"pdf:ok"
+    assert pool.pending == 0
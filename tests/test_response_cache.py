@@ -0,0 +1,79 @@
+import time
+from contextlib import contextmanager
+
+from app.core.cache import CacheEntry, CachePolicy, MemoryBackend, ResponseCache
+
+POLICY = CachePolicy(ttl=60, stale=300)
+
+
+class Database:
+    """Stand-in for a session: computations read ``value`` from it."""
+
+    def __init__(self, value):
+        self.value = value
+
+
+def compute(db):
+    return db.value
+
+
+def session_factory(db):
+    @contextmanager
+    def factory():
+        yield db
+    return factory
+
+
+def make_cache(primary=None, settle_seconds=0):
+    return ResponseCache(
+        MemoryBackend(), "test",
+        session_factory=session_factory(Database("replica")),
+        primary_session_factory=session_factory(primary) if primary else None,
+        settle_seconds=settle_seconds,
+    )
+
+
+def test_fresh_entries_are_served_from_the_cache():
+    cache = make_cache()
+    assert cache.fetch("widget", [1], compute, Database("first"), POLICY) == "first"
+    assert cache.fetch("widget", [1], compute, Database("second"), POLICY) == "first"
+    assert cache.metrics()["endpoints"]["widget"]["hits"] == 1
+
+
+def test_misses_after_a_write_are_computed_on_the_primary():
+    cache = make_cache(primary=Database("primary"), settle_seconds=5)
+    cache.fetch("widget", [1], compute, Database("before write"), POLICY)
+    cache.invalidate()
+    # The request session is a replica that does not have the write yet
+    assert cache.fetch("widget", [1], compute, Database("replica"), POLICY) == "primary"
+    assert cache.fetch("widget", [1], compute, Database("replica"), POLICY) == "primary"
+
+
+def test_misses_after_a_write_are_not_stored_without_a_primary():
+    cache = make_cache(settle_seconds=5)
+    cache.invalidate()
+    assert cache.fetch("widget", [1], compute, Database("replica"), POLICY) == "replica"
+    assert cache.fetch("widget", [1], compute, Database("later"), POLICY) == "later"
+
+
+def test_replica_is_used_again_once_the_write_has_settled():
+    cache = make_cache(primary=Database("primary"), settle_seconds=5)
+    cache.backend.set_generation(cache.generation_key, time.time() - 10)
+    assert cache.fetch("widget", [1], compute, Database("replica"), POLICY) == "replica"
+
+
+def test_entries_computed_before_the_latest_write_are_discarded():
+    cache = make_cache()
+    generation = cache.backend.generation(cache.generation_key)
+    cache.invalidate()
+    # Stored late by a computation that started before the write (e.g. on another instance)
+    entry = CacheEntry("before write", time.time(), generation)
+    cache.backend.set(cache.key_for("widget", 1), entry, 60)
+    assert cache.fetch("widget", [1], compute, Database("after write"), POLICY) == "after write"
+
+
+def test_recompute_replaces_the_cached_entry():
+    cache = make_cache()
+    cache.fetch("widget", [1], compute, Database("cached"), POLICY)
+    assert cache.recompute("widget", [1], compute, Database("primary"), POLICY) == "primary"
+    assert cache.fetch("widget", [1], compute, Database("replica"), POLICY) == "primary"
@@ -0,0 +1,35 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.dashboard.routers.dashboard import STREAM_TOKEN_SCOPE
+from app.security.utils import create_access_token, get_user_for_token
+
+
+def user_for(token, scope=None):
+    return asyncio.run(get_user_for_token(token, scope=scope))
+
+
+def test_access_tokens_are_not_accepted_as_stream_tokens():
+    token = create_access_token({"sub": "user@example.com"})
+    with pytest.raises(HTTPException) as excinfo:
+        user_for(token, scope=STREAM_TOKEN_SCOPE)
+    assert excinfo.value.status_code == 401
+
+
+def test_stream_tokens_are_not_accepted_as_access_tokens():
+    token = create_access_token({"sub": "user@example.com", "scope": STREAM_TOKEN_SCOPE})
+    with pytest.raises(HTTPException) as excinfo:
+        user_for(token)
+    assert excinfo.value.status_code == 401
+
+
+def test_expired_stream_tokens_are_rejected():
+    token = create_access_token(
+        {"sub": "user@example.com", "scope": STREAM_TOKEN_SCOPE}, expires_delta=timedelta(seconds=-1)
+    )
+    with pytest.raises(HTTPException) as excinfo:
+        user_for(token, scope=STREAM_TOKEN_SCOPE)
+    assert excinfo.value.status_code == 401
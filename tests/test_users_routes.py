@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import Base, SessionLocal, async_engine, engine
+from app.security.models.user_types import UserType
+from app.security.models.users import User
+from app.security.routers import users_router
+from app.security.utils import create_access_token, verify_password
+
+TABLES = [UserType.__table__, User.__table__]
+
+
+@pytest.fixture
+def client():
+    Base.metadata.create_all(engine, tables=TABLES)
+    with SessionLocal() as db:
+        # Primary keys far from 1, so a lookup by the wrong column cannot match by chance
+        db.add(UserType(user_type_id=7, name="Administrador", code="ADM", description="Administrador",
+                        created_date=datetime.now()))
+        db.add(User(user_id=41, user_type_id=7, name="Admin", password="x", email="admin@example.com", is_active=True))
+        db.add(User(user_id=42, user_type_id=7, name="Ana", password="x", email="ana@example.com", is_active=True))
+        db.commit()
+
+    # Only the users router: the full app would start the scheduler and the render pool
+    app = FastAPI()
+    app.include_router(users_router, prefix="/users")
+    token = create_access_token({"sub": "admin@example.com"})
+    with TestClient(app, headers={"Authorization": f"Bearer {token}"}) as client:
+        yield client
+        # Pooled aiosqlite connections belong to the test client's event loop
+        client.portal.call(async_engine.dispose)
+    Base.metadata.drop_all(engine, tables=TABLES)
+
+
+def test_read_user_by_user_id(client):
+    response = client.get("/users/42")
+    assert response.status_code == 200
+    assert response.json()["email"] == "ana@example.com"
+    assert client.get("/users/999").status_code == 404
+
+
+def test_create_user_checks_the_user_type(client):
+    user = {"email": "luis@example.com", "name": "Luis", "password": "secreto123", "user_type_id": 7}
+    assert client.post("/users/", json=user).status_code == 201
+    response = client.post("/users/", json={**user, "email": "otro@example.com", "user_type_id": 999})
+    assert response.status_code == 400
+
+
+def test_update_user_by_user_id(client):
+    response = client.put("/users/42", json={"name": "Ana María", "user_type_id": 7})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Ana María"
+    assert client.put("/users/42", json={"user_type_id": 999}).status_code == 400
+    assert client.put("/users/999", json={"name": "Nadie"}).status_code == 404
+
+
+def test_delete_user_by_user_id(client):
+    assert client.delete("/users/42").status_code == 204
+    assert client.get("/users/42").status_code == 404
+    assert client.delete("/users/42").status_code == 404
+
+
+def test_update_user_password_stores_a_hash(client):
+    assert client.put("/users/42", json={"password": "nueva-clave"}).status_code == 200
+    with SessionLocal() as db:
+        password = db.get(User, 42).password
+    assert verify_password("nueva-clave", password)